@@ -0,0 +1,82 @@
+"""Interpreted vs compiled schema execution.
+
+Run from repository root:
+
+    python -m benchmarks.compiled
+
+On the 50-field schema compiled run is about 1.1-1.6x faster than
+Executor.run. run_many runs the same compiled plan and adds per-record
+bookkeeping (batch stats, results), it is not faster than compiled run.
+"""
+from __future__ import print_function
+
+import timeit
+
+from sculpt.core import Context, Executor
+from sculpt.fields import Input, Output, VirtualVar
+from sculpt.operations import Copy, Apply, Combine, Each, Switch, Validate
+from sculpt.validation import NotEmptyValidator
+
+
+WIDTH = 50
+RECORDS = 2000
+
+
+def make_schema(width=WIDTH):
+    operations = [
+        Copy(Input("fields.f{}".format(i)), Output("out.f{}".format(i)))
+        for i in range(width)
+    ]
+    operations.extend([
+        Combine(
+            Copy(Input("kind"), VirtualVar("kind")),
+            Apply(VirtualVar("kind"), str.upper),
+        ),
+        Switch(Input("kind"))
+        .case(["a"], [Copy(Input("fields.f0"), Output("a"))])
+        .case(["b"], [Copy(Input("fields.f1"), Output("b"))])
+        .default([]),
+        Each(Input("items"), Output("items"), [
+            Copy(Input("id"), Output("id")),
+            Copy(Input("missing"), Output("missing")),
+        ]),
+        Validate(Input("kind"), NotEmptyValidator()),
+    ])
+    return operations
+
+
+def make_records(count=RECORDS, width=WIDTH):
+    return [{
+        "kind": "ab"[i % 2],
+        "fields": {"f{}".format(f): i * f for f in range(width)},
+        "items": [{"id": j} for j in range(5)],
+    } for i in range(count)]
+
+
+def measure(run, records, repeat=5):
+    def run_all():
+        for record in records:
+            run(Context(record))
+    return min(timeit.repeat(run_all, number=1, repeat=repeat))
+
+
+def main():
+    executor = Executor(make_schema())
+    compiled = executor.compile()
+    records = make_records()
+
+    interpreted_time = measure(executor.run, records)
+    compiled_time = measure(compiled.run, records)
+    batch_time = min(timeit.repeat(
+        lambda: list(executor.run_many(records)), number=1, repeat=5))
+
+    print("records:     {}".format(len(records)))
+    print("interpreted: {:10.0f} records/s".format(len(records) / interpreted_time))
+    print("compiled:    {:10.0f} records/s".format(len(records) / compiled_time))
+    print("run_many:    {:10.0f} records/s".format(len(records) / batch_time))
+    print("compiled vs interpreted: {:6.2f}x".format(interpreted_time / compiled_time))
+    print("run_many vs compiled:    {:6.2f}x".format(compiled_time / batch_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Cold start: YAML loading, tag resolution and compilation.
+
+Generates a large rule tree (hundreds of !include files, thousands of
+!ref and !fn uses, multi-thousand-case switch) and times each stage
+separately: YAML parsing, tag resolution and compilation. Time of
+nested stages (files parsed and resolved by !include) is not counted
+in the stage which triggered them.
+
+Run from repository root:
+
+    python -m benchmarks.loading
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+from timeit import default_timer
+
+from sculpt.schema import Loader, Resolver
+from sculpt.schema.cache import RulesCache
+from sculpt.schema.compiler import Compiler
+
+
+INCLUDES = 300
+CHILDREN = 50
+REFS = 2000
+FNS = 1000
+CASES = 3000
+REPEAT = 3
+
+
+def write(root, name, text):
+    path = os.path.join(root, name)
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def copy_rule(left, right, indent="  "):
+    return ("{0}- op: copy\n"
+            "{0}  left: {{type: input, key: {1}}}\n"
+            "{0}  right: {{type: output, key: {2}}}\n").format(indent, left, right)
+
+
+def generate(root, includes=INCLUDES, children=CHILDREN, refs=REFS, fns=FNS, cases=CASES):
+    for i in range(includes):
+        write(root, "vars/part_{}.yml".format(i),
+              "name: part_{0}\nweight: {0}\nlimits: {{low: 1, high: {0}}}\n".format(i))
+
+    write(root, "functions.yml",
+          "copy-in-out:\n  defs: ['name']\n  rules:\n" + copy_rule("$name", "$name", "  "))
+
+    for i in range(children):
+        write(root, "rules/child_{}.yml".format(i),
+              "id: child_{0}\n"
+              "variables:\n  key: child_key_{0}\n"
+              "rules:\n".format(i) + copy_rule("!ref key", "!ref key"))
+
+    lines = ["id: parent", "variables:", "  names:"]
+    lines.extend("    f{0}: field_{0}".format(i) for i in range(refs))
+    lines.append("  parts:")
+    lines.extend("    p{0}: !include 'file://vars/part_{0}.yml'".format(i)
+                 for i in range(includes))
+
+    lines.extend(["functions:",
+                  "  - namespace: generic",
+                  "    items: !include 'file://functions.yml'",
+                  "rules:"])
+    for i in range(refs):
+        lines.append(copy_rule("!ref names.f{}".format(i), "out_{}".format(i)).rstrip("\n"))
+    lines.extend("  - !fn {{ref: generic.copy-in-out, defs: {{name: fn_{}}}}}".format(i)
+                 for i in range(fns))
+    lines.extend("  - op: combine\n    ops: !include-rules 'file://rules/child_{}.yml'".format(i)
+                 for i in range(children))
+
+    lines.extend(["  - op: switch",
+                  "    fields: [{type: input, key: kind}]",
+                  "    cases:"])
+    for i in range(cases):
+        lines.append("    - case: [k{}]".format(i))
+        lines.append("      rules:")
+        lines.append(copy_rule("value", "case_{}".format(i), "      ").rstrip("\n"))
+
+    write(root, "parent.yml", "\n".join(lines) + "\n")
+    return "parent.yml"
+
+
+class Timings(object):
+    # exclusive time of named stages, stages may nest
+    def __init__(self):
+        self.totals = {}
+        self._stack = []
+
+    def measure(self, name, func, *args):
+        self._stack.append(0.0)
+        started = default_timer()
+        try:
+            return func(*args)
+        finally:
+            elapsed = default_timer() - started
+            nested = self._stack.pop()
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1] += elapsed
+
+
+class TimedLoader(Loader):
+    def __init__(self, root_dir, timings):
+        super(TimedLoader, self).__init__(root_dir)
+        self.timings = timings
+
+    def load(self, data):
+        parent = super(TimedLoader, self).load
+        return self.timings.measure("parse", parent, data)
+
+
+class TimedResolver(Resolver):
+    def __init__(self, loader, timings, **kwargs):
+        super(TimedResolver, self).__init__(loader, **kwargs)
+        self.timings = timings
+
+    def resolve_pass(self, *args):
+        parent = super(TimedResolver, self).resolve_pass
+        return self.timings.measure("resolve", parent, *args)
+
+
+def load(root, filename):
+    timings = Timings()
+    loader = TimedLoader(root, timings)
+    data = loader.load_file(filename)
+    resolved = TimedResolver(loader, timings).resolve(data)
+    schema = timings.measure("compile", Compiler().compile, resolved.rules.data)
+    return schema, timings.totals
+
+
+def cached_load(root, filename):
+    # warm start from RulesCache, cold one fills it
+    cache = RulesCache(os.path.join(root, "cache"))
+    cache.load_schema(Loader(root), filename)
+    started = default_timer()
+    cache.load_schema(Loader(root), filename)
+    return default_timer() - started
+
+
+def main():
+    root = tempfile.mkdtemp(prefix="sculpt-bench-")
+    try:
+        filename = generate(root)
+        best = {}
+        for _ in range(REPEAT):
+            schema, totals = load(root, filename)
+            for name, elapsed in totals.items():
+                best[name] = min(best.get(name, elapsed), elapsed)
+        warm = cached_load(root, filename)
+    finally:
+        shutil.rmtree(root)
+
+    stages = ["parse", "resolve", "compile"]
+    print("includes: {}, include-rules: {}, refs: {}, fns: {}, cases: {}, operations: {}".format(
+        INCLUDES, CHILDREN, REFS, FNS, CASES, len(schema.operations)))
+    for name in stages:
+        print("{:<24} {:8.3f}s".format(name, best.get(name, 0.0)))
+    print("{:<24} {:8.3f}s".format("total", sum(best.values())))
+    print("{:<24} {:8.3f}s".format("warm start (cache)", warm))
+
+
+if __name__ == "__main__":
+    main()
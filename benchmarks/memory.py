@@ -0,0 +1,73 @@
+"""Memory footprint of schemas and contexts.
+
+Run from repository root (Python 3):
+
+    python -m benchmarks.memory
+"""
+from __future__ import print_function
+
+import gc
+import itertools
+import tracemalloc
+
+from sculpt.core import Context, Executor
+from benchmarks.compiled import make_schema, make_records
+
+
+SCHEMAS = 200
+CONTEXTS = 10000
+
+
+def fresh(label):
+    # labels loaded from rule files are separate string objects
+    return "".join(list(label))
+
+
+def make_loaded_schema(suffix=""):
+    # suffix makes labels distinct from those of other schemas, so nothing
+    # is shared through label caches
+    schema = make_schema()
+    for operation in schema:
+        for name in ("left", "right", "field"):
+            field = getattr(operation, name, None)
+            if field is not None:
+                field.label = fresh(field.label + suffix)
+    return schema
+
+
+def make_distinct_schema(counter=itertools.count()):
+    return make_loaded_schema("_{}".format(next(counter)))
+
+
+def allocated(build, count):
+    # bytes retained per object built by build()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build() for _ in range(count)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / float(count)
+
+
+def main():
+    record = make_records(1)[0]
+
+    schema_size = allocated(lambda: Executor(make_loaded_schema()), SCHEMAS)
+    compiled_size = allocated(lambda: Executor(make_loaded_schema()).plan, SCHEMAS)
+    distinct_size = allocated(lambda: Executor(make_distinct_schema()), SCHEMAS)
+    distinct_compiled_size = allocated(lambda: Executor(make_distinct_schema()).plan, SCHEMAS)
+    context_size = allocated(lambda: Context(record), CONTEXTS)
+
+    print("schema:          {:10.0f} bytes".format(schema_size))
+    print("compiled schema: {:10.0f} bytes".format(compiled_size))
+    print("distinct labels:")
+    print("  schema:          {:10.0f} bytes".format(distinct_size))
+    print("  compiled schema: {:10.0f} bytes".format(distinct_compiled_size))
+    print("context:         {:10.0f} bytes".format(context_size))
+
+
+if __name__ == "__main__":
+    main()
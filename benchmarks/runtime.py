@@ -0,0 +1,236 @@
+"""Execution engine throughput, latency and memory.
+
+Runs synthetic schemas of varying width, depth, Each fan-out and Switch
+case count through Executor.run, compiled plan and Executor.run_many,
+reports records/s, per-record latency percentiles and peak memory.
+Results can be saved as baseline and compared in later runs.
+
+Run from repository root (Python 3):
+
+    python -m benchmarks.runtime
+    python -m benchmarks.runtime --save baseline.json
+    python -m benchmarks.runtime --compare baseline.json
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from timeit import default_timer
+
+from sculpt.core import Context, Executor
+from sculpt.fields import Input, Output, VirtualVar, VirtualList
+from sculpt.operations import Copy, Apply, Each, With, Switch
+
+
+RECORDS = 2000
+REPEAT = 5
+# slowdown ratio reported as regression by --compare
+THRESHOLD = 1.10
+
+
+def wide(width):
+    schema = [Copy(Input("f{}".format(i)), Output("out.f{}".format(i)))
+              for i in range(width)]
+    schema.append(Apply(Output("out.f0"), abs))
+    records = [{"f{}".format(i): n * i for i in range(width)}
+               for n in range(RECORDS)]
+    return schema, records
+
+
+def deep(depth):
+    # nested With cursors, depth levels
+    operations = [Copy(Input("v"), Output("v"))]
+    for _ in range(depth):
+        operations = [With(Input("n"), Output("n"), operations),
+                      Copy(Input("v"), Output("v"))]
+
+    def record(n):
+        node = {"v": n}
+        for _ in range(depth):
+            node = {"n": node, "v": n}
+        return node
+
+    return operations, [record(n) for n in range(RECORDS)]
+
+
+def fan_out(items):
+    schema = [
+        Each(Input("items"), Output("items"), [
+            Copy(Input("id"), Output("id")),
+            Copy(Input("name"), Output("name")),
+            Copy(Input("id"), VirtualList("ids").append()),
+        ]),
+        Copy(VirtualList("ids").map(lambda v: v * 2), Output("ids")),
+    ]
+    records = [{"items": [{"id": i, "name": "item"} for i in range(items)]}
+               for _ in range(RECORDS // 10)]
+    return schema, records
+
+
+def switch(cases):
+    operation = Switch(Input("kind"))
+    for case in range(cases):
+        operation.case(["k{}".format(case)],
+                       [Copy(Input("value"), Output("k{}".format(case)))])
+    operation.default([Copy(Input("value"), VirtualVar("unmatched"))])
+    schema = [Copy(Input("kind"), Output("kind")), operation]
+    records = [{"kind": "k{}".format(n % (cases + 1)), "value": n}
+               for n in range(RECORDS)]
+    return schema, records
+
+
+SCENARIOS = [
+    ("width-10", wide, 10),
+    ("width-100", wide, 100),
+    ("width-1000", wide, 1000),
+    ("depth-5", deep, 5),
+    ("depth-50", deep, 50),
+    ("each-10", fan_out, 10),
+    ("each-100", fan_out, 100),
+    ("switch-4", switch, 4),
+    ("switch-64", switch, 64),
+    ("switch-1024", switch, 1024),
+]
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+# engines process records lazily, one result per record, so latency of
+# record is time between results
+def interpreted(executor):
+    run = executor.run
+
+    def process(records):
+        for record in records:
+            yield run(Context(record))
+    return process
+
+
+def compiled(executor):
+    run = executor.plan.run
+
+    def process(records):
+        for record in records:
+            yield run(Context(record))
+    return process
+
+
+def run_many(executor):
+    # plan is compiled on first use, not in measured runs
+    executor.plan  # pylint: disable=pointless-statement
+    return executor.run_many
+
+
+# interpreted results keep bare scenario names of older baselines
+ENGINES = [
+    ("", interpreted),
+    ("/compiled", compiled),
+    ("/run_many", run_many),
+]
+
+
+def measure(process, records, repeat=REPEAT):
+    # best of repeat for throughput, latencies of that run
+    best, latencies = None, None
+    for _ in range(repeat):
+        timings = []
+        started = record_started = default_timer()
+        for _result in process(records):
+            finished = default_timer()
+            timings.append(finished - record_started)
+            record_started = finished
+        total = default_timer() - started
+        if best is None or total < best:
+            best, latencies = total, timings
+
+    latencies.sort()
+    return {
+        "records_per_sec": len(records) / best,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p90_us": percentile(latencies, 0.90) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "peak_kb": peak_memory(process, records) / 1024.0,
+    }
+
+
+def peak_memory(process, records):
+    # tracemalloc slows execution down, so it has own run
+    gc.collect()
+    tracemalloc.start()
+    for _result in process(records):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run_scenarios(names=None, repeat=REPEAT):
+    results = {}
+    for name, build, size in SCENARIOS:
+        if names and name not in names:
+            continue
+        schema, records = build(size)
+        for suffix, engine in ENGINES:
+            process = engine(Executor(schema))
+            results[name + suffix] = measure(process, records, repeat)
+            print_result(name + suffix, results[name + suffix])
+    return results
+
+
+def print_result(name, result):
+    print("{:<20} {:>10.0f} rec/s  p50 {:>8.1f}us  p90 {:>8.1f}us  "
+          "p99 {:>8.1f}us  peak {:>8.1f}KB".format(
+              name, result["records_per_sec"], result["p50_us"],
+              result["p90_us"], result["p99_us"], result["peak_kb"]))
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    # prints ratios to baseline, returns names of regressed scenarios
+    regressed = []
+    print()
+    print("{:<20} {:>10} {:>10} {:>10}".format("vs baseline", "rec/s", "p99", "peak"))
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old, new = baseline[name], results[name]
+        slowdown = old["records_per_sec"] / new["records_per_sec"]
+        print("{:<20} {:>9.2f}x {:>9.2f}x {:>9.2f}x{}".format(
+            name, new["records_per_sec"] / old["records_per_sec"],
+            new["p99_us"] / old["p99_us"], new["peak_kb"] / old["peak_kb"],
+            "  REGRESSION" if slowdown > threshold else ""))
+        if slowdown > threshold:
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="sculpt runtime benchmarks")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run, all by default")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--save", metavar="PATH", help="save results as baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare with saved baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown ratio reported as regression")
+    args = parser.parse_args(argv)
+
+    results = run_scenarios(args.scenarios, args.repeat)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import asyncio
+import collections
+import inspect
+
+from .core import Context, Executor, Result
+from .cow import detach_shared, own
+from .operations import Apply, ApplyError, Each, With, single_result
+
+
+# Python 3 only. Apply functions may return awaitables (e.g. be coroutine
+# functions), they are awaited by async execution. Synchronous executors
+# do not await them.
+
+
+async def execute_operations_async(context, operations):
+    stack = [iter(operations)]
+    while stack:
+        for operation in stack[-1]:
+            runner = async_runner(type(operation))
+            if runner is None:
+                next_operations = operation.run(context)
+            else:
+                next_operations = await runner(operation, context)
+
+            if next_operations is not None:
+                stack.append(iter(next_operations))
+                break
+        else:
+            stack.pop()
+
+
+async def run_apply(operation, context):
+    field = operation.field
+    value = field.get(context)
+    if context.passthrough:
+        value = detach_shared(value, context.owned)
+    try:
+        if operation.batched:
+            values = operation.function([value])
+            if inspect.isawaitable(values):
+                values = await values
+            value = single_result(values)
+        else:
+            value = operation.function(value)
+            if inspect.isawaitable(value):
+                value = await value
+    except Exception as e:
+        raise ApplyError("apply error in {}".format(field.label),
+                         field, operation.function, e)
+
+    if context.passthrough:
+        own(context.owned, value)
+    field.set(context, value)
+
+
+async def run_each(operation, context):
+    left, right = operation.left, operation.right
+    left_list = left.get(context)
+    right_list = []
+
+    old_left_cursor = left.get_cursor(context)
+    old_right_cursor = right.get_cursor(context)
+
+    for item in left_list:
+        left.set_cursor(context, item)
+        right.set_cursor(context, {})
+        await execute_operations_async(context, operation.operations)
+        right_list.append(right.get_cursor(context))
+
+    left.set_cursor(context, old_left_cursor)
+    right.set_cursor(context, old_right_cursor)
+    right.set(context, right_list)
+
+
+async def run_with(operation, context):
+    left, right = operation.left, operation.right
+    left_object = left.get(context)
+    right_object = {}
+
+    old_left_cursor = left.get_cursor(context)
+    old_right_cursor = right.get_cursor(context)
+
+    left.set_cursor(context, left_object)
+    right.set_cursor(context, right_object)
+
+    await execute_operations_async(context, operation.operations)
+
+    left.set_cursor(context, old_left_cursor)
+    right.set_cursor(context, old_right_cursor)
+    right.set(context, right_object)
+
+
+ASYNC_RUNNERS = {
+    Apply: run_apply,
+    Each: run_each,
+    With: run_with,
+}
+
+
+_runners_cache = {}
+
+
+def async_runner(operation_cls):
+    # operations without async runner are run synchronously
+    try:
+        return _runners_cache[operation_cls]
+    except KeyError:
+        pass
+
+    runner = None
+    for cls in operation_cls.__mro__:
+        if cls in ASYNC_RUNNERS:
+            runner = ASYNC_RUNNERS[cls]
+            break
+    _runners_cache[operation_cls] = runner
+    return runner
+
+
+class AsyncExecutor(object):
+    def __init__(self, schema, concurrency=64):
+        self.root = Executor(schema).root
+        self.concurrency = concurrency
+
+    async def run(self, context):
+        await execute_operations_async(context, self.root.operations)
+        return context
+
+    async def run_record(self, _input, semaphore=None):
+        if semaphore is None:
+            context = await self.run(Context(_input))
+        else:
+            async with semaphore:
+                context = await self.run(Context(_input))
+        return Result(context.output(), context.errors)
+
+    async def run_many(self, inputs, ordered=True):
+        # at most `concurrency` records are scheduled at once. Semaphore is
+        # created per call, it binds to event loop running the call
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = collections.deque()
+        try:
+            async for _input in _aiter(inputs):
+                pending.append(asyncio.ensure_future(self.run_record(_input, semaphore)))
+                if len(pending) >= self.concurrency:
+                    if ordered:
+                        yield await _first_in_order(pending)
+                    else:
+                        for result in await _first_completed(pending):
+                            yield result
+
+            while pending:
+                if ordered:
+                    yield await _first_in_order(pending)
+                else:
+                    for result in await _first_completed(pending):
+                        yield result
+        finally:
+            # record failed or caller stopped early, scheduled records are
+            # not left running
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def gather(self, inputs, ordered=True):
+        return [result async for result in self.run_many(inputs, ordered)]
+
+
+async def _first_in_order(pending):
+    # result of first task, errors of later ones are raised without
+    # waiting for it
+    head = pending[0]
+    while not head.done():
+        for task in pending:
+            if task.done() and task.exception() is not None:
+                raise task.exception()
+        # done tasks would make wait return at once
+        running = [task for task in pending if not task.done()]
+        await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+    pending.popleft()
+    return head.result()
+
+
+async def _first_completed(pending):
+    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    for task in done:
+        pending.remove(task)
+    # exceptions of all done tasks are retrieved, first one is raised
+    errors = [task.exception() for task in done if task.exception() is not None]
+    if errors:
+        raise errors[0]
+    return [task.result() for task in done]
+
+
+async def _aiter(inputs):
+    if hasattr(inputs, "__aiter__"):
+        async for _input in inputs:
+            yield _input
+    else:
+        for _input in inputs:
+            yield _input
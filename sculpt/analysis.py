@@ -0,0 +1,427 @@
+from .fields import FLAT, Virtual, VirtualList, VirtualVar, Output
+from .operations import (Apply, Combine, Copy, Each, Switch, With,
+                         flatten_operations)
+from .projection import Projection
+
+
+# Static read/write analysis of operations. A resource is a pair of
+# context section and path of keys within it, paths are relative to
+# section cursor. Operations which move cursors (Each, With) or are not
+# known (no accept) are barriers: they may read and write anything.
+
+
+# validation errors are appended in order, Validates write this resource
+ERRORS = ("errors", ())
+
+
+def resource(field):
+    if field.__storage_type__ == FLAT:
+        return (field.section, (field.label,))
+    return (field.section, field.path)
+
+
+def overlaps(left, right):
+    # same section and one path is a prefix of the other
+    (left_section, left_path), (right_section, right_path) = left, right
+    if left_section != right_section:
+        return False
+    size = min(len(left_path), len(right_path))
+    return left_path[:size] == right_path[:size]
+
+
+def overlaps_any(res, resources):
+    return any(overlaps(res, other) for other in resources)
+
+
+class Effects(object):
+    def __init__(self, reads=(), writes=(), barrier=False):
+        self.reads = set(reads)
+        self.writes = set(writes)
+        self.barrier = barrier
+
+    def update(self, other):
+        self.reads.update(other.reads)
+        self.writes.update(other.writes)
+        self.barrier = self.barrier or other.barrier
+        return self
+
+    def reads_from(self, res):
+        return self.barrier or overlaps_any(res, self.reads)
+
+    def writes_to(self, res):
+        return self.barrier or overlaps_any(res, self.writes)
+
+    def depends_on(self, other):
+        # self has to run after other: read after write, write after
+        # read or write after write
+        if self.barrier or other.barrier:
+            return True
+        return any(overlaps_any(res, other.writes) for res in self.reads | self.writes) or \
+            any(overlaps_any(res, other.reads) for res in self.writes)
+
+    def __repr__(self):
+        return "Effects(reads={}, writes={}, barrier={})".format(
+            sorted(self.reads), sorted(self.writes), self.barrier)
+
+
+class EffectsAnalyzer(object):
+    def effects(self, operation):
+        try:
+            accept = operation.accept
+        except AttributeError:
+            return Effects(barrier=True)
+        return accept(self)
+
+    def effects_of(self, operations):
+        result = Effects()
+        for operation in flatten_operations(operations):
+            result.update(self.effects(operation))
+        return result
+
+    @staticmethod
+    def field_read(field):
+        return resource(field)
+
+    @staticmethod
+    def field_write(field):
+        # appends and extends read current list
+        res = resource(field)
+        if isinstance(field, VirtualList):
+            return Effects(reads=[res], writes=[res])
+        return Effects(writes=[res])
+
+    def visit_schema(self, schema):
+        return self.effects_of(schema.operations)
+
+    def visit_copy(self, operation):
+        return self.field_write(operation.right).update(
+            Effects(reads=[self.field_read(operation.left)]))
+
+    def visit_apply(self, operation):
+        res = resource(operation.field)
+        return Effects(reads=[res], writes=[res])
+
+    def visit_delete(self, operation):
+        return Effects(writes=[resource(operation.field)])
+
+    def visit_combine(self, operation):
+        return self.effects_of(operation.operations)
+
+    def visit_switch(self, operation):
+        result = Effects(reads=[resource(field) for field in operation.fields])
+        for operations in operation.operation_table.values():
+            result.update(self.effects_of(operations))
+        if operation.default_operations is not None:
+            result.update(self.effects_of(operation.default_operations))
+        return result
+
+    def visit_validate(self, operation):
+        return Effects(reads=[resource(operation.field)], writes=[ERRORS])
+
+    def visit_each(self, _operation):
+        return Effects(barrier=True)
+
+    def visit_with(self, _operation):
+        return Effects(barrier=True)
+
+
+def effects(operation):
+    return EffectsAnalyzer().effects(operation)
+
+
+def is_under(res, root, inside):
+    # res is within value of root; inside: root value itself is changed
+    section, path = res
+    root_section, root_path = root
+    size = len(root_path)
+    return section == root_section and path[:size] == root_path and \
+        (len(path) > size or inside)
+
+
+class Aliases(object):
+    # Copy shares values by reference: after Copy(a, b) a and b hold the
+    # same object, so writing under one of them writes under the other
+    # (Input included). Pairs are collected along operations list: exact
+    # ones map paths under one root to the other, coarse ones (Copies in
+    # Each/With bodies, overlapping roots) map them to whole other root.
+    MAX_PATH = 32
+
+    def __init__(self):
+        self.exact = []
+        self.coarse = []
+        # unknown operations may share anything
+        self.unknown = False
+
+    def add(self, operation):
+        # cursor sections of Each/With bodies map to roots they move over
+        stack = [(iter([operation]), {})]
+        while stack:
+            operations, roots = stack[-1]
+            for current in operations:
+                if not hasattr(current, "accept"):
+                    self.unknown = True
+                elif isinstance(current, Copy):
+                    self.add_pair(current.left, current.right, roots)
+                elif isinstance(current, (Each, With)):
+                    stack.append((iter(current.operations),
+                                  self.cursor_roots(current, roots)))
+                    break
+                elif isinstance(current, (Switch, Combine)):
+                    stack.append((iter(nested_operations(current)), roots))
+                    break
+            else:
+                stack.pop()
+
+    def add_pair(self, left, right, roots):
+        left_res, right_res = resource(left), resource(right)
+        if left.section in roots or right.section in roots:
+            self.coarse.append((roots.get(left.section, left_res),
+                                roots.get(right.section, right_res)))
+        elif overlaps(left_res, right_res):
+            self.coarse.append((left_res, right_res))
+        else:
+            self.exact.append((left_res, right_res))
+
+    @staticmethod
+    def cursor_roots(operation, roots):
+        left, right = operation.left, operation.right
+        left_root = roots.get(left.section, resource(left))
+        right_root = roots.get(right.section, resource(right))
+        roots = dict(roots)
+        if left.section == right.section:
+            # both cursors move within one section, take common parent
+            size = 0
+            while size < min(len(left_root[1]), len(right_root[1])) and \
+                    left_root[1][size] == right_root[1][size]:
+                size += 1
+            roots[left.section] = (left.section, left_root[1][:size])
+        else:
+            roots[left.section] = left_root
+            roots[right.section] = right_root
+        return roots
+
+    def expand(self, operation, operation_effects):
+        # effects with writes through shared values added
+        if operation_effects.barrier or \
+                not (self.exact or self.coarse or self.unknown):
+            return operation_effects
+
+        mutated = mutated_resources(operation)
+        if self.unknown:
+            if mutated or any(len(path) > 1 for _, path in operation_effects.writes):
+                return Effects(barrier=True)
+            return operation_effects
+
+        pairs = [(a, b, False) for a, b in self.exact] + \
+            [(b, a, False) for a, b in self.exact] + \
+            [(a, b, True) for a, b in self.coarse] + \
+            [(b, a, True) for a, b in self.coarse]
+        writes = set(operation_effects.writes)
+        pending = [(res, res in mutated) for res in writes]
+        seen = set(pending)
+        while pending:
+            res, inside = pending.pop()
+            for root, other, coarse in pairs:
+                if not is_under(res, root, inside):
+                    continue
+                if coarse:
+                    shared = (other, True)
+                else:
+                    shared = ((other[0], other[1] + res[1][len(root[1]):]), inside)
+                if shared in seen:
+                    continue
+                if len(shared[0][1]) > self.MAX_PATH:
+                    # value contains itself
+                    return Effects(barrier=True)
+                seen.add(shared)
+                writes.add(shared[0])
+                pending.append(shared)
+
+        return Effects(operation_effects.reads, writes)
+
+
+def nested_operations(operation):
+    if isinstance(operation, Combine):
+        return operation.operations
+    nested = [op for operations in operation.operation_table.values()
+              for op in operations]
+    return nested + list(operation.default_operations or [])
+
+
+def mutated_resources(operation):
+    # resources whose values operation may change in place: Apply function
+    # gets value itself, appends and extends change list
+    mutated = set()
+    stack = [iter([operation])]
+    while stack:
+        for current in stack[-1]:
+            if isinstance(current, Apply):
+                mutated.add(resource(current.field))
+            elif isinstance(current, Copy) and isinstance(current.right, VirtualList):
+                mutated.add(resource(current.right))
+            elif isinstance(current, (Switch, Combine)):
+                stack.append(iter(nested_operations(current)))
+                break
+        else:
+            stack.pop()
+    return mutated
+
+
+def alias_effects(operations, analyzer=None):
+    # effects of operations of one list in order, with writes through
+    # values shared by Copies (those of operation itself included)
+    analyzer = analyzer or EffectsAnalyzer()
+    aliases = Aliases()
+    result = []
+    for operation in operations:
+        aliases.add(operation)
+        result.append(aliases.expand(operation, analyzer.effects(operation)))
+    return result
+
+
+class DependencyGraph(object):
+    # DAG of operations of one list (Combines inlined): operation depends on
+    # earlier ones it reads results of, or which read or write what it writes
+    # (values shared by Copies included)
+    def __init__(self, operations, analyzer=None):
+        self.operations = flatten_operations(operations)
+        self.effects = alias_effects(self.operations, analyzer)
+
+        self.dependencies = [set() for _ in self.operations]
+        self.dependents = [set() for _ in self.operations]
+        for i, operation_effects in enumerate(self.effects):
+            for j in range(i):
+                if operation_effects.depends_on(self.effects[j]):
+                    self.dependencies[i].add(j)
+                    self.dependents[j].add(i)
+
+    def edges(self):
+        return [(j, i) for i, dependencies in enumerate(self.dependencies)
+                for j in sorted(dependencies)]
+
+    def levels(self):
+        # operations grouped by length of longest dependency chain before
+        # them, operations of one level are independent of each other
+        depths = []
+        for dependencies in self.dependencies:
+            depths.append(max([depths[j] + 1 for j in dependencies] or [0]))
+
+        levels = [[] for _ in range(max(depths) + 1 if depths else 0)]
+        for i, depth in enumerate(depths):
+            levels[depth].append(i)
+        return levels
+
+
+def read_resources(operations):
+    # resources read anywhere in operations, nested ones included, paths
+    # of nested ones are as written (relative to their cursors); None if
+    # there are operations which can not be analyzed
+    reads = set()
+    stack = [iter(operations)]
+    while stack:
+        for operation in stack[-1]:
+            if not hasattr(operation, "accept"):
+                return None
+
+            if isinstance(operation, (Each, With)):
+                reads.add(resource(operation.left))
+                stack.append(iter(operation.operations))
+                break
+            if isinstance(operation, Switch):
+                reads.update(resource(field) for field in operation.fields)
+                branches = list(operation.operation_table.values())
+                branches.append(operation.default_operations or [])
+                stack.append(iter([op for branch in branches for op in branch]))
+                break
+            if isinstance(operation, Combine):
+                stack.append(iter(operation.operations))
+                break
+
+            reads.update(EffectsAnalyzer().effects(operation).reads)
+        else:
+            stack.pop()
+    return reads
+
+
+def is_plain_store(field):
+    # fields which are simply set and deleted, without side effects
+    return isinstance(field, (Output, VirtualVar))
+
+
+def uses_virtual_cursor(operation):
+    return isinstance(operation.left, Virtual) or isinstance(operation.right, Virtual)
+
+
+class InputProjector(object):
+    # collects Input paths read by operations, paths of fields under
+    # Each/With over Input are prefixed with path of their cursor
+    def __init__(self):
+        self.projection = Projection()
+        self.prefix = ()
+
+    def read(self, field, keep=True):
+        if field.section == "input":
+            self.projection.add(self.prefix + field.path, keep)
+
+    def visit_operations(self, operations):
+        for operation in flatten_operations(operations):
+            try:
+                accept = operation.accept
+            except AttributeError:
+                # unknown operation may read anything
+                self.projection.add((), keep=True)
+                continue
+            accept(self)
+
+    def visit_schema(self, schema):
+        self.visit_operations(schema.operations)
+
+    def visit_copy(self, operation):
+        self.read(operation.left)
+
+    def visit_apply(self, operation):
+        self.read(operation.field)
+
+    def visit_delete(self, _operation):
+        pass
+
+    def visit_combine(self, operation):
+        self.visit_operations(operation.operations)
+
+    def visit_switch(self, operation):
+        for field in operation.fields:
+            self.read(field)
+        for operations in operation.operation_table.values():
+            self.visit_operations(operations)
+        self.visit_operations(operation.default_operations or [])
+
+    def visit_validate(self, operation):
+        self.read(operation.field)
+
+    def visit_each(self, operation):
+        self.visit_cursor_operation(operation)
+
+    def visit_with(self, operation):
+        self.visit_cursor_operation(operation)
+
+    def visit_cursor_operation(self, operation):
+        left = operation.left
+        if left.section != "input":
+            self.visit_operations(operation.operations)
+            return
+
+        # list items or object are kept, even if nothing is read from them
+        self.read(left, keep=False)
+        old_prefix = self.prefix
+        self.prefix = old_prefix + left.path
+        self.visit_operations(operation.operations)
+        self.prefix = old_prefix
+
+
+def input_projection(schema):
+    projector = InputProjector()
+    if isinstance(schema, (list, tuple)):
+        projector.visit_operations(schema)
+    else:
+        schema.accept(projector)
+    return projector.projection
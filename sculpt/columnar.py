@@ -0,0 +1,337 @@
+import collections
+
+from .core import Executor, Result
+from .operations import ApplyError, flatten_operations
+from .util import MISSING, chunked
+from .validation import ValidationError, ValueValidator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # pylint: disable=invalid-name
+
+
+# Columnar execution of flat schemas. Values of every field used by schema
+# are kept in per batch columns (lists, MISSING marks absent values), Copy
+# moves column values, Apply maps function over column and Switch splits
+# batch rows by branch. Schemas which can not be run by columns (Each,
+# With, VirtualList, custom operations, overlapping Output paths) fall back
+# to row execution. Output keys order may differ from row execution.
+
+
+class NotColumnar(Exception):
+    pass
+
+
+class Column(object):
+    def __init__(self, field, values):
+        self.field = field
+        self.values = values
+        # rows where nested value was deleted, but its parents stay
+        self.orphans = None
+
+
+class BatchState(object):
+    def __init__(self, size, columns):
+        self.size = size
+        self.columns = columns
+        self.errors = [[] for _ in range(size)]
+
+
+class ColumnBatch(object):
+    def __init__(self, state, output_columns):
+        self.state = state
+        self.output_columns = output_columns
+
+    @property
+    def size(self):
+        return self.state.size
+
+    @property
+    def errors(self):
+        return self.state.errors
+
+    def columns(self):
+        return {column.field.label: column.values
+                for column in self.output_columns}
+
+    def arrays(self):
+        # label -> numpy masked array, absent values are masked
+        if numpy is None:
+            raise ImportError("numpy is required for column arrays")
+
+        arrays = {}
+        for column in self.output_columns:
+            mask = [value is MISSING for value in column.values]
+            values = numpy.empty(self.size, dtype=object)
+            values[:] = [None if absent else value
+                         for value, absent in zip(column.values, mask)]
+            arrays[column.field.label] = numpy.ma.MaskedArray(values, mask=mask)
+        return arrays
+
+    def outputs(self):
+        outputs = [{} for _ in range(self.size)]
+        for column in self.output_columns:
+            set_value = column.field.accessors.set
+            for row, value in enumerate(column.values):
+                if value is not MISSING:
+                    set_value(outputs[row], value)
+
+            if column.orphans:
+                parent_keys = column.field.path[:-1]
+                for row in column.orphans:
+                    if column.values[row] is MISSING:
+                        parent = outputs[row]
+                        for key in parent_keys:
+                            parent = parent.setdefault(key, {})
+        return outputs
+
+    def results(self):
+        return [Result(output, errors)
+                for output, errors in zip(self.outputs(), self.errors)]
+
+
+class ColumnarPlan(object):
+    def __init__(self, schema):
+        self.compiler = ColumnCompiler()
+        self.function = schema.accept(self.compiler)
+        self.compiler.check_output_paths()
+
+    def run(self, inputs):
+        size = len(inputs)
+        columns = {}
+        for field in self.compiler.fields.values():
+            if field.section == "input":
+                lookup = field.accessors.lookup
+                values = [lookup(_input) for _input in inputs]
+            else:
+                values = [MISSING] * size
+            columns[(field.section, field.label)] = Column(field, values)
+
+        state = BatchState(size, columns)
+        self.function(state, list(range(size)))
+
+        output_columns = [columns[key] for key in self.compiler.fields
+                          if key[0] == "output"]
+        return ColumnBatch(state, output_columns)
+
+
+class ColumnCompiler(object):
+    def __init__(self):
+        # (section, label) -> field, in order of first use
+        self.fields = collections.OrderedDict()
+
+    def check_output_paths(self):
+        paths = sorted(field.path for (section, _), field in self.fields.items()
+                       if section == "output")
+        for path, next_path in zip(paths, paths[1:]):
+            if next_path[:len(path)] == path:
+                raise NotColumnar("overlapping output paths: {}, {}".format(
+                    ".".join(path), ".".join(next_path)))
+
+    def column_key(self, field):
+        try:
+            field.accept(self)
+        except AttributeError:
+            raise NotColumnar("unsupported field: {!r}".format(field))
+
+        key = (field.section, field.label)
+        if key not in self.fields:
+            self.fields[key] = field
+        return key
+
+    def visit_input(self, _field):
+        pass
+
+    def visit_output(self, _field):
+        pass
+
+    def visit_virtual_var(self, _field):
+        pass
+
+    def visit_virtual_list(self, field):
+        raise NotColumnar("unsupported field: {!r}".format(field))
+
+    def writable_column_key(self, field):
+        if field.section == "input":
+            raise NotColumnar("Input is not writable: {!r}".format(field))
+        return self.column_key(field)
+
+    def visit_schema(self, schema):
+        return self.compile_operations(schema.operations)
+
+    def compile_operations(self, operations):
+        steps = []
+        for operation in flatten_operations(operations):
+            try:
+                accept = operation.accept
+            except AttributeError:
+                raise NotColumnar("unsupported operation: {!r}".format(operation))
+            steps.append(accept(self))
+        steps = tuple(steps)
+
+        def run_steps(state, rows):
+            for step in steps:
+                step(state, rows)
+        return run_steps
+
+    def visit_copy(self, operation):
+        left = self.column_key(operation.left)
+        right = self.writable_column_key(operation.right)
+
+        def copy(state, rows):
+            source = state.columns[left].values
+            target = state.columns[right].values
+            for row in rows:
+                value = source[row]
+                if value is not MISSING:
+                    target[row] = value
+        return copy
+
+    def visit_apply(self, operation):
+        field = operation.field
+        key = self.writable_column_key(field)
+        function = operation.function
+        message = "apply error in {}".format(field.label)
+
+        if operation.batched:
+            return self.batched_apply(field, key, function, message)
+
+        def apply_(state, rows):
+            values = state.columns[key].values
+            for row in rows:
+                value = values[row]
+                try:
+                    values[row] = function(None if value is MISSING else value)
+                except Exception as e:
+                    raise ApplyError(message, field, function, e)
+        return apply_
+
+    @staticmethod
+    def batched_apply(field, key, function, message):
+        # function gets list with values of all batch rows taking this path
+        def apply_(state, rows):
+            values = state.columns[key].values
+            batch = [None if values[row] is MISSING else values[row] for row in rows]
+            try:
+                results = function(batch)
+                if len(results) != len(batch):
+                    raise ValueError(
+                        "batched function returned {} values for {}".format(
+                            len(results), len(batch)))
+            except Exception as e:
+                raise ApplyError(message, field, function, e)
+
+            for row, value in zip(rows, results):
+                values[row] = value
+        return apply_
+
+    def visit_delete(self, operation):
+        key = self.writable_column_key(operation.field)
+        nested = operation.field.section == "output" and len(operation.field.path) > 1
+
+        def delete(state, rows):
+            column = state.columns[key]
+            values = column.values
+            for row in rows:
+                if nested and values[row] is not MISSING:
+                    if column.orphans is None:
+                        column.orphans = set()
+                    column.orphans.add(row)
+                values[row] = MISSING
+        return delete
+
+    def visit_combine(self, operation):
+        return self.compile_operations(operation.operations)
+
+    def visit_switch(self, operation):
+        keys = [self.column_key(field) for field in operation.fields]
+
+        default = None
+        if operation.default_operations is not None:
+            default = self.compile_operations(operation.default_operations)
+
+        branches = {}
+        for bid in operation.index.values():
+            branches[bid] = self.compile_operations(operation.operation_table[bid])
+
+        match = operation.match
+        hits = operation.hits
+
+        def switch(state, rows):
+            columns = [state.columns[key].values for key in keys]
+            groups = {}
+            for row in rows:
+                switch_key = tuple(None if column[row] is MISSING else column[row]
+                                   for column in columns)
+                groups.setdefault(match(switch_key), []).append(row)
+
+            for bid, branch_rows in groups.items():
+                if hits is not None:
+                    hits[bid] += len(branch_rows)
+                if bid is not None:
+                    branches[bid](state, branch_rows)
+                elif default is not None:
+                    default(state, branch_rows)
+        return switch
+
+    def visit_validate(self, operation):
+        field = operation.field
+        validator = operation.validator
+        if not isinstance(validator, ValueValidator):
+            raise NotColumnar("unsupported validator: {!r}".format(validator))
+
+        key = self.column_key(field)
+        validate_value = validator.validate_value
+
+        def validate(state, rows):
+            values = state.columns[key].values
+            errors = state.errors
+            for row in rows:
+                try:
+                    validate_value(field, values[row])
+                except ValidationError as exc:
+                    errors[row].append(exc)
+        return validate
+
+    def visit_each(self, operation):
+        raise NotColumnar("unsupported operation: {!r}".format(operation))
+
+    def visit_with(self, operation):
+        raise NotColumnar("unsupported operation: {!r}".format(operation))
+
+
+class ColumnarExecutor(object):
+    def __init__(self, schema):
+        self.executor = Executor(schema)
+        self.root = self.executor.root
+        try:
+            self.plan = ColumnarPlan(self.root)
+        except NotColumnar as exc:
+            self.plan = None
+            self.fallback_reason = str(exc)
+        else:
+            self.fallback_reason = None
+
+    @property
+    def columnar(self):
+        return self.plan is not None
+
+    def run_batch(self, inputs):
+        if self.plan is None:
+            raise NotColumnar(self.fallback_reason)
+        return self.plan.run(list(inputs))
+
+    def run_many(self, inputs, batch_size=1024):
+        if self.plan is None:
+            for result in self.executor.run_many(inputs):
+                yield result
+            return
+
+        for batch in chunked(inputs, batch_size):
+            for result in self.plan.run(batch).results():
+                yield result
+
+    def map(self, inputs, batch_size=1024):
+        for result in self.run_many(inputs, batch_size):
+            yield result.output
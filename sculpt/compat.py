@@ -1,4 +1,3 @@
-
 try:
     basestring  # pylint:disable=undefined-variable,pointless-statement
     def isstr(obj):
@@ -6,3 +5,17 @@ try:
 except NameError:
     def isstr(obj):
         return isinstance(obj, str)
+
+try:
+    # Python 3
+    from sys import intern  # pylint: disable=unused-import
+except ImportError:
+    # Python 2
+    intern = intern  # pylint: disable=invalid-name,self-assigning-variable,used-before-assignment
+
+try:
+    # Python 3
+    from collections.abc import MutableSequence, MutableMapping  # pylint: disable=unused-import
+except ImportError:
+    # Python 2
+    from collections import MutableSequence, MutableMapping  # pylint: disable=unused-import,deprecated-class
@@ -0,0 +1,375 @@
+import collections
+
+from .core import execute_operations
+from .cow import detach_shared, own
+from .fields import VirtualList
+from .operations import (ApplyError, Each, Switch, With, call_batched,
+                         flatten_operations)
+from .util import MISSING
+from .validation import ValidationError, ValueValidator
+
+
+FieldAccess = collections.namedtuple(
+    "FieldAccess", ["get", "has", "lookup", "set", "delete"])
+
+
+# Compiled operations are steps, functions of context. Step returns None,
+# or steps to run next (Switch returns steps of matched branch), which are
+# run by run_steps without recursion, as execute_operations does.
+
+
+def _noop(_context):
+    pass
+
+
+def run_steps(context, steps):
+    stack = [iter(steps)]
+    while stack:
+        for step in stack[-1]:
+            next_steps = step(context)
+            if next_steps is not None:
+                stack.append(iter(next_steps))
+                break
+        else:
+            stack.pop()
+
+
+def sequence(steps):
+    # steps may return next steps, so even single step is run by run_steps
+    steps = tuple(steps)
+    if not steps:
+        return _noop
+
+    def run_sequence(context):
+        run_steps(context, steps)
+    return run_sequence
+
+
+def nested_operations(operation):
+    # operations nested in operation, None for operations without them
+    if not hasattr(operation, "accept"):
+        return None
+    if isinstance(operation, (Each, With)):
+        return operation.operations
+    if isinstance(operation, Switch):
+        nested = []
+        for operations in operation.operation_table.values():
+            nested.extend(operations)
+        nested.extend(operation.default_operations or [])
+        return nested
+    return None
+
+
+class CompiledSchema(object):
+    # Schema lowered into a single python function. Compilation takes a
+    # snapshot: operations modified afterwards (e.g. new Switch cases)
+    # are not seen by compiled function.
+    def __init__(self, schema, layout=None):
+        self.schema = schema
+        # with layout Output values are kept in flat list, see sinks
+        self.layout = layout
+        self.function = schema.accept(ClosureCompiler(layout))
+
+    def run(self, context):
+        if self.layout is not None:
+            context.layout = self.layout
+            context.output_values = self.layout.new_values()
+        self.function(context)
+        return context
+
+    def __repr__(self):
+        return "CompiledSchema({})".format(self.schema)
+
+
+class ClosureCompiler(object):
+    def __init__(self, layout=None):
+        self.layout = layout
+        # id of operation -> (operation, step) of compiled nested operations
+        self._compiled = {}
+
+    def visit_schema(self, schema):
+        self.compile_nested(schema.operations)
+        return sequence(self.compile_steps(schema.operations))
+
+    def compile_nested(self, operations):
+        # compiles operations with nested ones, deepest first, so compiling
+        # one of them only reaches its own (compiled) children, there is no
+        # recursion however deep operations are nested
+        stack = [(None, iter(flatten_operations(operations)))]
+        while stack:
+            parent, children = stack[-1]
+            for operation in children:
+                nested = nested_operations(operation)
+                if nested is not None and id(operation) not in self._compiled:
+                    stack.append((operation, iter(flatten_operations(nested))))
+                    break
+            else:
+                stack.pop()
+                if parent is not None:
+                    self._compiled[id(parent)] = (parent, parent.accept(self))
+
+    def compile_steps(self, operations):
+        # combine only groups operations, inline its members
+        return tuple(self.compile_operation(operation)
+                     for operation in flatten_operations(operations))
+
+    def compile_operations(self, operations):
+        self.compile_nested(operations)
+        return sequence(self.compile_steps(operations))
+
+    def compile_operation(self, operation):
+        try:
+            return self._compiled[id(operation)][1]
+        except KeyError:
+            pass
+        try:
+            accept = operation.accept
+        except AttributeError:
+            return self.interpret(operation)
+        return accept(self)
+
+    @staticmethod
+    def interpret(operation):
+        operations = [operation]
+
+        def interpret_operation(context):
+            execute_operations(context, operations)
+        return interpret_operation
+
+    def compile_field(self, field):
+        try:
+            accept = field.accept
+        except AttributeError:
+            return self.bound_field(field)
+        return accept(self)
+
+    @staticmethod
+    def bound_field(field):
+        return FieldAccess(field.get, field.has, field.lookup,
+                           field.set, field.delete)
+
+    @staticmethod
+    def cursor_field(field):
+        section = field.section
+        accessors = field.accessors
+        get_value, has_value = accessors.get, accessors.has
+        lookup_value = accessors.lookup
+        set_value, delete_value = accessors.set, accessors.delete
+
+        def get(context):
+            return get_value(context.cursors[section])
+
+        def has(context):
+            return has_value(context.cursors[section])
+
+        def lookup(context):
+            return lookup_value(context.cursors[section])
+
+        def set_(context, value):
+            set_value(context.cursors[section], value)
+
+        def delete(context):
+            delete_value(context.cursors[section])
+
+        return FieldAccess(get, has, lookup, set_, delete)
+
+    def visit_input(self, field):
+        # keep Input.set/Input.delete, they raise
+        access = self.cursor_field(field)
+        return access._replace(set=field.set, delete=field.delete)
+
+    def visit_output(self, field):
+        if self.layout is None:
+            return self.cursor_field(field)
+        return self.slot_field(self.layout.slots[field.label])
+
+    @staticmethod
+    def slot_field(slot):
+        def get(context):
+            value = context.output_values[slot]
+            return None if value is MISSING else value
+
+        def has(context):
+            return context.output_values[slot] is not MISSING
+
+        def lookup(context):
+            return context.output_values[slot]
+
+        def set_(context, value):
+            context.output_values[slot] = value
+
+        def delete(context):
+            context.output_values[slot] = MISSING
+
+        return FieldAccess(get, has, lookup, set_, delete)
+
+    def visit_virtual_var(self, field):
+        # Virtual.delete works on store and not on cursor
+        access = self.cursor_field(field)
+        return access._replace(delete=field.delete)
+
+    def visit_virtual_list(self, field):
+        return self.bound_field(field)
+
+    def visit_copy(self, operation):
+        lookup = self.compile_field(operation.left).lookup
+        set_ = self.compile_field(operation.right).set
+
+        def copy(context):
+            value = lookup(context)
+
+            # ignore field if it not exists
+            if value is MISSING:
+                return
+
+            set_(context, value)
+        return copy
+
+    def visit_apply(self, operation):
+        field = operation.field
+        function = operation.function
+        access = self.compile_field(field)
+        get, set_ = access.get, access.set
+        message = "apply error in {}".format(field.label)
+
+        if operation.batched:
+            def call(value):
+                return call_batched(function, value)
+        else:
+            call = function
+
+        def apply_(context):
+            value = get(context)
+            passthrough = context.passthrough
+            if passthrough:
+                # function may change value in place, input must stay intact
+                value = detach_shared(value, context.owned)
+            try:
+                value = call(value)
+            except Exception as e:
+                raise ApplyError(message, field, function, e)
+
+            if passthrough:
+                own(context.owned, value)
+            set_(context, value)
+        return apply_
+
+    def visit_delete(self, operation):
+        return self.compile_field(operation.field).delete
+
+    def visit_combine(self, operation):
+        return self.compile_operations(operation.operations)
+
+    def visit_switch(self, operation):
+        getters = tuple(self.compile_field(f).get for f in operation.fields)
+
+        # empty branches are None, nothing to run
+        default = None
+        if operation.default_operations is not None:
+            default = self.compile_steps(operation.default_operations) or None
+
+        branches = {bid: self.compile_steps(operations) or None
+                    for bid, operations in operation.operation_table.items()}
+        table = {key: (bid, branches[bid]) for key, bid in operation.index.items()}
+
+        if len(getters) == 1:
+            # single field switch is keyed by plain value
+            get_key, = getters
+            table = {key[0]: branch for key, branch in table.items()}
+        else:
+            def get_key(context):
+                return tuple([get(context) for get in getters])
+
+        lookup = table.get
+        hits = operation.hits
+        no_match = (None, default)
+
+        def switch(context):
+            try:
+                bid, branch = lookup(get_key(context), no_match)
+            except TypeError:
+                # unhashable values never match a case
+                bid, branch = no_match
+            if hits is not None:
+                hits[bid] += 1
+            # branch steps are run by run_steps
+            return branch
+        return switch
+
+    def visit_each(self, operation):
+        left_get = self.compile_field(operation.left).get
+        right_set = self.compile_field(operation.right).set
+        left_section = operation.left.section
+        right_section = operation.right.section
+        body = self.compile_operations(operation.operations)
+
+        def each(context):
+            left_list = left_get(context)
+            right_list = []
+
+            cursors = context.cursors
+            old_left_cursor = cursors[left_section]
+            old_right_cursor = cursors[right_section]
+
+            for item in left_list:
+                cursors[left_section] = item
+                cursors[right_section] = {}
+                body(context)
+                right_list.append(cursors[right_section])
+
+            cursors[left_section] = old_left_cursor
+            cursors[right_section] = old_right_cursor
+            right_set(context, right_list)
+        return each
+
+    def visit_with(self, operation):
+        left_get = self.compile_field(operation.left).get
+        right_set = self.compile_field(operation.right).set
+        left_section = operation.left.section
+        right_section = operation.right.section
+        body = self.compile_operations(operation.operations)
+
+        def with_(context):
+            left_object = left_get(context)
+            right_object = {}
+
+            cursors = context.cursors
+            old_left_cursor = cursors[left_section]
+            old_right_cursor = cursors[right_section]
+
+            cursors[left_section] = left_object
+            cursors[right_section] = right_object
+            body(context)
+
+            cursors[left_section] = old_left_cursor
+            cursors[right_section] = old_right_cursor
+            right_set(context, right_object)
+        return with_
+
+    def visit_validate(self, operation):
+        field = operation.field
+        validator = operation.validator
+
+        if isinstance(validator, ValueValidator):
+            if isinstance(field, VirtualList):
+                # see VirtualList.existing
+                lookup = field.existing
+            else:
+                lookup = self.compile_field(field).lookup
+            validate_value = validator.validate_value
+
+            def validate_looked_up(context):
+                try:
+                    validate_value(field, lookup(context))
+                except ValidationError as exc:
+                    context.errors.append(exc)
+            return validate_looked_up
+
+        validate = validator._validate  # pylint: disable=protected-access
+
+        def validate_(context):
+            try:
+                validate(context, field)
+            except ValidationError as exc:
+                context.errors.append(exc)
+        return validate_
@@ -1,13 +1,22 @@
 import collections
+from timeit import default_timer
 
+from .compat import MutableSequence
+from .cow import CowDict
 from .fields import Input, Output, Virtual
+from .util import MISSING
 
 
 class Context(object):
-    def __init__(self, _input):
+    __slots__ = ("passthrough", "stores", "cursors", "errors", "owned",
+                 "layout", "output_values")
+
+    def __init__(self, _input, passthrough=False):
+        # passthrough output starts as copy-on-write view of input
+        self.passthrough = passthrough
         self.stores = {
             Input.section: _input,
-            Output.section: {},
+            Output.section: CowDict(_input) if passthrough else {},
             Virtual.section: {},
         }
 
@@ -18,29 +27,94 @@ class Context(object):
         }
 
         self.errors = []
+        # passthrough: values made by Apply functions, see cow.detach_shared
+        self.owned = {} if passthrough else None
+
+        # set by plans keeping Output values in flat list, see sinks
+        self.layout = None
+        self.output_values = None
+
+    def reset(self, _input):
+        # prepare context for next record, output and errors are handed
+        # out to the caller so they are always new
+        stores = self.stores
+        stores[Input.section] = _input
+        stores[Output.section] = CowDict(_input) if self.passthrough else {}
+        stores[Virtual.section].clear()
+
+        cursors = self.cursors
+        cursors[Input.section] = _input
+        cursors[Output.section] = stores[Output.section]
+        cursors[Virtual.section] = stores[Virtual.section]
+
+        self.errors = []
+        if self.passthrough:
+            self.owned = {}
+        self.layout = None
+        self.output_values = None
+        return self
 
     def output(self):
-        return self.stores[Output.section]
+        if self.layout is not None:
+            return self.layout.build(self.output_values)
+
+        output = self.stores[Output.section]
+        if self.passthrough:
+            return output.materialize()
+        return output
+
+    def patch(self):
+        # JSON Patch operations turning input into output
+        if not self.passthrough:
+            raise ValueError("patch requires passthrough context")
+        return self.stores[Output.section].patch()
 
 
 class Schema(object):
+    __slots__ = ("operations",)
+
     def __init__(self, operations):
         self.operations = operations
 
     def accept(self, visitor):
-        visitor.visit_schema(self)
+        return visitor.visit_schema(self)
 
     def __repr__(self):
         ops = ", ".join(str(op) for op in self.operations)
         return "Schema({})".format(ops)
 
 
+Result = collections.namedtuple("Result", ["output", "errors"])
+
+
+class BatchStats(object):
+    def __init__(self, batch, records, failed, elapsed):
+        self.batch = batch
+        self.records = records
+        # records with validation errors
+        self.failed = failed
+        # seconds spent in executor, consumer time is not included
+        self.elapsed = elapsed
+
+    @property
+    def records_per_second(self):
+        if not self.elapsed:
+            return 0.0
+        return self.records / self.elapsed
+
+    def __repr__(self):
+        return "BatchStats(batch={}, records={}, failed={}, {:.0f} records/s)".format(
+            self.batch, self.records, self.failed, self.records_per_second)
+
+
 class Executor(object):
     def __init__(self, schema):
+        self._plan = None
+        self._flat_plan = MISSING
         self.root = None
         if isinstance(schema, Schema):
             self.root = schema
-        elif isinstance(schema, collections.MutableSequence):
+        elif isinstance(schema, MutableSequence):
             self.root = Schema(schema)
         else:
             raise ValueError(
@@ -51,6 +125,81 @@ class Executor(object):
     def run(self, context):
         return self.run_operations(context, self.root.operations)
 
+    def compile(self):
+        # compiled module depends on operations, which depend on this module
+        from .compiled import CompiledSchema  # pylint: disable=cyclic-import
+        return CompiledSchema(self.root)
+
+    @property
+    def plan(self):
+        # compiled once on first use, see CompiledSchema about snapshots
+        if self._plan is None:
+            self._plan = self.compile()
+        return self._plan
+
+    @property
+    def flat_plan(self):
+        # plan keeping Output values in flat list, None when output shape
+        # is not static
+        if self._flat_plan is MISSING:
+            from .sinks import output_layout  # pylint: disable=cyclic-import
+            layout = output_layout(self.root)
+            self._flat_plan = None
+            if layout is not None:
+                from .compiled import CompiledSchema  # pylint: disable=cyclic-import
+                self._flat_plan = CompiledSchema(self.root, layout)
+        return self._flat_plan
+
+    def run_many(self, inputs, batch_size=1000, on_batch=None,
+                 passthrough=False, patch=False, sink=None):
+        # passthrough: output starts as input, patch: results hold JSON
+        # Patch operations instead of output documents, sink: encodes
+        # outputs (see sculpt.sinks)
+        passthrough = passthrough or patch
+        plan = self.plan
+        if sink is not None and not passthrough:
+            plan = self.flat_plan or plan
+        run = plan.run
+        context = Context({}, passthrough=passthrough)
+        output = context.patch if patch else context.output
+        if sink is not None:
+            output = self._sink_output(context, output, sink)
+
+        batch = records = failed = 0
+        elapsed = 0.0
+        for _input in inputs:
+            started = default_timer()
+            run(context.reset(_input))
+            elapsed += default_timer() - started
+
+            records += 1
+            failed += bool(context.errors)
+            yield Result(output(), context.errors)
+
+            if records == batch_size:
+                if on_batch is not None:
+                    on_batch(BatchStats(batch, records, failed, elapsed))
+                batch += 1
+                records = failed = 0
+                elapsed = 0.0
+
+        if records and on_batch is not None:
+            on_batch(BatchStats(batch, records, failed, elapsed))
+
+    @staticmethod
+    def _sink_output(context, output, sink):
+        def encoded_output():
+            if context.layout is not None:
+                return sink.encode_flat(context.layout, context.output_values)
+            return sink.encode_dict(output())
+        return encoded_output
+
+    def map(self, inputs, batch_size=1000, on_batch=None,
+            passthrough=False, patch=False, sink=None):
+        for result in self.run_many(inputs, batch_size, on_batch,
+                                    passthrough, patch, sink):
+            yield result.output
+
     @staticmethod
     def run_operations(context, operations):
         execute_operations(context, operations)
@@ -58,7 +207,14 @@ class Executor(object):
 
 
 def execute_operations(context, operations):
-    for operation in operations:
-        next_operations = operation.run(context)
-        if next_operations is not None:
-            execute_operations(context, next_operations)
+    # operations may return operations to run next (Combine, Switch), they
+    # are run from explicit stack, so nesting depth costs no Python frames
+    stack = [iter(operations)]
+    while stack:
+        for operation in stack[-1]:
+            next_operations = operation.run(context)
+            if next_operations is not None:
+                stack.append(iter(next_operations))
+                break
+        else:
+            stack.pop()
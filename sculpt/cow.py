@@ -0,0 +1,143 @@
+from .compat import MutableMapping
+
+
+# Copy-on-write view of a document. Writes and deletions are recorded in
+# the view and base document is never modified; nested dicts are wrapped
+# in views on first access, and plain dicts in views when assigned (they
+# may come from input, e.g. by Copy), so nested writes are recorded as well.
+
+
+class CowDict(MutableMapping):
+    def __init__(self, base):
+        self._base = base
+        # key -> new value or view of nested base dict
+        self._changes = {}
+        self._deleted = set()
+
+    def __getitem__(self, key):
+        try:
+            return self._changes[key]
+        except KeyError:
+            pass
+
+        if key in self._deleted:
+            raise KeyError(key)
+
+        value = self._base[key]
+        if isinstance(value, dict):
+            value = self._changes[key] = CowDict(value)
+        return value
+
+    def __setitem__(self, key, value):
+        if isinstance(value, dict):
+            value = CowDict(value)
+        self._changes[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._changes.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key):
+        if key in self._changes:
+            return True
+        return key not in self._deleted and key in self._base
+
+    def __iter__(self):
+        changes, deleted = self._changes, self._deleted
+        for key in self._base:
+            if key not in deleted:
+                yield key
+        for key in changes:
+            if key not in self._base:
+                yield key
+
+    def __len__(self):
+        added = sum(1 for key in self._changes if key not in self._base)
+        return len(self._base) - len(self._deleted) + added
+
+    @property
+    def modified(self):
+        if self._deleted:
+            return True
+        return any(not isinstance(value, CowDict) or
+                   value._base is not self._base.get(key) or  # pylint: disable=protected-access
+                   value.modified
+                   for key, value in self._changes.items())
+
+    def materialize(self):
+        # plain dict, untouched subtrees are shared with base document
+        if not self.modified:
+            return self._base
+
+        result = dict(self._base)
+        for key in self._deleted:
+            del result[key]
+        for key, value in self._changes.items():
+            result[key] = materialize(value)
+        return result
+
+    def patch(self, path=""):
+        # JSON Patch (RFC 6902) operations turning base into this view
+        operations = []
+        for key in self._deleted:
+            operations.append({"op": "remove", "path": path + "/" + escape(key)})
+
+        for key, value in self._changes.items():
+            pointer = path + "/" + escape(key)
+            if isinstance(value, CowDict) and value._base is self._base.get(key):  # pylint: disable=protected-access
+                operations.extend(value.patch(pointer))
+            else:
+                operations.append({"op": "add", "path": pointer, "value": materialize(value)})
+        return operations
+
+    def __repr__(self):
+        return "CowDict({!r})".format(self.materialize())
+
+
+def materialize(value):
+    if isinstance(value, CowDict):
+        return value.materialize()
+    if isinstance(value, list):
+        return [materialize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: materialize(item) for key, item in value.items()}
+    return value
+
+
+def detach(value):
+    # plain copy of value, changing it does not change any document
+    if isinstance(value, CowDict):
+        value = value.materialize()
+    if isinstance(value, list):
+        return [detach(item) for item in value]
+    if isinstance(value, dict):
+        return {key: detach(item) for key, item in value.items()}
+    return value
+
+
+def detach_shared(value, owned):
+    # value for function which may change it in place: values shared with
+    # input are copied, containers schema has made (owned, id -> value) are not
+    if isinstance(value, CowDict):
+        base = value._base  # pylint: disable=protected-access
+        if id(base) in owned and not value.modified:
+            return base
+        return detach(value)
+    if isinstance(value, (list, dict)) and id(value) not in owned:
+        return detach(value)
+    return value
+
+
+def own(owned, value):
+    # values are kept, so ids are not reused while record runs
+    if isinstance(value, (list, dict)):
+        owned[id(value)] = value
+
+
+def escape(key):
+    # JSON pointer reference token
+    return str(key).replace("~", "~0").replace("/", "~1")
@@ -1,5 +1,6 @@
 
 class Element(object):
+    __slots__ = ()
     __eq_attrs__ = []
 
     def __eq__(self, other):
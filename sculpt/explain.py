@@ -0,0 +1,250 @@
+import sys
+
+from .analysis import resource
+from .core import Executor
+from .operations import flatten_operations
+
+
+# Static cost model of schemas. Every operation is annotated with estimated
+# dict lookups per record: one per key of path of each field it reads or
+# writes, plus one per Switch match. Operations nested in Each run once per
+# item, EXPLAIN assumes fan_out items per list, so their cost is multiplied
+# by fan_out for every enclosing Each. Only the most expensive Switch
+# branch is counted.
+
+
+DEFAULT_FAN_OUT = 10
+
+
+class Limits(object):
+    # None disables the limit. max_each_depth is for schemas built in
+    # python: rules compiled from YAML have no Each/With, so it is never
+    # exceeded by Compiler(limits=...)
+    def __init__(self, max_each_depth=None, max_switch_cases=None,
+                 max_lookups=None, max_operations=None):
+        self.max_each_depth = max_each_depth
+        self.max_switch_cases = max_switch_cases
+        self.max_lookups = max_lookups
+        self.max_operations = max_operations
+
+    def violations(self, node):
+        # (limit name, limit, value) exceeded by node itself
+        checks = [
+            ("max_each_depth", self.max_each_depth, node.each_nesting),
+            ("max_switch_cases", self.max_switch_cases, node.cases),
+        ]
+        if node.parent is None:
+            checks.extend([
+                ("max_lookups", self.max_lookups, node.total_lookups),
+                ("max_operations", self.max_operations, node.operations_count),
+            ])
+        return [(name, limit, value) for name, limit, value in checks
+                if limit is not None and value is not None and value > limit]
+
+
+class LimitExceeded(ValueError):
+    def __init__(self, node, name, limit, value):
+        super(LimitExceeded, self).__init__(
+            "{} exceeds {}: {} > {}".format(node.name, name, value, limit))
+        self.node = node
+        self.name = name
+        self.limit = limit
+        self.value = value
+
+
+class PlanNode(object):
+    def __init__(self, operation, name, lookups=0, each_depth=0, cases=None):
+        self.operation = operation
+        self.name = name
+        self.parent = None
+        self.children = []
+        # lookups of one run of operation itself, children excluded
+        self.lookups = lookups
+        # number of enclosing Each operations
+        self.each_depth = each_depth
+        self.multiplier = 1
+        # Each nesting depth of Each operations, this one included
+        self.each_nesting = None
+        # Switch case count
+        self.cases = cases
+        # lookups of one run with children, Each items and worst Switch branch included
+        self.cost = lookups
+        self.violations = []
+
+    def add(self, child):
+        child.parent = self
+        self.children.append(child)
+        return child
+
+    @property
+    def total_lookups(self):
+        # estimated lookups per record
+        return self.cost * self.multiplier
+
+    @property
+    def operations_count(self):
+        return sum(child.operations_count for child in self.children) + \
+            (self.operation is not None)
+
+    def walk(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def depth(self):
+        depth, node = 0, self.parent
+        while node is not None:
+            depth, node = depth + 1, node.parent
+        return depth
+
+    def describe(self):
+        parts = ["lookups={}".format(self.total_lookups)]
+        if self.each_depth:
+            parts.append("each_depth={} (x{})".format(self.each_depth, self.multiplier))
+        if self.cases is not None:
+            parts.append("cases={}".format(self.cases))
+        line = "{} [{}]".format(self.name, ", ".join(parts))
+        for name, limit, value in self.violations:
+            line += " !! {} {} > {}".format(name, value, limit)
+        return line
+
+    def format(self):
+        return "\n".join("  " * node.depth() + node.describe() for node in self.walk())
+
+    def __repr__(self):
+        return "PlanNode({})".format(self.describe())
+
+
+class Explainer(object):
+    def __init__(self, fan_out=DEFAULT_FAN_OUT, limits=None):
+        self.fan_out = fan_out
+        self.limits = limits or Limits()
+        self._each_depth = 0
+
+    def explain(self, schema):
+        root = PlanNode(None, "Schema")
+        self.add_children(root, schema.operations)
+        root.cost = sum(child.cost for child in root.children)
+        for node in root.walk():
+            node.violations = self.limits.violations(node)
+        return root
+
+    def add_children(self, parent, operations):
+        for operation in flatten_operations(operations):
+            parent.add(self.node(operation))
+
+    def node(self, operation):
+        try:
+            accept = operation.accept
+        except AttributeError:
+            # cost of unknown operations is not known
+            return self.new_node(operation, "{} (unknown)".format(type(operation).__name__))
+        return accept(self)
+
+    def new_node(self, operation, name, lookups=0, cases=None):
+        lineno = getattr(operation, "lineno", None)
+        if lineno is not None:
+            name = "{} (line {})".format(name, lineno)
+        node = PlanNode(operation, name, lookups, self._each_depth, cases)
+        node.multiplier = self.fan_out ** self._each_depth
+        return node
+
+    @staticmethod
+    def field_lookups(field):
+        return len(resource(field)[1])
+
+    def visit_copy(self, operation):
+        return self.new_node(
+            operation, "Copy {} -> {}".format(operation.left, operation.right),
+            self.field_lookups(operation.left) + self.field_lookups(operation.right))
+
+    def visit_apply(self, operation):
+        # value is read and written back
+        return self.new_node(operation, "Apply {}".format(operation.field),
+                             2 * self.field_lookups(operation.field))
+
+    def visit_delete(self, operation):
+        return self.new_node(operation, "Delete {}".format(operation.field),
+                             self.field_lookups(operation.field))
+
+    def visit_validate(self, operation):
+        return self.new_node(operation, "Validate {}".format(operation.field),
+                             self.field_lookups(operation.field))
+
+    def visit_combine(self, operation):
+        # Combines are inlined by add_children, this handles direct calls
+        node = self.new_node(operation, "Combine")
+        self.add_children(node, operation.operations)
+        node.cost = sum(child.cost for child in node.children)
+        return node
+
+    def visit_switch(self, operation):
+        fields = ", ".join(str(field) for field in operation.fields)
+        node = self.new_node(
+            operation, "Switch {}".format(fields),
+            sum(self.field_lookups(field) for field in operation.fields) + 1,
+            cases=len(operation.index))
+
+        branches = [("case {}".format(", ".join(repr(key) for key in keys)), bid)
+                    for keys, bid in self.case_keys(operation)]
+        if operation.default_operations is not None:
+            branches.append(("default", None))
+
+        costs = [0]
+        for name, bid in branches:
+            operations = operation.default_operations if bid is None \
+                else operation.operation_table[bid]
+            branch = node.add(self.new_node(None, name))
+            self.add_children(branch, operations)
+            branch.cost = sum(child.cost for child in branch.children)
+            costs.append(branch.cost)
+        node.cost = node.lookups + max(costs)
+        return node
+
+    @staticmethod
+    def case_keys(operation):
+        # case values grouped by branch, in branch order
+        keys = {}
+        for key, bid in operation.index.items():
+            keys.setdefault(bid, []).append(key)
+        return [(keys[bid], bid) for bid in sorted(keys)]
+
+    def visit_each(self, operation):
+        node = self.new_node(
+            operation, "Each {} -> {}".format(operation.left, operation.right),
+            self.field_lookups(operation.left) + self.field_lookups(operation.right))
+        node.each_nesting = self._each_depth + 1
+        self._each_depth += 1
+        try:
+            self.add_children(node, operation.operations)
+        finally:
+            self._each_depth -= 1
+        node.cost = node.lookups + self.fan_out * sum(child.cost for child in node.children)
+        return node
+
+    def visit_with(self, operation):
+        node = self.new_node(
+            operation, "With {} -> {}".format(operation.left, operation.right),
+            self.field_lookups(operation.left) + self.field_lookups(operation.right))
+        self.add_children(node, operation.operations)
+        node.cost = node.lookups + sum(child.cost for child in node.children)
+        return node
+
+
+def explain(schema, fan_out=DEFAULT_FAN_OUT, limits=None, out=None):
+    # prints annotated operation tree, returns its root PlanNode
+    plan = Explainer(fan_out, limits).explain(Executor(schema).root)
+    out = out or sys.stdout
+    out.write(plan.format() + "\n")
+    return plan
+
+
+def check_limits(schema, limits, fan_out=DEFAULT_FAN_OUT):
+    # raises LimitExceeded for the first node exceeding limits
+    plan = Explainer(fan_out, limits).explain(Executor(schema).root)
+    for node in plan.walk():
+        for name, limit, value in node.violations:
+            raise LimitExceeded(node, name, limit, value)
+    return plan
@@ -1,7 +1,9 @@
-import functools
+import collections
 
-from .util import (nested_get, nested_has, nested_set, nested_delete,
-                   split_label, classproperty)
+from .util import (nested_getter, nested_checker, nested_lookup,
+                   nested_setter, nested_deleter, split_label, classproperty,
+                   LRUCache, MISSING)
+from .compat import intern
 from .element import Element
 
 
@@ -9,16 +11,103 @@ FLAT = "flat"
 NESTED = "nested"
 
 
-def with_cursor(func):
-    @functools.wraps(func)
-    def wrapper(self, context, *args, **kwargs):
-        cursors = self.get_cursor(context)
-        kwargs["cursor"] = cursors
-        return func(self, context, *args, **kwargs)
-    return wrapper
+# accessors operate on cursor (container) and not on context
+Accessors = collections.namedtuple(
+    "Accessors", ["get", "has", "lookup", "set", "delete"])
+
+
+def nested_accessors(label):
+    keys = tuple(split_label(label))
+    return Accessors(
+        get=nested_getter(keys),
+        has=nested_checker(keys),
+        lookup=nested_lookup(keys),
+        set=nested_setter(keys),
+        delete=nested_deleter(keys),
+    )
+
+
+def flat_accessors(label):
+    def get(cursor):
+        return cursor.get(label)
+
+    def has(cursor):
+        return label in cursor
+
+    def lookup(cursor):
+        return cursor.get(label, MISSING)
+
+    def set_(cursor, value):
+        cursor[label] = value
+
+    def delete(cursor):
+        try:
+            del cursor[label]
+        except KeyError:
+            pass
+
+    return Accessors(get, has, lookup, set_, delete)
+
+
+def unrecognized_accessors(_label):
+    def raise_error(*_args):
+        raise ValueError("Unrecognized storage type")
+    return Accessors(*[raise_error] * len(Accessors._fields))
+
+
+ACCESSOR_FACTORIES = {
+    NESTED: nested_accessors,
+    FLAT: flat_accessors,
+}
+
+
+# accessors and paths are shared by fields with same label, caches are
+# bounded so labels of discarded schemas are not kept forever (interned
+# strings are freed when no longer referenced)
+LABEL_CACHE_SIZE = 4096
+
+_accessors_cache = LRUCache(LABEL_CACHE_SIZE)
+_paths_cache = LRUCache(LABEL_CACHE_SIZE)
+
+
+def intern_label(label):
+    try:
+        return intern(label)
+    except TypeError:
+        # Python 2 unicode labels
+        return label
+
+
+def label_path(label):
+    # path tuples are shared by all fields with same label
+    try:
+        return _paths_cache[label]
+    except KeyError:
+        pass
+
+    path = _paths_cache[label] = tuple(intern_label(key) for key in split_label(label))
+    return path
+
+
+def build_accessors(storage_type, label):
+    key = (storage_type, label)
+    try:
+        return _accessors_cache[key]
+    except KeyError:
+        pass
+
+    factory = ACCESSOR_FACTORIES.get(storage_type, unrecognized_accessors)
+    accessors = _accessors_cache[key] = factory(label)
+    return accessors
+
+
+# closures rebuilt from label, not pickled
+STORAGE_ACCESSORS = frozenset(["accessors", "_get", "_has", "_lookup", "_set", "_delete"])
 
 
 class Storage(Element):
+    __slots__ = ("_label", "path", "accessors",
+                 "_get", "_has", "_lookup", "_set", "_delete")
     __context_section__ = None
     __storage_type__ = None
     __eq_attrs__ = ["section", "label"]
@@ -33,6 +122,35 @@ class Storage(Element):
         return (self.section == other.section and
                 self.label == other.label)
 
+    @property
+    def label(self):
+        return self._label
+
+    @label.setter
+    def label(self, label):
+        label = intern_label(label)
+        self._label = label
+        self.path = label_path(label)
+        self.accessors = build_accessors(self.__storage_type__, label)
+        (self._get, self._has, self._lookup,
+         self._set, self._delete) = self.accessors
+
+    def __getstate__(self):
+        # accessors are closures, they are rebuilt from label on load
+        state = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if name not in STORAGE_ACCESSORS and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        state.update(getattr(self, "__dict__", {}))
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            if name != "_label":
+                setattr(self, name, value)
+        self.label = state["_label"]
+
     @classproperty
     def section(cls):  # pylint: disable=no-self-argument
         return cls.__context_section__
@@ -43,48 +161,25 @@ class Storage(Element):
     def set_cursor(self, context, item):
         context.cursors[self.section] = item
 
-    @with_cursor
-    def get(self, _context, cursor):
-        storage_type = self.__storage_type__
-        if storage_type == NESTED:
-            return nested_get(cursor, split_label(self.label))
-        elif storage_type == FLAT:
-            return cursor.get(self.label)
-        else:
-            raise ValueError("Unrecognized storage type")
-
-    @with_cursor
-    def has(self, _context, cursor):
-        storage_type = self.__storage_type__
-        if storage_type == NESTED:
-            return nested_has(cursor, split_label(self.label))
-        elif storage_type == FLAT:
-            return self.label in cursor
-        else:
-            raise ValueError("Unrecognized storage type")
-
-    @with_cursor
-    def delete(self, _context, cursor):
-        storage_type = self.__storage_type__
-        if storage_type == NESTED:
-            nested_delete(cursor, split_label(self.label))
-        elif storage_type == FLAT:
-            try:
-                del cursor[self.label]
-            except KeyError:
-                pass
-        else:
-            raise ValueError("Unrecognized storage type")
-
-    @with_cursor
-    def set(self, _context, value, cursor):
-        storage_type = self.__storage_type__
-        if storage_type == NESTED:
-            nested_set(cursor, split_label(self.label), value)
-        elif storage_type == FLAT:
-            cursor[self.label] = value
-        else:
-            raise ValueError("Unrecognized storage type")
+    def get(self, context):
+        return self._get(context.cursors[self.__context_section__])
+
+    def has(self, context):
+        return self._has(context.cursors[self.__context_section__])
+
+    def lookup(self, context):
+        # single walk alternative to get + has, MISSING if field does not exist
+        return self._lookup(context.cursors[self.__context_section__])
+
+    def existing(self, context):
+        # value validators check, MISSING if field does not exist
+        return self.lookup(context)
+
+    def delete(self, context):
+        self._delete(context.cursors[self.__context_section__])
+
+    def set(self, context, value):
+        self._set(context.cursors[self.__context_section__], value)
 
     @classmethod
     def compile(cls, _compiler, dct):
@@ -92,6 +187,7 @@ class Storage(Element):
 
 
 class Input(Storage):
+    __slots__ = ()
     __context_section__ = "input"
     __storage_type__ = NESTED
 
@@ -109,6 +205,7 @@ class Input(Storage):
 
 
 class Output(Storage):
+    __slots__ = ()
     __context_section__ = "output"
     __storage_type__ = NESTED
 
@@ -120,6 +217,7 @@ class Output(Storage):
 
 
 class Virtual(Storage):
+    __slots__ = ()
     __context_section__ = "virtual"
     __storage_type__ = FLAT
 
@@ -129,6 +227,7 @@ class Virtual(Storage):
 
 
 class VirtualVar(Virtual):
+    __slots__ = ()
     def accept(self, visitor):
         return visitor.visit_virtual_var(self)
 
@@ -137,45 +236,55 @@ class VirtualVar(Virtual):
 
 
 class VirtualList(Virtual):
-    def __init__(self, label, _op="set"):
+    __slots__ = ("_op", "cbs")
+
+    def __init__(self, label, _op="set", cbs=()):
         super(VirtualList, self).__init__(label)
         self._op = _op
-        self.cbs = []
+        # map/find callbacks, applied when list is read
+        self.cbs = tuple(cbs)
 
     def get(self, context):
-        val = context.stores[self.section].get(self.label, [])
-        for callback in self.cbs:
-            val = callback(val)
-        return val
-
-    def set(self, ctx, val):
+        values = context.stores[self.section].get(self.label, [])
+        if not self.cbs:
+            return values
+        # list may be changed in place (Apply), callbacks run on every read
+        return run_callbacks(self.cbs, values)
+
+    def lookup(self, context):
+        # unassigned list is copied as empty list (mapped one too), find()
+        # on it finds nothing to copy
+        value = self.get(context)
+        if value is None and self.label not in context.stores[self.section]:
+            return MISSING
+        return value
+
+    def existing(self, context):
+        # for validators list does not exist until assigned
+        if self.label not in context.stores[self.section]:
+            return MISSING
+        return self.get(context)
+
+    def set(self, context, value):
         method = getattr(self, "_assign_{}".format(self._op))
-        method(ctx, val)
+        method(context, value)
 
     def accept(self, visitor):
         return visitor.visit_virtual_list(self)
 
     def append(self):
-        return self.__class__(self.label, _op="append")
+        return self.__class__(self.label, _op="append", cbs=self.cbs)
 
     def extend(self):
-        return self.__class__(self.label, _op="extend")
+        return self.__class__(self.label, _op="extend", cbs=self.cbs)
 
     def map(self, callback):
-        def _map(_list):
-            return list(map(callback, _list))
-        self.cbs.append(_map)
-        return self
+        return self.__class__(self.label, _op=self._op,
+                              cbs=self.cbs + (("map", callback),))
 
     def find(self, _filter):
-        def _find(_list):
-            for item in _list:
-                if _filter(item):
-                    return item
-            return None
-
-        self.cbs.append(_find)
-        return self
+        return self.__class__(self.label, _op=self._op,
+                              cbs=self.cbs + (("find", _filter),))
 
     def _assign_set(self, context, value):
         if not isinstance(value, list):
@@ -184,22 +293,60 @@ class VirtualList(Virtual):
         context.stores[self.section][self.label] = value
 
     def _assign_append(self, context, value):
-        current = self.get(context)
+        # callbacks are applied on read, stored list gets raw values
+        store = context.stores[self.section]
+        current = store.get(self.label)
         if isinstance(current, list):
             current.append(value)
         else:
-            current = [value]
-
-        self._assign_set(context, current)
+            store[self.label] = [value]
 
     def _assign_extend(self, context, value):
-        current = self.get(context)
         if not isinstance(value, list):
             raise TypeError("expected list, got %s" % type(value))
 
+        store = context.stores[self.section]
+        current = store.get(self.label)
         if isinstance(current, list):
             current.extend(value)
         else:
-            current = [value]
+            store[self.label] = list(value)
+
+
+def _lazy_map(callback, values):
+    for value in values:
+        yield callback(value)
+
+
+def run_callbacks(cbs, values):
+    # map callbacks are fused into one pass over values, which stops at
+    # first match of find
+    items = iter(values)
+    for i, (kind, callback) in enumerate(cbs):
+        if kind == "map":
+            items = _lazy_map(callback, items)
+            continue
+
+        value = _find_in_list(callback, items)
+        for next_kind, next_callback in cbs[i + 1:]:
+            value = LIST_CALLBACKS[next_kind](next_callback, value)
+        return value
+    return list(items)
+
+
+def _map_list(callback, _list):
+    return list(map(callback, _list))
+
+
+def _find_in_list(_filter, _list):
+    for item in _list:
+        if _filter(item):
+            return item
+    return None
+
 
-        self._assign_set(context, current)
+# callbacks are kept as (kind, function) pairs to keep fields picklable
+LIST_CALLBACKS = {
+    "map": _map_list,
+    "find": _find_in_list,
+}
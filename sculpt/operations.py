@@ -1,15 +1,21 @@
+import collections
+
+from .compat import isstr
 from .fields import Input
 from .core import execute_operations
-from .util import nested_set, nested_get, zip_longest
+from .cow import detach_shared, own
+from .util import zip_longest, MISSING
 from .validation import ValidationError
 from .element import Element
 
 
 class Operation(Element):
-    pass
+    # rule line number, set by schema compiler when known
+    __slots__ = ("lineno",)
 
 
 class Copy(Operation):
+    __slots__ = ("left", "right")
     __eq_attrs__ = ["left", "right"]
 
     def __init__(self, left, right):
@@ -23,10 +29,10 @@ class Copy(Operation):
             self.right.set(None, None)
 
     def run(self, context):
-        value = self.left.get(context)
+        value = self.left.lookup(context)
 
         # ignore field if it not exists
-        if value is None and not self.left.has(context):
+        if value is MISSING:
             return
 
         self.right.set(context, value)
@@ -51,25 +57,52 @@ class ApplyError(Exception):
         self.function = function
         self.orig_exc = orig_exc
 
+    def __reduce__(self):
+        return (self.__class__, (self.args[0], self.field, self.function, self.orig_exc))
+
     def __str__(self):
         return "{}, {}, {}".format(self.field, self.function, self.orig_exc)
 
 
+def single_result(values):
+    if len(values) != 1:
+        raise ValueError("batched function returned {} values for 1".format(
+            len(values)))
+    return values[0]
+
+
+def call_batched(function, value):
+    # runs batched function on batch of one value
+    return single_result(function([value]))
+
+
 class Apply(Operation):
+    __slots__ = ("field", "function", "batched")
     __el_name__ = "apply"
 
-    def __init__(self, field, function):
+    def __init__(self, field, function, batched=False):
         self.field = field
         self.function = function
+        # batched function gets list of values of whole batch and returns
+        # list of results, row executors pass batches of one value
+        self.batched = batched
 
     def run(self, context):
         value = self.field.get(context)
+        if context.passthrough:
+            # function may change value in place, input must stay intact
+            value = detach_shared(value, context.owned)
         try:
-            value = self.function(value)
+            if self.batched:
+                value = call_batched(self.function, value)
+            else:
+                value = self.function(value)
         except Exception as e:
             raise ApplyError("apply error in {}".format(self.field.label),
                              self.field, self.function, e)
 
+        if context.passthrough:
+            own(context.owned, value)
         self.field.set(context, value)
 
     def accept(self, visitor):
@@ -79,25 +112,53 @@ class Apply(Operation):
     def compile(cls, compiler, dct):
         field = compiler.load_field(dct["field"])
         func = dct["func"]
-        return cls(field=field, function=func)
+        if isstr(func):
+            func = compiler.load_function(func)
+        return cls(field=field, function=func, batched=dct.get("batched", False))
 
     def __repr__(self):
         try:
             function_name = self.function.__name__
         except AttributeError:
             function_name = "function"
+        if self.batched:
+            return "Apply({}, {}, batched=True)".format(self.field, function_name)
         return "Apply({}, {})".format(self.field, function_name)
 
 
+def flatten_operations(operations):
+    # inlines members of nested Combines, without recursion
+    flat = []
+    stack = [iter(operations)]
+    while stack:
+        for operation in stack[-1]:
+            if isinstance(operation, Combine):
+                stack.append(iter(operation.operations))
+                break
+            flat.append(operation)
+        else:
+            stack.pop()
+    return flat
+
+
 class Combine(Operation):
+    __slots__ = ("operations", "_flat_operations")
     __el_name__ = "combine"
 
     def __init__(self, *operations):
         self.operations = operations
+        self._flat_operations = None
+
+    @property
+    def flat_operations(self):
+        if self._flat_operations is None:
+            self._flat_operations = tuple(flatten_operations(self.operations))
+        return self._flat_operations
 
     def run(self, _context):
-        # executor knows how to handle list of operations
-        return self.operations
+        # executor knows how to handle list of operations, nested combines
+        # are inlined so chains of them take one step
+        return self.flat_operations
 
     def accept(self, visitor):
         return visitor.visit_combine(self)
@@ -114,6 +175,7 @@ class Combine(Operation):
 
 
 class Delete(Operation):
+    __slots__ = ("field",)
     __el_name__ = "delete"
 
     def __init__(self, field):
@@ -135,6 +197,7 @@ class Delete(Operation):
 
 
 class Each(Operation):
+    __slots__ = ("left", "right", "operations")
     __el_name__ = "each"
 
     def __init__(self, left, right, operations):
@@ -165,6 +228,7 @@ class Each(Operation):
 
 
 class With(Operation):
+    __slots__ = ("left", "right", "operations")
     __el_name__ = "with"
 
     def __init__(self, left, right, operations):
@@ -200,28 +264,40 @@ class With(Operation):
 
 
 class Switch(Operation):
+    __slots__ = ("fields", "default_operations", "index", "operation_table",
+                 "hits", "_branch_id")
     __el_name__ = "switch"
 
     def __init__(self, *fields):
         self.fields = fields
-        self.match_tree = {}
         self.default_operations = None
 
+        # tuple of case values -> branch id, later cases override earlier
+        self.index = {}
         self.operation_table = {}
-        # used for switch merges
-        self.dispatch_table = []
+
+        # branch id -> number of matched records, see enable_stats
+        self.hits = None
 
         self._branch_id = 0
 
     def run(self, ctx):
-        keys = [field.get(ctx) for field in self.fields]
+        bid = self.match(tuple([field.get(ctx) for field in self.fields]))
+        if self.hits is not None:
+            self.hits[bid] += 1
 
-        bid = nested_get(self.match_tree, keys)
         if bid is not None:
             return self.operation_table[bid]
 
         return self.default_operations
 
+    def match(self, key):
+        try:
+            return self.index.get(key)
+        except TypeError:
+            # unhashable values never match a case
+            return None
+
     def accept(self, visitor):
         return visitor.visit_switch(self)
 
@@ -232,20 +308,49 @@ class Switch(Operation):
         if len(switch_values) != len(self.fields):
             raise TypeError("Switch case length mismatch")
 
+        key = tuple(switch_values)
+        try:
+            hash(key)
+        except TypeError:
+            raise TypeError("Switch case values should be hashable: {!r}".format(key))
+
         bid = self._branch_id
+        self._branch_id += 1
 
-        nested_set(self.match_tree, switch_values, bid)
+        self._replace_branch(key, bid)
         self.operation_table[bid] = operations
+        return self
 
-        self.dispatch_table.append((switch_values, bid))
-        self._branch_id += 1
+    def _replace_branch(self, key, bid):
+        old_bid = self.index.get(key)
+        if old_bid is not None:
+            del self.operation_table[old_bid]
+        self.index[key] = bid
 
-        return self
+    def cases(self):
+        # (values, operations) pairs in order cases were added
+        return [(key, self.operation_table[bid])
+                for key, bid in sorted(self.index.items(), key=lambda item: item[1])]
 
     def default(self, operations):
         self.default_operations = operations
         return self
 
+    def enable_stats(self):
+        # compiled plans capture counters on compile, so enable before
+        self.hits = collections.Counter()
+        return self
+
+    def stats(self):
+        # case values -> hits, None stands for default branch
+        if self.hits is None:
+            return None
+
+        keys = {bid: key for key, bid in self.index.items()}
+        return {keys[bid] if bid is not None else None: count
+                for bid, count in self.hits.items()
+                if bid is None or bid in keys}
+
     def merge(self, other):
         all_eq = all(a == b for a, b in zip_longest(
             self.fields, other.fields))
@@ -255,9 +360,13 @@ class Switch(Operation):
         if other.default_operations is not None:
             raise ValueError("can not merge default operations")
 
-        for values, bid in other.dispatch_table:
-            operations = other.operation_table[bid]
-            self.case(values, operations)
+        # other's cases are already validated, shift its branch ids past
+        # ours keeping their order
+        offset = self._branch_id
+        for key, bid in other.index.items():
+            self._replace_branch(key, bid + offset)
+            self.operation_table[bid + offset] = other.operation_table[bid]
+        self._branch_id += other._branch_id  # pylint: disable=protected-access
 
         return self
 
@@ -281,6 +390,7 @@ class Switch(Operation):
 
 
 class Validate(Operation):
+    __slots__ = ("field", "validator")
     __el_name__ = "validate"
 
     def __init__(self, field, validator):
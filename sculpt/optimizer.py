@@ -0,0 +1,245 @@
+from .analysis import (EffectsAnalyzer, Effects, resource, overlaps,
+                       overlaps_any, read_resources, is_plain_store,
+                       uses_virtual_cursor)
+from .core import Schema, Executor
+from .operations import Copy, Delete, Each, With, Switch, flatten_operations
+from .fields import Output, Virtual
+
+
+# Schema rewrites which keep output and errors of every record the same,
+# but do less work per record. Virtual variables are scratch space: writes
+# to ones which are never read may be dropped. Output starts empty unless
+# schema is optimized for passthrough runs (output starts as input).
+
+
+class Scope(object):
+    def __init__(self, top_level, virtual_cursor=False, passthrough=False):
+        # top level lists start with empty Virtual store, and empty Output
+        # store unless passthrough
+        self.top_level = top_level
+        self.passthrough = passthrough
+        # inside Each/With moving Virtual cursor, Virtual.delete and
+        # Virtual.set work on different containers
+        self.virtual_cursor = virtual_cursor
+
+
+def flatten_combines(operations, _scope, _optimizer):
+    return flatten_operations(operations)
+
+
+def hoist_switches(operations, scope, optimizer):
+    # replaces Switch with its branch, when branch is known statically:
+    # switch without cases, all branches alike or, at top level, switch
+    # on fields nothing has written yet
+    result = []
+    written = Effects()
+    for operation in operations:
+        branch = None
+        if isinstance(operation, Switch) and operation.hits is None:
+            branch = static_branch(operation, written if scope.top_level else None, scope)
+
+        if branch is None:
+            result.append(operation)
+            written.update(optimizer.analyzer.effects(operation))
+        else:
+            for inlined in flatten_operations(branch):
+                result.append(inlined)
+                written.update(optimizer.analyzer.effects(inlined))
+    return result
+
+
+def unset_at_start(field, scope):
+    # field holds nothing before first operation of top level list
+    return is_plain_store(field) and \
+        not (scope.passthrough and isinstance(field, Output))
+
+
+def static_branch(switch, written, scope):
+    default = switch.default_operations or []
+    branches = list(switch.operation_table.values())
+    if all(same_operations(branch, default) for branch in branches):
+        return default
+
+    if written is None:
+        return None
+    for field in switch.fields:
+        if not unset_at_start(field, scope) or written.writes_to(resource(field)):
+            return None
+
+    # fields do not exist yet, so they all read as None
+    bid = switch.match(tuple(None for _ in switch.fields))
+    if bid is None:
+        return default
+    return switch.operation_table[bid]
+
+
+def field_key(field):
+    # fields are equal by section and label, VirtualList variants differ
+    # in how they are assigned and read too
+    return (field.__class__, field.section, field.label,
+            getattr(field, "_op", None), getattr(field, "cbs", None))
+
+
+def same_operations(left, right):
+    # Copies are compared by fields, other operations by identity
+    left, right = list(left), list(right)
+    if len(left) != len(right):
+        return False
+    for left_op, right_op in zip(left, right):
+        if left_op is right_op:
+            continue
+        if not isinstance(left_op, Copy) or left_op.__class__ is not right_op.__class__:
+            return False
+        if field_key(left_op.left) != field_key(right_op.left) or \
+                field_key(left_op.right) != field_key(right_op.right):
+            return False
+    return True
+
+
+def collapse_copy_chains(operations, scope, optimizer):
+    # Copy(a, b) ... Copy(b, c) -> Copy(a, b) ... Copy(a, c), when b had no
+    # writers before, so it holds value of a or does not exist; then
+    # Copy(a, b) is dropped if b is a virtual variable nobody reads
+    if not scope.top_level:
+        return operations
+
+    analyzer = optimizer.analyzer
+    result = list(operations)
+    effects = [analyzer.effects(operation) for operation in result]
+
+    written = Effects()
+    for i, operation in enumerate(result):
+        if operation is not None and is_chain_head(operation) and \
+                unset_at_start(operation.right, scope) and \
+                not written.writes_to(resource(operation.right)):
+            redirect_copies(result, effects, i)
+            if isinstance(operation.right, Virtual) and \
+                    not is_read(operation.right, result[i + 1:]):
+                result[i] = None
+        if operation is not None:
+            written.update(effects[i])
+    return [operation for operation in result if operation is not None]
+
+
+def is_chain_head(operation):
+    return isinstance(operation, Copy) and is_plain_store(operation.right) and \
+        not overlaps(resource(operation.left), resource(operation.right)) and \
+        (is_plain_store(operation.left) or operation.left.section == "input")
+
+
+def redirect_copies(operations, effects, head):
+    source, middle = operations[head].left, operations[head].right
+    source_res, middle_res = resource(source), resource(middle)
+    for j in range(head + 1, len(operations)):
+        operation = operations[j]
+        if operation is None:
+            continue
+        if isinstance(operation, Copy) and operation.left == middle:
+            operations[j] = Copy(source, operation.right)
+            effects[j] = EffectsAnalyzer().effects(operations[j])
+            if effects[j].writes_to(source_res) or effects[j].writes_to(middle_res):
+                return
+            continue
+        if effects[j].writes_to(source_res) or effects[j].writes_to(middle_res):
+            return
+
+
+def is_read(field, operations):
+    reads = read_resources([op for op in operations if op is not None])
+    return reads is None or overlaps_any(resource(field), reads)
+
+
+def eliminate_dead_stores(operations, scope, optimizer):
+    # Copy(x, b) ... Delete(b) with no reads or writes of b in between
+    analyzer = optimizer.analyzer
+    result = list(operations)
+    for i, operation in enumerate(result):
+        if not isinstance(operation, Copy) or not is_plain_store(operation.right):
+            continue
+        if isinstance(operation.right, Virtual) and scope.virtual_cursor:
+            continue
+
+        target = resource(operation.right)
+        for later in result[i + 1:]:
+            if later is None:
+                continue
+            if isinstance(later, Delete) and is_plain_store(later.field) and \
+                    deletes_whole(resource(later.field), target):
+                result[i] = None
+                break
+            # Copy shares value, writes into target change copied value
+            later_effects = analyzer.effects(later)
+            if later_effects.reads_from(target) or later_effects.writes_to(target):
+                break
+    return [operation for operation in result if operation is not None]
+
+
+def deletes_whole(deleted, target):
+    # deleting a nested path would leave parents created by the copy
+    section, path = deleted
+    return len(path) == 1 and section == target[0] and target[1][:1] == path
+
+
+DEFAULT_PASSES = (
+    flatten_combines,
+    hoist_switches,
+    flatten_combines,
+    collapse_copy_chains,
+    eliminate_dead_stores,
+)
+
+
+class Optimizer(object):
+    # schema optimized without passthrough may give other output when run
+    # with passthrough
+    def __init__(self, passes=DEFAULT_PASSES, passthrough=False):
+        self.passes = passes
+        self.passthrough = passthrough
+        self.analyzer = EffectsAnalyzer()
+
+    def optimize(self, schema):
+        root = Executor(schema).root
+        scope = Scope(top_level=True, passthrough=self.passthrough)
+        operations = self.optimize_operations(root.operations, scope)
+        return Schema(operations)
+
+    def optimize_operations(self, operations, scope):
+        operations = [self.optimize_children(operation, scope)
+                      for operation in flatten_operations(operations)]
+        for optimization in self.passes:
+            operations = optimization(operations, scope, self)
+        return operations
+
+    def optimize_children(self, operation, scope):
+        if isinstance(operation, Switch):
+            return self.optimize_switch(operation, scope)
+        if isinstance(operation, (Each, With)):
+            body_scope = Scope(top_level=False,
+                               virtual_cursor=scope.virtual_cursor or
+                               uses_virtual_cursor(operation),
+                               passthrough=scope.passthrough)
+            return operation.__class__(
+                operation.left, operation.right,
+                self.optimize_operations(operation.operations, body_scope))
+        return operation
+
+    def optimize_switch(self, switch, scope):
+        # branches run at unknown point, so they are not top level lists
+        branch_scope = Scope(top_level=False, virtual_cursor=scope.virtual_cursor,
+                             passthrough=scope.passthrough)
+        optimized = switch.__class__(*switch.fields)
+        optimized.index = dict(switch.index)
+        optimized.operation_table = {
+            bid: self.optimize_operations(operations, branch_scope)
+            for bid, operations in switch.operation_table.items()
+        }
+        if switch.default_operations is not None:
+            optimized.default_operations = self.optimize_operations(
+                switch.default_operations, branch_scope)
+        optimized.hits = switch.hits
+        optimized._branch_id = switch._branch_id  # pylint: disable=protected-access
+        return optimized
+
+
+def optimize(schema, passes=DEFAULT_PASSES, passthrough=False):
+    return Optimizer(passes, passthrough).optimize(schema)
@@ -0,0 +1,101 @@
+import collections
+import multiprocessing
+
+from .core import Executor, Result
+from .operations import ApplyError
+from .util import chunked
+from . import registry
+
+
+# schema executor of current worker process, set once by pool initializer
+_worker_executor = None  # pylint: disable=invalid-name
+
+
+def _init_worker(payload, functions):
+    global _worker_executor  # pylint: disable=global-statement,invalid-name
+    _worker_executor = Executor(registry.loads(payload, functions))
+
+
+def _run_chunk(chunk):
+    try:
+        return [tuple(result) for result in _worker_executor.run_many(chunk)]
+    except ApplyError as exc:
+        # function may be not picklable, parent process gets its name
+        function = getattr(exc.function, "__name__", repr(exc.function))
+        raise ApplyError(exc.args[0], exc.field, function, exc.orig_exc)
+
+
+class ParallelExecutor(object):
+    # Runs records on a process pool. Schema is pickled once and handed to
+    # every worker on start, functions registered in sculpt.registry are
+    # pickled by name, so workers have to register them too (automatic
+    # with 'fork' start method, on import with 'spawn'). start_method
+    # None uses multiprocessing default.
+    def __init__(self, schema, processes=None, chunk_size=256,
+                 max_pending=None, functions=None, start_method=None):
+        self.root = Executor(schema).root
+        self.functions = functions or registry.functions
+        self.payload = registry.dumps(self.root, self.functions)
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        # bounds number of chunks in flight and so memory used by results
+        self.max_pending = max_pending or self.processes * 2
+        self.start_method = start_method
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # default registry is module state, workers have their own
+            functions = self.functions
+            if functions is registry.functions:
+                functions = None
+
+            if self.start_method is None:
+                pool_class = multiprocessing.Pool
+            else:
+                pool_class = multiprocessing.get_context(self.start_method).Pool
+            self._pool = pool_class(
+                self.processes,
+                initializer=_init_worker,
+                initargs=(self.payload, functions),
+            )
+        return self._pool
+
+    def run_many(self, inputs):
+        pool = self.pool
+        pending = collections.deque()
+        for chunk in chunked(inputs, self.chunk_size):
+            pending.append(pool.apply_async(_run_chunk, (chunk,)))
+            if len(pending) >= self.max_pending:
+                for result in pending.popleft().get():
+                    yield Result(*result)
+
+        while pending:
+            for result in pending.popleft().get():
+                yield Result(*result)
+
+    def map(self, inputs):
+        for result in self.run_many(inputs):
+            yield result.output
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def terminate(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, _exc_value, _traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
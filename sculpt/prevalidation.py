@@ -0,0 +1,96 @@
+import collections
+
+from .analysis import Effects, alias_effects, resource
+from .core import Context, Executor, Result, Schema
+from .fields import Input
+from .operations import Validate, flatten_operations
+from .validation import ValidationError, ValueValidator
+
+
+# Validation first execution. Top level validations of Input fields are run
+# before transformation, with one lookup per field, and records failing them
+# are rejected without being transformed. Input fields can not be set, but
+# Copy shares values, so writes under a copy change Input too: validation
+# is hoisted only if no operation before it may write under its field. Errors
+# of hoisted validations come before errors of the rest of the schema.
+
+
+def is_hoistable(operation):
+    return isinstance(operation, Validate) and \
+        isinstance(operation.field, Input) and \
+        isinstance(operation.validator, ValueValidator)
+
+
+class FieldChecks(object):
+    def __init__(self, field):
+        self.field = field
+        self.lookup = field.accessors.lookup
+        self.validators = []
+
+
+class ValidationPlan(object):
+    def __init__(self, schema):
+        checks = collections.OrderedDict()
+        remaining = []
+        # writes of operations so far, through shared values included
+        written = Effects()
+        operations = flatten_operations(schema.operations)
+        for operation, operation_effects in zip(operations, alias_effects(operations)):
+            if not is_hoistable(operation) or \
+                    written.writes_to(resource(operation.field)):
+                remaining.append(operation)
+                written.update(operation_effects)
+                continue
+
+            field = operation.field
+            if field.label not in checks:
+                checks[field.label] = FieldChecks(field)
+            checks[field.label].validators.append(operation.validator.validate_value)
+
+        self.checks = list(checks.values())
+        # schema without hoisted validations
+        self.schema = Schema(remaining)
+
+    def validate(self, context, max_errors=None):
+        # validates context input, stops after max_errors errors
+        errors = context.errors
+        _input = context.stores[Input.section]
+        for checks in self.checks:
+            field = checks.field
+            value = checks.lookup(_input)
+            for validate_value in checks.validators:
+                try:
+                    validate_value(field, value)
+                except ValidationError as exc:
+                    errors.append(exc)
+                    if max_errors is not None and len(errors) >= max_errors:
+                        return errors
+        return errors
+
+
+class ValidatingExecutor(object):
+    # max_errors=None collects all errors of hoisted validations, records
+    # with any of them are not transformed and get empty output. Errors of
+    # hoisted validations are reported ahead of other errors, whatever their
+    # place in schema.
+    def __init__(self, schema, max_errors=1):
+        self.root = Executor(schema).root
+        self.validation = ValidationPlan(self.root)
+        self.executor = Executor(self.validation.schema)
+        self.max_errors = max_errors
+
+    def run(self, context):
+        if self.validation.validate(context, self.max_errors):
+            return context
+        return self.executor.plan.run(context)
+
+    def run_many(self, inputs):
+        run = self.run
+        context = Context({})
+        for _input in inputs:
+            run(context.reset(_input))
+            yield Result(context.output(), context.errors)
+
+    def map(self, inputs):
+        for result in self.run_many(inputs):
+            yield result.output
@@ -0,0 +1,159 @@
+from timeit import default_timer
+
+from .core import Context, Executor, Result, execute_operations
+from .operations import Combine, Each, With, Switch
+
+
+# Opt-in profiling. ProfilingExecutor runs a copy of schema in which every
+# operation is wrapped by a timing proxy, schema itself and other executors
+# are not changed, so profiling costs nothing when not used.
+
+
+def operation_name(operation):
+    name = type(operation).__name__
+    if hasattr(operation, "left") and hasattr(operation, "right"):
+        name = "{} {} -> {}".format(name, field_name(operation.left),
+                                    field_name(operation.right))
+    elif hasattr(operation, "field"):
+        name = "{} {}".format(name, field_name(operation.field))
+    elif hasattr(operation, "fields"):
+        name = "{} {}".format(name, ",".join(field_name(f) for f in operation.fields))
+
+    lineno = getattr(operation, "lineno", None)
+    if lineno is not None:
+        name = "{} (line {})".format(name, lineno)
+    # ';' separates frames in collapsed stacks
+    return name.replace(";", ":")
+
+
+def field_name(field):
+    return "{}:{}".format(field.section, field.label)
+
+
+class ProfileEntry(object):
+    def __init__(self, operation, frames):
+        self.operation = operation
+        self.frames = frames
+        self.calls = 0
+        self.cumulative = 0.0
+        self.self_time = 0.0
+
+    @property
+    def lineno(self):
+        return getattr(self.operation, "lineno", None)
+
+    def __repr__(self):
+        return "ProfileEntry({}, calls={}, cumulative={:.6f}, self={:.6f})".format(
+            self.frames[-1], self.calls, self.cumulative, self.self_time)
+
+
+class Profile(object):
+    def __init__(self):
+        self.entries = []
+        # children time of operations being run, innermost last
+        self._children = []
+
+    def reset(self):
+        for entry in self.entries:
+            entry.calls = 0
+            entry.cumulative = entry.self_time = 0.0
+
+    def top(self, limit=None, key="cumulative"):
+        entries = sorted(self.entries, key=lambda e: getattr(e, key), reverse=True)
+        return entries[:limit]
+
+    def report(self, limit=20, key="cumulative"):
+        lines = ["{:>10} {:>12} {:>12}  {}".format("calls", "cumulative", "self", "operation")]
+        for entry in self.top(limit, key):
+            lines.append("{:>10} {:>12.6f} {:>12.6f}  {}".format(
+                entry.calls, entry.cumulative, entry.self_time, entry.frames[-1]))
+        return "\n".join(lines)
+
+    def collapsed(self, unit=1e-6):
+        # collapsed stacks (flamegraph.pl, speedscope), self time in units
+        lines = []
+        for entry in self.entries:
+            count = int(round(entry.self_time / unit))
+            if count:
+                lines.append("{} {}".format(";".join(entry.frames), count))
+        return lines
+
+    def write_collapsed(self, destination, unit=1e-6):
+        # destination is text stream, io ones take only unicode on Python 2
+        for line in self.collapsed(unit):
+            destination.write(u"{}\n".format(line))
+
+
+class ProfiledOperation(object):
+    # runs operation and operations it returns, so their time is included
+    def __init__(self, operation, entry, profile):
+        self.operation = operation
+        self.entry = entry
+        self.profile = profile
+
+    def run(self, context):
+        children = self.profile._children  # pylint: disable=protected-access
+        children.append(0.0)
+        started = default_timer()
+        try:
+            next_operations = self.operation.run(context)
+            if next_operations is not None:
+                execute_operations(context, next_operations)
+        finally:
+            elapsed = default_timer() - started
+            entry = self.entry
+            entry.calls += 1
+            entry.cumulative += elapsed
+            entry.self_time += elapsed - children.pop()
+            if children:
+                children[-1] += elapsed
+
+
+class ProfilingExecutor(object):
+    def __init__(self, schema, root_name="schema"):
+        self.root = Executor(schema).root
+        self.profile = Profile()
+        self.operations = self.wrap_operations(self.root.operations, (root_name,))
+
+    def wrap_operations(self, operations, frames):
+        return [self.wrap(operation, frames) for operation in operations]
+
+    def wrap(self, operation, frames):
+        frames = frames + (operation_name(operation),)
+        entry = ProfileEntry(operation, frames)
+        self.profile.entries.append(entry)
+        return ProfiledOperation(self.wrap_children(operation, frames), entry, self.profile)
+
+    def wrap_children(self, operation, frames):
+        # copies of containers running wrapped operations
+        if isinstance(operation, Combine):
+            return Combine(*self.wrap_operations(operation.operations, frames))
+        if isinstance(operation, (Each, With)):
+            return operation.__class__(operation.left, operation.right,
+                                       self.wrap_operations(operation.operations, frames))
+        if isinstance(operation, Switch):
+            switch = Switch(*operation.fields)
+            switch.index = operation.index
+            switch.hits = operation.hits
+            switch.operation_table = {
+                bid: self.wrap_operations(operations, frames)
+                for bid, operations in operation.operation_table.items()
+            }
+            if operation.default_operations is not None:
+                switch.default_operations = self.wrap_operations(
+                    operation.default_operations, frames)
+            return switch
+        return operation
+
+    def run(self, context):
+        execute_operations(context, self.operations)
+        return context
+
+    def run_many(self, inputs):
+        for _input in inputs:
+            context = self.run(Context(_input))
+            yield Result(context.output(), context.errors)
+
+    def map(self, inputs):
+        for result in self.run_many(inputs):
+            yield result.output
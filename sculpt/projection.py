@@ -0,0 +1,121 @@
+import json
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None  # pylint: disable=invalid-name
+
+
+# Projection of input documents to the part schema reads. Projection tree
+# is a dict of keys to subtrees, ALL keeps whole value. Trees are applied
+# to every item of lists, which is how paths relative to Each cursor work.
+
+
+class _All(object):
+    def __repr__(self):
+        return "ALL"
+
+    def __reduce__(self):
+        return "ALL"
+
+
+ALL = _All()
+
+
+def project(value, tree):
+    if tree is ALL:
+        return value
+    if isinstance(value, dict):
+        return {key: project(value[key], subtree)
+                for key, subtree in tree.items() if key in value}
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    return value
+
+
+class Projection(object):
+    def __init__(self, tree=None):
+        self.tree = {} if tree is None else tree
+
+    @property
+    def whole(self):
+        return self.tree is ALL
+
+    def add(self, path, keep=True):
+        # keep: value at path is read whole, else only its projected part
+        if self.tree is ALL:
+            return
+        if not path:
+            if keep:
+                self.tree = ALL
+            return
+
+        node = self.tree
+        for key in path[:-1]:
+            child = node.setdefault(key, {})
+            if child is ALL:
+                return
+            node = child
+
+        key = path[-1]
+        if keep:
+            node[key] = ALL
+        elif key not in node:
+            node[key] = {}
+
+    def labels(self):
+        # dotted paths of projected values
+        if self.tree is ALL:
+            return [""]
+
+        labels = []
+        stack = [((), self.tree)]
+        while stack:
+            path, node = stack.pop()
+            if node is ALL or not node:
+                labels.append(".".join(path))
+                continue
+            for key, subtree in node.items():
+                stack.append((path + (key,), subtree))
+        return sorted(labels)
+
+    def apply(self, document):
+        return project(document, self.tree)
+
+    def __repr__(self):
+        return "Projection({!r})".format(self.tree)
+
+
+class ProjectingDecoder(object):
+    # json decoder returning projected documents. stdlib json parses whole
+    # document and prunes it afterwards, which saves resident memory only;
+    # with pysimdjson installed documents are parsed lazily and only
+    # projected subtrees are materialized
+    def __init__(self, projection, loads=json.loads):
+        self.projection = projection
+        self._loads = loads
+        self._parser = None
+        if simdjson is not None and loads is json.loads:
+            self._parser = simdjson.Parser()
+
+    def loads(self, data):
+        if self.projection.whole:
+            return self._loads(data)
+        if self._parser is not None:
+            return _project_lazy(self._parser.parse(data), self.projection.tree)
+        return self.projection.apply(self._loads(data))
+
+    __call__ = loads
+
+
+def _project_lazy(value, tree):
+    if isinstance(value, simdjson.Object):
+        if tree is ALL:
+            return value.as_dict()
+        return {key: _project_lazy(value[key], subtree)
+                for key, subtree in tree.items() if key in value}
+    if isinstance(value, simdjson.Array):
+        if tree is ALL:
+            return value.as_list()
+        return [_project_lazy(item, tree) for item in value]
+    return value
@@ -0,0 +1,82 @@
+import io
+import pickle
+
+
+class FunctionRegistry(object):
+    # named functions, pickled by name and resolved on load, so schemas
+    # with lambdas and closures can be shipped to other processes
+    def __init__(self):
+        self._functions = {}
+        self._names = {}
+
+    def register(self, name, function=None):
+        if function is None:
+            def decorator(func):
+                self.register(name, func)
+                return func
+            return decorator
+
+        current = self._functions.get(name)
+        if current is not None and current is not function:
+            raise ValueError("function '{}' already registered".format(name))
+
+        self._functions[name] = function
+        self._names[id(function)] = name
+        return function
+
+    def lookup(self, name):
+        try:
+            return self._functions[name]
+        except KeyError:
+            raise KeyError("function '{}' is not registered".format(name))
+
+    def name_of(self, function):
+        name = self._names.get(id(function))
+        if name is not None and self._functions[name] is function:
+            return name
+        return None
+
+    def __contains__(self, name):
+        return name in self._functions
+
+
+functions = FunctionRegistry()  # pylint: disable=invalid-name
+
+
+def register(name, function=None):
+    return functions.register(name, function)
+
+
+class _RegistryPickler(pickle.Pickler):
+    def __init__(self, file, registry, protocol=pickle.HIGHEST_PROTOCOL):  # pylint: disable=redefined-builtin
+        pickle.Pickler.__init__(self, file, protocol)
+        self.registry = registry
+
+    def persistent_id(self, obj):  # pylint: disable=method-hidden
+        if callable(obj):
+            return self.registry.name_of(obj)
+        return None
+
+
+class _RegistryUnpickler(pickle.Unpickler):
+    def __init__(self, file, registry):  # pylint: disable=redefined-builtin
+        pickle.Unpickler.__init__(self, file)
+        self.registry = registry
+
+    def persistent_load(self, pid):  # pylint: disable=method-hidden
+        return self.registry.lookup(pid)
+
+
+def dumps(obj, registry=None):
+    buf = io.BytesIO()
+    try:
+        _RegistryPickler(buf, registry or functions).dump(obj)
+    except (pickle.PicklingError, AttributeError, TypeError) as exc:
+        # unpicklable objects raise different errors on python versions
+        raise pickle.PicklingError(
+            "can not pickle, unregistered function? {}".format(exc))
+    return buf.getvalue()
+
+
+def loads(data, registry=None):
+    return _RegistryUnpickler(io.BytesIO(data), registry or functions).load()
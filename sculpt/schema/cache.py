@@ -0,0 +1,145 @@
+import collections
+import hashlib
+import os
+import pickle
+import tempfile
+
+from .compiler import Compiler
+from .resolver import Resolver
+
+
+# Persistent cache of resolved rules. Entry of a root rules file keeps its
+# resolved rules with manifest of every file loaded to produce them (root
+# file and transitively included ones). Entry is used while manifest files
+# are unchanged, so warm start skips YAML parsing and tag resolution.
+#
+# Files with changed mtime or size are re-hashed, entry stays valid when
+# their content is the same as loader read it. Rules referencing objects
+# which can not be pickled (e.g. lambdas passed as irefs) are not cached.
+
+
+CACHE_VERSION = 2
+
+
+def file_stat(path):
+    stat = os.stat(path)
+    return (stat.st_mtime, stat.st_size)
+
+
+def file_digest(path):
+    with open(path, "rb") as source:
+        return hashlib.sha256(source.read()).digest()
+
+
+def irefs_key(irefs):
+    # functions and classes are pickled by reference, so key of same irefs
+    # is same in every process; None when irefs can not be pickled
+    if not irefs:
+        return ""
+    try:
+        data = pickle.dumps(irefs, 2)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return hashlib.sha256(data).hexdigest()
+
+
+class CacheEntry(object):
+    def __init__(self, files, rules):
+        # files are (path, stat, digest) of content loader has read, so
+        # files changed while resolving do not match
+        self.version = CACHE_VERSION
+        self.paths = [path for path, _, _ in files]
+        self.stats = [stat for _, stat, _ in files]
+        self.digests = [digest for _, _, digest in files]
+        self.rules = rules
+
+    def is_valid(self):
+        if self.version != CACHE_VERSION:
+            return False
+        try:
+            if [file_stat(path) for path in self.paths] == self.stats:
+                return True
+            return [file_digest(path) for path in self.paths] == self.digests
+        except (IOError, OSError):
+            return False
+
+
+class RulesCache(object):
+    def __init__(self, directory):
+        self.directory = directory
+
+    def entry_path(self, path, key=""):
+        # key distinguishes resolutions of same file, e.g. by irefs
+        name = hashlib.sha256(u"{}\0{}".format(os.path.abspath(path), key)
+                              .encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + ".pickle")
+
+    def load_rules(self, loader, filename, resolver=None, key=None):
+        # resolved rules of filename, resolver has to use loader. Default
+        # key is derived from resolver irefs, rules resolved with irefs
+        # which can not be pickled are not cached
+        resolver = resolver or Resolver(loader)
+        if key is None:
+            key = irefs_key(resolver.irefs)
+            if key is None:
+                return resolver.resolve(loader.load_file(filename)).rules.data
+
+        path = os.path.join(loader.root_dir, filename)
+        entry_path = self.entry_path(path, key)
+
+        entry = self.read(entry_path)
+        if entry is not None and entry.is_valid():
+            return entry.rules
+
+        start = len(loader.loaded_files)
+        rules = resolver.resolve(loader.load_file(filename)).rules.data
+        files = collections.OrderedDict()
+        for loaded in loader.loaded_files[start:]:
+            if files.setdefault(loaded[0], loaded)[2] != loaded[2]:
+                # file changed between two loads
+                return rules
+
+        self.write(entry_path, CacheEntry(files.values(), rules))
+        return rules
+
+    def load_schema(self, loader, filename, resolver=None, compiler=None, key=None):
+        compiler = compiler or Compiler()
+        return compiler.compile(self.load_rules(loader, filename, resolver, key))
+
+    @staticmethod
+    def read(entry_path):
+        try:
+            with open(entry_path, "rb") as source:
+                return pickle.load(source)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError, TypeError, ValueError):
+            # missing, truncated or written by other version
+            return None
+
+    def write(self, entry_path, entry):
+        try:
+            data = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        # readers never see partially written entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as destination:
+                destination.write(data)
+            os.rename(temp_path, entry_path)
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+        return True
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".pickle"):
+                os.remove(os.path.join(self.directory, name))
@@ -3,6 +3,8 @@ from sculpt.fields import Input, Output, VirtualVar
 from sculpt.operations import (Copy, Switch, Combine, Validate, Apply, Delete)
 from sculpt.validation import InSetValidator, NotEmptyValidator
 from sculpt.core import Schema
+from sculpt.explain import check_limits
+from sculpt.registry import functions as registered_functions
 
 
 DEFAULT_FIELDS = {
@@ -29,7 +31,9 @@ DEFAULT_VALIDATORS = {
 
 
 class Compiler(object):
-    def __init__(self, fields=None, operations=None, validators=None):
+    def __init__(self, fields=None, operations=None, validators=None,
+                 functions=None, limits=None):
+        self.functions = functions or registered_functions
         self.operations = DEFAULT_OPERATIONS.copy()
         self.fields = DEFAULT_FIELDS.copy()
         self.validators = DEFAULT_VALIDATORS.copy()
@@ -38,8 +42,15 @@ class Compiler(object):
         self.fields.update(fields or {})
         self.validators.update(validators or {})
 
+        # sculpt.explain.Limits, schemas exceeding them are rejected; rules
+        # have no Each/With operations, max_each_depth does not apply
+        self.limits = limits
+
     def compile(self, rules):
-        return Schema([self.load_operation(op) for op in rules])
+        schema = Schema([self.load_operation(op) for op in rules])
+        if self.limits is not None:
+            check_limits(schema, self.limits)
+        return schema
 
     def load_operation(self, op_spec):
         operation = op_spec["op"]
@@ -47,13 +58,21 @@ class Compiler(object):
             cls = self.operations[operation]
         except KeyError:
             raise Exception("unknown operation: {}".format(operation))
-        return cls.compile(self, op_spec)
+
+        compiled = cls.compile(self, op_spec)
+        lineno = getattr(op_spec, "lineno", None)
+        if lineno is not None:
+            compiled.lineno = lineno
+        return compiled
 
     def load_field(self, field_spec):
         field_type = field_spec["type"]
         cls = self.fields[field_type]
         return cls.compile(self, field_spec)
 
+    def load_function(self, name):
+        return self.functions.lookup(name)
+
     def load_validator(self, validator_spec):
         if isstr(validator_spec):
             cls = self.validators[validator_spec]
@@ -1,3 +1,5 @@
+import hashlib
+import io
 import os
 from operator import methodcaller
 
@@ -8,7 +10,7 @@ from .tags import SCULPT_TAGS
 from .resolvers import (FnResolver, IncludeResolver, IncludeRulesResolver,
                         KeysResolver, ValuesResolver, RefResolver, IRefResolver)
 from .yml import get_loader
-from .util import nested_access
+from .util import nested_access, with_info, may_have_tags
 
 
 class ResolutionError(Exception):
@@ -139,6 +141,9 @@ class ScopeProxy(Scope):
 
 
 class Resolver(object):
+    # tags resolved in sections, see README about resolution order
+    tags = (Include, Ref, IRef, Keys, Values, IncludeRules, Fn)
+
     def __init__(self, loader, irefs=None, tag_resolvers=None):
         self.loader = loader
 
@@ -182,26 +187,26 @@ class Resolver(object):
         return resolver.resolve(self, scope, tag)
 
     def resolve_dict(self, data, scope=None, allowed_tags=None, section_name=None):
-        def _recur(node, func):
+        return self.resolve_pass(data, self.tags, scope, allowed_tags, section_name)
+
+    def resolve_pass(self, data, tags, scope=None, allowed_tags=None, section_name=None):
+        # one bottom-up pass, tags nested in tags are resolved first; tag
+        # results are not walked again, they are resolved already. Dicts
+        # and lists loaded without tags inside are shared, not copied
+        func = self._filter_nodes(tags, allowed_tags, section_name)
+
+        def _recur(node):
+            if not may_have_tags(node):
+                return node
             if isinstance(node, dict):
-                return {k: _recur(v, func) for k, v in node.items()}
+                return with_info(node, {k: _recur(v) for k, v in node.items()})
             elif isinstance(node, list):
-                return [_recur(v, func) for v in node]
+                return with_info(node, [_recur(v) for v in node])
             elif isinstance(node, NestedTag):
                 node = node.delegate(func, scope)
             return func(node, scope)
 
-        data = _recur(data, self._filter_nodes(
-            Include, allowed_tags, section_name))
-        data = _recur(data, self._filter_nodes(
-            (Ref, IRef), allowed_tags, section_name))
-        data = _recur(data, self._filter_nodes(
-            (Keys, Values), allowed_tags, section_name))
-        data = _recur(data, self._filter_nodes(
-            IncludeRules, allowed_tags, section_name))
-        data = _recur(data, self._filter_nodes(
-            Fn, allowed_tags, section_name))
-        return data
+        return _recur(data)
 
     def resolve_namespace_list(self, data, scope=None, allowed_tags=None, section_name=None):
         lookup_proxy = ScopeProxy(scope)
@@ -251,12 +256,26 @@ def cls_diff(right, left):
 class Loader(object):
     def __init__(self, root_dir):
         self.root_dir = root_dir
+        # files loaded by load_path, in order, with (mtime, size) and
+        # sha256 digest of content as read, see cache
+        self.loaded_paths = []
+        self.loaded_files = []
 
     def load(self, data):
         _loader = get_loader(data)
         return _loader.get_single_data()
 
     def load_file(self, filename):
-        path = os.path.join(self.root_dir, filename)
-        with open(path) as source:
-            return self.load(source)
+        return self.load_path(os.path.join(self.root_dir, filename))
+
+    def load_path(self, path):
+        with open(path, "rb") as source:
+            stat = os.fstat(source.fileno())
+            content = source.read()
+        self.loaded_paths.append(path)
+        self.loaded_files.append((path, (stat.st_mtime, stat.st_size),
+                                  hashlib.sha256(content).digest()))
+
+        data = io.BytesIO(content)
+        data.name = path
+        return self.load(data)
@@ -1,4 +1,5 @@
 from sculpt.compat import isstr
+from ..util import with_info
 
 
 class FnResolver(object):
@@ -19,7 +20,7 @@ class FnResolver(object):
 
         def _recur(node, func):
             if isinstance(node, dict):
-                return {k: _recur(v, func) for k, v in node.items()}
+                return with_info(node, {k: _recur(v, func) for k, v in node.items()})
             elif isinstance(node, list):
                 return [_recur(v, func) for v in node]
             return func(node)
@@ -26,9 +26,8 @@ class IncludeResolver(object):
         path = os.path.join(resolver.loader.root_dir, url.netloc, path)
         path = path.rstrip("/")
 
-        with open(path) as source:
-            data = resolver.loader.load(source)
-            if url.fragment != '':
-                data = nested_get(data, url.fragment.split('.'))
+        data = resolver.loader.load_path(path)
+        if url.fragment != '':
+            data = nested_get(data, url.fragment.split('.'))
 
-            return data
+        return data
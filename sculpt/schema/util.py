@@ -6,6 +6,31 @@ class InfoDict(dict):
     def __init__(self, *args, **kwargs):
         super(InfoDict, self).__init__(*args, **kwargs)
         self.lineno = None
+        # False when loader saw no tags inside, see yml
+        self.has_tags = True
+
+
+class InfoList(list):
+    def __init__(self, *args, **kwargs):
+        super(InfoList, self).__init__(*args, **kwargs)
+        self.lineno = None
+        self.has_tags = True
+
+
+def with_info(original, container):
+    # keeps line number of rebuilt dict or list
+    if isinstance(original, InfoDict):
+        container = InfoDict(container)
+        container.lineno = original.lineno
+    elif isinstance(original, InfoList):
+        container = InfoList(container)
+        container.lineno = original.lineno
+    return container
+
+
+def may_have_tags(node):
+    # dicts and lists not built by loader may have tags
+    return getattr(node, "has_tags", True)
 
 
 def nested_access(dct, keys):
@@ -1,8 +1,13 @@
 import yaml
 from yaml.composer import Composer
 from yaml.constructor import Constructor
+from yaml.nodes import MappingNode, SequenceNode
 
-from .util import InfoDict
+from .util import InfoDict, InfoList
+
+
+MAP_TAG = "tag:yaml.org,2002:map"
+SEQ_TAG = "tag:yaml.org,2002:seq"
 
 
 def register_tag(tag_cls):
@@ -15,21 +20,62 @@ def composer_with_lineno(loader):
         line = loader.line
         node = Composer.compose_node(loader, parent, index)
         node.__lineno__ = line + 1
+        node.__has_tags__ = node_has_tags(node)
         return node
     return compose_node
 
 
+def node_has_tags(node):
+    # local tags (!ref, !include, ...) in node or nodes below it, children
+    # are composed before their parent
+    if node.tag.startswith("!"):
+        return True
+    if isinstance(node, MappingNode):
+        children = [child for pair in node.value for child in pair]
+    elif isinstance(node, SequenceNode):
+        children = node.value
+    else:
+        return False
+    return any(getattr(child, "__has_tags__", True) for child in children)
+
+
 def constructor_with_lineno(loader):
     def construct_mapping(node, deep=False):
         mapping = Constructor.construct_mapping(loader, node, deep=deep)
         mapping = InfoDict(mapping)
         mapping.lineno = node.__lineno__
+        mapping.has_tags = getattr(node, "__has_tags__", True)
         return mapping
     return construct_mapping
 
 
+def map_constructor_with_lineno(loader):
+    # yaml maps are built by construct_yaml_map, which creates plain dicts
+    def construct_yaml_map(_loader, node):
+        data = InfoDict()
+        data.lineno = node.__lineno__
+        data.has_tags = getattr(node, "__has_tags__", True)
+        yield data
+        data.update(loader.construct_mapping(node))
+    return construct_yaml_map
+
+
+def seq_constructor_with_lineno(loader):
+    def construct_yaml_seq(_loader, node):
+        data = InfoList()
+        data.lineno = node.__lineno__
+        data.has_tags = getattr(node, "__has_tags__", True)
+        yield data
+        data.extend(loader.construct_sequence(node))
+    return construct_yaml_seq
+
+
 def get_loader(data):
     loader = yaml.Loader(data)
     loader.compose_node = composer_with_lineno(loader)
     loader.construct_mapping = constructor_with_lineno(loader)
+
+    loader.yaml_constructors = dict(loader.yaml_constructors)
+    loader.yaml_constructors[MAP_TAG] = map_constructor_with_lineno(loader)
+    loader.yaml_constructors[SEQ_TAG] = seq_constructor_with_lineno(loader)
     return loader
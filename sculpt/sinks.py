@@ -0,0 +1,235 @@
+import json
+from json.encoder import encode_basestring_ascii
+
+from .fields import NESTED, Output, build_accessors
+from .operations import Copy, Apply, Delete, Each, With, Switch, Validate, flatten_operations
+from .util import MISSING
+from .validation import ValueValidator
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None  # pylint: disable=invalid-name
+
+
+# Output sinks turn output of a record into what consumer needs. When all
+# Output labels of a schema are known and none is a prefix of another, the
+# compiled plan keeps Output values in a flat list (see OutputLayout) and
+# sinks encode that list directly, no output dicts are built.
+
+
+class NotStatic(Exception):
+    pass
+
+
+class OutputLayout(object):
+    def __init__(self, labels):
+        self.labels = list(labels)
+        self.slots = {label: i for i, label in enumerate(self.labels)}
+        self.setters = [build_accessors(NESTED, label).set for label in self.labels]
+
+        # nested (key, slot or subtree) lists, in labels order
+        self.tree = []
+        nodes = {(): self.tree}
+        for slot, label in enumerate(self.labels):
+            path = Output(label).path
+            for size in range(1, len(path)):
+                if path[:size] not in nodes:
+                    subtree = nodes[path[:size]] = []
+                    nodes[path[:size - 1]].append((path[size - 1], subtree))
+            nodes[path[:-1]].append((path[-1], slot))
+
+    def new_values(self):
+        return [MISSING] * len(self.labels)
+
+    def build(self, values):
+        output = {}
+        for set_value, value in zip(self.setters, values):
+            if value is not MISSING:
+                set_value(output, value)
+        return output
+
+    def __len__(self):
+        return len(self.labels)
+
+
+def output_layout(schema):
+    # OutputLayout of schema, None when output shape is not static
+    labels = []
+    stack = [iter(schema.operations)]
+    try:
+        while stack:
+            for operation in stack[-1]:
+                stack.append(iter(_layout_operations(operation, labels)))
+                break
+            else:
+                stack.pop()
+        _check_prefixes(labels)
+    except NotStatic:
+        return None
+    return OutputLayout(labels)
+
+
+def _layout_operations(operation, labels):
+    # collects Output labels of operation, returns nested operations
+    if isinstance(operation, (Each, With)) or not hasattr(operation, "accept"):
+        # cursors are containers of output
+        raise NotStatic()
+
+    def add(field):
+        if isinstance(field, Output) and field.label not in labels:
+            labels.append(field.label)
+
+    if isinstance(operation, Copy):
+        add(operation.left)
+        add(operation.right)
+    elif isinstance(operation, Apply):
+        add(operation.field)
+    elif isinstance(operation, Delete):
+        if isinstance(operation.field, Output) and len(operation.field.path) > 1:
+            # deleted value leaves its parents
+            raise NotStatic()
+        add(operation.field)
+    elif isinstance(operation, Validate):
+        if isinstance(operation.field, Output) and \
+                not isinstance(operation.validator, ValueValidator):
+            raise NotStatic()
+        add(operation.field)
+    elif isinstance(operation, Switch):
+        for field in operation.fields:
+            add(field)
+        nested = []
+        for operations in operation.operation_table.values():
+            nested.extend(operations)
+        nested.extend(operation.default_operations or [])
+        return flatten_operations(nested)
+    elif hasattr(operation, "operations"):
+        return flatten_operations(operation.operations)
+    return ()
+
+
+def _check_prefixes(labels):
+    paths = sorted(Output(label).path for label in labels)
+    for path, next_path in zip(paths, paths[1:]):
+        if next_path[:len(path)] == path:
+            raise NotStatic()
+
+
+class DictSink(object):
+    # outputs are dicts, as without sink
+
+    # outputs are single JSON lines, only those JsonLinesPipeline can write
+    json_lines = False
+
+    def encode_dict(self, output):  # pylint: disable=no-self-use
+        return output
+
+    def encode_flat(self, layout, values):  # pylint: disable=no-self-use
+        return layout.build(values)
+
+
+_compact_dumps = json.JSONEncoder(separators=(",", ":")).encode  # pylint: disable=invalid-name
+
+
+class JsonSink(DictSink):
+    # outputs are compact JSON strings. Default dumps has fast paths for
+    # common leaves and keys, custom dumps (which must not emit newlines)
+    # encodes all of them itself
+    json_lines = True
+
+    def __init__(self, dumps=_compact_dumps):
+        self.dumps = dumps
+        if dumps is _compact_dumps:
+            self.encoders = {
+                str: encode_basestring_ascii,
+                int: int.__repr__,
+                type(None): lambda _: "null",
+            }
+            self.encode_key = encode_basestring_ascii
+        else:
+            self.encoders = {}
+            self.encode_key = dumps
+        self._keys = {}
+
+    def encode_dict(self, output):
+        return self.dumps(output)
+
+    def encode_flat(self, layout, values):
+        parts = self._object_parts(self._keyed_tree(layout), values)
+        return "{" + ",".join(parts) + "}"
+
+    def _keyed_tree(self, layout):
+        # layout tree with keys encoded once
+        try:
+            return self._keys[id(layout)][1]
+        except KeyError:
+            pass
+
+        encode_key = self.encode_key
+
+        def encode(tree):
+            return [(encode_key(key) + ":",
+                     node if isinstance(node, int) else encode(node))
+                    for key, node in tree]
+
+        tree = encode(layout.tree)
+        self._keys[id(layout)] = (layout, tree)
+        return tree
+
+    def _object_parts(self, tree, values):
+        parts = []
+        encoders, dumps = self.encoders, self.dumps
+        for key, node in tree:
+            if isinstance(node, int):
+                value = values[node]
+                if value is MISSING:
+                    continue
+                encode = encoders.get(type(value))
+                parts.append(key + (dumps(value) if encode is None else encode(value)))
+            else:
+                nested = self._object_parts(node, values)
+                if nested:
+                    parts.append(key + "{" + ",".join(nested) + "}")
+        return parts
+
+
+class MsgpackSink(DictSink):
+    # outputs are msgpack encoded bytes, requires msgpack; they are not
+    # delimited, write them with your own framing
+    def __init__(self, **packer_kwargs):
+        if msgpack is None:
+            raise ImportError("msgpack is required for MsgpackSink")
+        self.packer = msgpack.Packer(autoreset=True, **packer_kwargs)
+        self._keys = {}
+
+    def encode_dict(self, output):
+        return self.packer.pack(output)
+
+    def encode_flat(self, layout, values):
+        try:
+            tree = self._keys[id(layout)][1]
+        except KeyError:
+            tree = self._pack_keys(layout.tree)
+            self._keys[id(layout)] = (layout, tree)
+
+        parts = self._object_parts(tree, values)
+        return self.packer.pack_map_header(len(parts)) + b"".join(parts)
+
+    def _pack_keys(self, tree):
+        return [(self.packer.pack(key),
+                 node if isinstance(node, int) else self._pack_keys(node))
+                for key, node in tree]
+
+    def _object_parts(self, tree, values):
+        parts = []
+        pack = self.packer.pack
+        for key, node in tree:
+            if isinstance(node, int):
+                if values[node] is not MISSING:
+                    parts.append(key + pack(values[node]))
+            else:
+                nested = self._object_parts(node, values)
+                if nested:
+                    parts.append(key + self.packer.pack_map_header(len(nested)) +
+                                 b"".join(nested))
+        return parts
@@ -0,0 +1,122 @@
+import io
+import json
+
+from .analysis import input_projection
+from .projection import ProjectingDecoder
+
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+
+def read_jsonl(source, loads=json.loads):
+    for line in source:
+        line = line.strip()
+        if line:
+            yield loads(line)
+
+
+def write_jsonl(destination, outputs, dumps=json.dumps,
+                buffer_size=DEFAULT_BUFFER_SIZE):
+    # serialized lines are joined and written in chunks of ~buffer_size
+    # so that write calls do not dominate
+    written = 0
+    chunk = []
+    size = 0
+    for output in outputs:
+        line = dumps(output)
+        chunk.append(line)
+        size += len(line) + 1
+        if size >= buffer_size:
+            _write_chunk(destination, chunk)
+            written += len(chunk)
+            chunk = []
+            size = 0
+
+    if chunk:
+        _write_chunk(destination, chunk)
+        written += len(chunk)
+    return written
+
+
+def _encoded(output):
+    return output
+
+
+def _write_chunk(destination, chunk):
+    if isinstance(chunk[0], bytes):
+        destination.write(b"\n".join(chunk) + b"\n")
+    else:
+        destination.write((u"\n".join(chunk) + u"\n").encode("utf-8"))
+
+
+class PipelineStats(object):
+    def __init__(self):
+        self.records = 0
+        self.failed = 0
+        self.written = 0
+
+    def __repr__(self):
+        return "PipelineStats(records={}, failed={}, written={})".format(
+            self.records, self.failed, self.written)
+
+
+class JsonLinesPipeline(object):
+    # reader -> executor -> writer, all generators, so only one record and
+    # one write buffer are held in memory at a time
+    def __init__(self, executor, read_buffer_size=DEFAULT_BUFFER_SIZE,
+                 write_buffer_size=DEFAULT_BUFFER_SIZE, skip_invalid=False,
+                 on_errors=None, loads=json.loads, dumps=json.dumps,
+                 project_input=False, sink=None):
+        # sink (e.g. sinks.JsonSink) makes executor encode outputs itself,
+        # executor run_many has to accept it; outputs are written as lines,
+        # so sink has to produce JSON lines
+        if sink is not None and not getattr(sink, "json_lines", False):
+            raise ValueError("sink {} does not produce JSON lines".format(
+                sink.__class__.__name__))
+        self.executor = executor
+        self.sink = sink
+        self.read_buffer_size = read_buffer_size
+        self.write_buffer_size = write_buffer_size
+        self.skip_invalid = skip_invalid
+        self.on_errors = on_errors
+        # passthrough output starts as whole input, it is never projected
+        self.passthrough_loads = loads
+        if project_input:
+            # records keep only what schema reads
+            loads = ProjectingDecoder(input_projection(executor.root), loads).loads
+        self.loads = loads
+        self.dumps = dumps
+
+    def run(self, source, destination, **run_many_kwargs):
+        # source and destination are binary file objects
+        stats = PipelineStats()
+        loads = self.loads
+        if run_many_kwargs.get("passthrough") or run_many_kwargs.get("patch"):
+            loads = self.passthrough_loads
+        records = read_jsonl(source, loads=loads)
+        dumps = self.dumps
+        if self.sink is not None:
+            run_many_kwargs["sink"] = self.sink
+            dumps = _encoded
+
+        results = self.executor.run_many(records, **run_many_kwargs)
+        stats.written = write_jsonl(
+            destination, self._outputs(results, stats),
+            dumps=dumps, buffer_size=self.write_buffer_size)
+        return stats
+
+    def run_files(self, source_path, destination_path, **run_many_kwargs):
+        with io.open(source_path, "rb", buffering=self.read_buffer_size) as source:
+            with io.open(destination_path, "wb", buffering=self.write_buffer_size) as destination:
+                return self.run(source, destination, **run_many_kwargs)
+
+    def _outputs(self, results, stats):
+        for output, errors in results:
+            stats.records += 1
+            if errors:
+                stats.failed += 1
+                if self.on_errors is not None:
+                    self.on_errors(stats.records, errors)
+                if self.skip_invalid:
+                    continue
+            yield output
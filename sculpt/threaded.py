@@ -0,0 +1,104 @@
+from multiprocessing.pool import ThreadPool
+
+from .analysis import DependencyGraph
+from .core import Context, Executor, Result, execute_operations
+from .cow import detach_shared, own
+from .operations import Apply, ApplyError, call_batched
+
+
+# Runs independent operations of a record concurrently: top level operations
+# are split into levels of dependency graph, Apply functions of one level
+# are called on a thread pool while other operations of the level run in
+# caller thread. Fields are only read and written by caller thread, so Apply
+# functions should be thread safe, that is all. Worth it when functions
+# wait (network, disk); Output keys order may differ from Executor.
+
+
+class Level(object):
+    def __init__(self, applies, others):
+        self.applies = applies
+        self.others = others
+
+
+class ThreadedExecutor(object):
+    def __init__(self, schema, threads=8):
+        self.root = Executor(schema).root
+        self.graph = DependencyGraph(self.root.operations)
+        self.levels = self.build_levels(self.graph)
+        self.threads = threads
+        self._pool = None
+
+    @staticmethod
+    def build_levels(graph):
+        levels = []
+        for indexes in graph.levels():
+            operations = [graph.operations[i] for i in indexes]
+            applies = [op for op in operations if isinstance(op, Apply)]
+            if len(operations) < 2 or not applies:
+                # nothing to overlap, run as is
+                levels.append(Level([], operations))
+            else:
+                others = [op for op in operations if not isinstance(op, Apply)]
+                levels.append(Level(applies, others))
+        return levels
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ThreadPool(self.threads)
+        return self._pool
+
+    def run(self, context):
+        for level in self.levels:
+            if level.applies:
+                self.run_level(context, level)
+            else:
+                execute_operations(context, level.others)
+        return context
+
+    def run_level(self, context, level):
+        pool = self.pool
+        pending = []
+        for operation in level.applies:
+            value = operation.field.get(context)
+            if context.passthrough:
+                value = detach_shared(value, context.owned)
+            if operation.batched:
+                args = (call_batched, (operation.function, value))
+            else:
+                args = (operation.function, (value,))
+            pending.append(pool.apply_async(*args))
+
+        execute_operations(context, level.others)
+
+        # results are set in schema order, first failed Apply raises
+        for operation, result in zip(level.applies, pending):
+            try:
+                value = result.get()
+            except Exception as e:
+                raise ApplyError("apply error in {}".format(operation.field.label),
+                                 operation.field, operation.function, e)
+            if context.passthrough:
+                own(context.owned, value)
+            operation.field.set(context, value)
+
+    def run_many(self, inputs):
+        for _input in inputs:
+            context = self.run(Context(_input))
+            yield Result(context.output(), context.errors)
+
+    def map(self, inputs):
+        for result in self.run_many(inputs):
+            yield result.output
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _exc_type, _exc_value, _traceback):
+        self.close()
@@ -1,6 +1,9 @@
+import collections
 from operator import getitem
 from functools import reduce # pylint: disable=redefined-builtin
 
+from .compat import MutableMapping
+
 try:
     # Python 3
     from itertools import zip_longest #pylint: disable=unused-import
@@ -9,6 +12,18 @@ except ImportError:
     from itertools import izip_longest as zip_longest #pylint: disable=unused-import
 
 
+class _Missing(object):
+    def __repr__(self):
+        return "MISSING"
+
+    def __reduce__(self):
+        return "MISSING"
+
+
+# returned by lookups for fields which do not exist
+MISSING = _Missing()
+
+
 class classproperty(object):
 
     def __init__(self, fget):
@@ -18,6 +33,29 @@ class classproperty(object):
         return self.fget(owner_cls)
 
 
+class LRUCache(object):
+    # mapping which keeps at most size recently used items
+    def __init__(self, size):
+        self.size = size
+        self.items = collections.OrderedDict()
+
+    def __getitem__(self, key):
+        # moved to end as most recently used
+        value = self.items.pop(key)
+        self.items[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        items = self.items
+        items.pop(key, None)
+        items[key] = value
+        while len(items) > self.size:
+            items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+
 def _nested_access(dct, keys):
     try:
         return reduce(getitem, keys, dct), True
@@ -42,7 +80,7 @@ def nested_delete(dct, keys):
     parent_path = keys[:-1]
     key = keys[-1]
     target = nested_get(dct, parent_path)
-    if isinstance(target, dict):
+    if isinstance(target, MutableMapping):
         try:
             del target[key]
         except KeyError:
@@ -50,9 +88,151 @@ def nested_delete(dct, keys):
 
 
 def nested_set(dct, keys, value):
-    leaf = reduce(lambda d, k: d.setdefault(k, {}), keys[:-1], dct)
-    leaf[keys[-1]] = value
+    for key in keys[:-1]:
+        dct = dct.setdefault(key, {})
+    dct[keys[-1]] = value
 
 
 def split_label(label):
     return label.split(".")
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def nested_getter(keys):
+    keys = tuple(keys)
+    if len(keys) == 1:
+        key, = keys
+
+        def get(dct):
+            try:
+                return dct[key]
+            except KeyError:
+                return None
+    elif len(keys) == 2:
+        key_0, key_1 = keys
+
+        def get(dct):
+            try:
+                return dct[key_0][key_1]
+            except KeyError:
+                return None
+    else:
+        def get(dct):
+            try:
+                for key in keys:
+                    dct = dct[key]
+                return dct
+            except KeyError:
+                return None
+    return get
+
+
+def nested_checker(keys):
+    keys = tuple(keys)
+    if len(keys) == 1:
+        key, = keys
+
+        def has(dct):
+            try:
+                dct[key]  # pylint: disable=pointless-statement
+                return True
+            except KeyError:
+                return False
+    elif len(keys) == 2:
+        key_0, key_1 = keys
+
+        def has(dct):
+            try:
+                dct[key_0][key_1]  # pylint: disable=pointless-statement
+                return True
+            except KeyError:
+                return False
+    else:
+        def has(dct):
+            try:
+                for key in keys:
+                    dct = dct[key]
+                return True
+            except KeyError:
+                return False
+    return has
+
+
+def nested_lookup(keys):
+    keys = tuple(keys)
+    if len(keys) == 1:
+        key, = keys
+
+        def lookup(dct):
+            try:
+                return dct[key]
+            except KeyError:
+                return MISSING
+    elif len(keys) == 2:
+        key_0, key_1 = keys
+
+        def lookup(dct):
+            try:
+                return dct[key_0][key_1]
+            except KeyError:
+                return MISSING
+    else:
+        def lookup(dct):
+            try:
+                for key in keys:
+                    dct = dct[key]
+                return dct
+            except KeyError:
+                return MISSING
+    return lookup
+
+
+def nested_setter(keys):
+    keys = tuple(keys)
+    if len(keys) == 1:
+        key, = keys
+
+        def set_(dct, value):
+            dct[key] = value
+    elif len(keys) == 2:
+        key_0, key_1 = keys
+
+        def set_(dct, value):
+            dct.setdefault(key_0, {})[key_1] = value
+    else:
+        parent_keys, key = keys[:-1], keys[-1]
+
+        def set_(dct, value):
+            for parent_key in parent_keys:
+                dct = dct.setdefault(parent_key, {})
+            dct[key] = value
+    return set_
+
+
+def nested_deleter(keys):
+    keys = tuple(keys)
+    key = keys[-1]
+    if len(keys) == 1:
+        def get_parent(dct):
+            return dct
+    else:
+        get_parent = nested_getter(keys[:-1])
+
+    def delete(dct):
+        target = get_parent(dct)
+        if isinstance(target, MutableMapping):
+            try:
+                del target[key]
+            except KeyError:
+                pass
+    return delete
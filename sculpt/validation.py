@@ -1,11 +1,23 @@
 
+from .util import MISSING
+
+
 class ValidationError(Exception):
     def __init__(self, message, **kwargs):
         super(ValidationError, self).__init__(message)
         self.kwargs = kwargs
 
+    def __reduce__(self):
+        return (_restore_validation_error, (self.__class__, self.args, self.kwargs))
+
+
+def _restore_validation_error(cls, args, kwargs):
+    return cls(*args, **kwargs)
+
 
 class BaseValidator(object):
+    __slots__ = ()
+
     def _validate(self, context, field):
         self.validate(context, field)
 
@@ -13,13 +25,25 @@ class BaseValidator(object):
         raise NotImplementedError
 
 
-class NotEmptyValidator(BaseValidator):
+class ValueValidator(BaseValidator):
+    # validators which need only field value, looked up once
+    __slots__ = ()
+
+    def validate(self, context, field):
+        self.validate_value(field, field.existing(context))
+
+    def validate_value(self, field, value):
+        raise NotImplementedError
+
+
+class NotEmptyValidator(ValueValidator):
+    __slots__ = ("error_kwargs",)
+
     def __init__(self, **error_kwargs):
         self.error_kwargs = error_kwargs
 
-    def validate(self, context, field):
-        exists = field.has(context)
-        if exists is False:
+    def validate_value(self, field, value):
+        if value is MISSING:
             error_kwargs = {
                 "label": field.label,
                 "section": field.section
@@ -30,15 +54,16 @@ class NotEmptyValidator(BaseValidator):
                     field.section, field.label), **error_kwargs)
 
 
-class InSetValidator(BaseValidator):
+class InSetValidator(ValueValidator):
+    __slots__ = ("values", "allow_none", "error_kwargs")
+
     def __init__(self, values=None, allow_none=False, **error_kwargs):
         self.values = set(values)
         self.allow_none = allow_none
         self.error_kwargs = error_kwargs
 
-    def validate(self, context, field):
-        exists = field.has(context)
-        value = field.get(context)
+    def validate_value(self, field, value):
+        exists = value is not MISSING
 
         if not exists and self.allow_none:
             return
@@ -0,0 +1,32 @@
+import asyncio
+
+
+# Python 3 only parts of test_aio, it imports them behind its guard, so
+# that it stays importable on Python 2
+
+
+class Records(object):
+    def __init__(self):
+        self.started = []
+        self.cancelled = []
+
+    async def slow(self, value, delay=10):
+        self.started.append(value)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(value)
+            raise
+        return value
+
+    async def short(self, value):
+        return await self.slow(value, delay=0.05)
+
+    @staticmethod
+    async def fail(value):
+        await asyncio.sleep(0)
+        raise ValueError(value)
+
+
+async def run_twice(executor, inputs):
+    return await asyncio.gather(executor.gather(inputs), executor.gather(inputs))
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from sculpt.core import Context, Executor
+from sculpt.schema import Loader, Resolver
+from sculpt.schema.cache import RulesCache
+
+
+PARENT = """id: parent
+variables:
+  names: !include 'file://names.yml'
+rules:
+- op: copy
+  left: {type: input, key: !ref names.source}
+  right: {type: output, key: !ref names.target}
+"""
+
+
+class CountingLoader(Loader):
+    def __init__(self, root_dir):
+        super(CountingLoader, self).__init__(root_dir)
+        self.parsed = 0
+
+    def load(self, data):
+        self.parsed += 1
+        return super(CountingLoader, self).load(data)
+
+
+class TestRulesCache(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.cache = RulesCache(os.path.join(self.root, "cache"))
+        self.write("parent.yml", PARENT)
+        self.write("names.yml", "source: a\ntarget: b\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), "w") as f:
+            f.write(text)
+
+    def load(self):
+        loader = CountingLoader(self.root)
+        schema = self.cache.load_schema(loader, "parent.yml")
+        return loader.parsed, Executor(schema).run(Context({"a": 1})).output()
+
+    def test_warm_start(self):
+        self.assertEqual((2, {"b": 1}), self.load())
+        # no YAML is parsed
+        self.assertEqual((0, {"b": 1}), self.load())
+
+    def test_manifest(self):
+        loader = Loader(self.root)
+        self.cache.load_rules(loader, "parent.yml")
+        self.assertEqual([os.path.join(self.root, "parent.yml"),
+                          os.path.join(self.root, "names.yml")], loader.loaded_paths)
+
+    def test_invalidation(self):
+        self.load()
+        # included file changed
+        self.write("names.yml", "source: a\ntarget: c\n")
+        self.assertEqual((2, {"c": 1}), self.load())
+        self.assertEqual((0, {"c": 1}), self.load())
+
+        # same content with new mtime
+        path = os.path.join(self.root, "names.yml")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        self.assertEqual((0, {"c": 1}), self.load())
+
+    def test_file_changed_while_resolving(self):
+        root = self.root
+
+        class ChangingLoader(CountingLoader):
+            def load(self, data):
+                if data.name.endswith("names.yml"):
+                    with open(os.path.join(root, "names.yml"), "w") as f:
+                        f.write("source: a\ntarget: changed\n")
+                return super(ChangingLoader, self).load(data)
+
+        schema = self.cache.load_schema(ChangingLoader(self.root), "parent.yml")
+        self.assertEqual({"b": 1}, Executor(schema).run(Context({"a": 1})).output())
+        # entry is of content read, not of what is on disk after it
+        self.assertEqual((2, {"changed": 1}), self.load())
+
+    def test_irefs_key(self):
+        self.write("parent.yml", PARENT.replace("!ref names.target", "!iref target"))
+
+        def load(target):
+            loader = CountingLoader(self.root)
+            resolver = Resolver(loader, irefs={"target": target})
+            schema = self.cache.load_schema(loader, "parent.yml", resolver)
+            return loader.parsed, Executor(schema).run(Context({"a": 1})).output()
+
+        self.assertEqual((2, {"b": 1}), load("b"))
+        self.assertEqual((2, {"c": 1}), load("c"))
+        self.assertEqual((0, {"b": 1}), load("b"))
+        self.assertEqual((0, {"c": 1}), load("c"))
+
+    def test_keys_and_broken_entries(self):
+        loader = Loader(self.root)
+        self.cache.load_rules(loader, "parent.yml")
+        entry_path = self.cache.entry_path(os.path.join(self.root, "parent.yml"))
+        self.assertNotEqual(entry_path, self.cache.entry_path(
+            os.path.join(self.root, "parent.yml"), key="other"))
+
+        with open(entry_path, "wb") as f:
+            f.write(b"broken")
+        self.assertEqual((2, {"b": 1}), self.load())
+
+    def test_not_picklable(self):
+        self.write("parent.yml", PARENT.replace("!ref names.target", "b") + """- op: apply
+  field: {type: output, key: b}
+  func: !iref double
+""")
+        loader = Loader(self.root)
+        resolver = Resolver(loader, irefs={"double": lambda value: value * 2})
+        rules = self.cache.load_rules(loader, "parent.yml", resolver)
+        self.assertEqual(2, len(rules))
+        self.assertFalse(os.path.exists(
+            self.cache.entry_path(os.path.join(self.root, "parent.yml"))))
@@ -53,3 +53,31 @@ class TestCompiler(unittest.TestCase):
 def get_parent_category(value):
     int_val = int(value)
     return int_val // 1000 * 1000
+
+
+class TestCompilerSpecs(unittest.TestCase):
+    def test_batched_apply(self):
+        schema = Compiler().compile([{
+            "op": "apply",
+            "field": {"type": "output", "key": "name"},
+            "func": lambda values: [len(values)],
+            "batched": True,
+        }])
+
+        from sculpt.core import Executor, Context
+        context = Executor(schema).run(Context({}))
+        self.assertTrue(schema.operations[0].batched)
+        self.assertEqual({"name": 1}, context.output())
+
+    def test_lineno(self):
+        loader = Loader(os.path.join(CASES_DIR, "compiler"))
+        data = loader.load_file("parent.yml")
+        out = Resolver(loader, irefs={"get_parent_category": get_parent_category}).resolve(data)
+        schema = Compiler().compile(out.rules.data)
+
+        # operations remember lines of their rules
+        self.assertEqual(23, schema.operations[0].lineno)
+        self.assertEqual(26, schema.operations[1].lineno)
+        self.assertIsNone(getattr(Compiler().compile([{
+            "op": "delete", "field": {"type": "output", "key": "a"},
+        }]).operations[0], "lineno", None))
@@ -144,3 +144,32 @@ class TestResolver(unittest.TestCase):
         }]
 
         self.assertEqual(expect, out.rules.data)
+
+    def test_tag_free_subtrees(self):
+        loader = Loader(os.path.join(CASES_DIR, "references"))
+        data = loader.load("""
+id: parent
+variables:
+  plain: {a: [1, {b: 2}]}
+  names: {source: a}
+rules:
+- op: copy
+  left: {type: input, key: !ref names.source}
+  right: {type: output, key: b}
+- op: delete
+  field: {type: output, key: c}
+""")
+        self.assertFalse(data["variables"].has_tags)
+        self.assertTrue(data["rules"].has_tags)
+        self.assertTrue(data["rules"][0].has_tags)
+        self.assertFalse(data["rules"][0]["right"].has_tags)
+        self.assertFalse(data["rules"][1].has_tags)
+        self.assertEqual(10, data["rules"][1].lineno)
+
+        out = Resolver(loader).resolve(data)
+        self.assertEqual({"type": "input", "key": "a"}, out.rules.data[0]["left"])
+        # dicts without tags are shared
+        self.assertIs(data["rules"][1], out.rules.data[1])
+        self.assertIs(data["rules"][0]["right"], out.rules.data[0]["right"])
+        self.assertIsNot(data["rules"][0], out.rules.data[0])
+        self.assertEqual(7, out.rules.data[0].lineno)
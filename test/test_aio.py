@@ -0,0 +1,160 @@
+import unittest
+
+from sculpt.core import Executor, Context
+from sculpt.fields import Input, Output
+from sculpt.operations import Copy, Apply, Each, With, Combine, Switch
+
+try:
+    import asyncio
+    from sculpt import aio
+    from unittest import mock
+    try:
+        from . import aio_helpers
+    except ImportError:
+        # unittest discover imports tests as top level modules
+        import aio_helpers
+except (ImportError, SyntaxError):
+    aio = None
+
+
+class Tracker(object):
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def double(self, value):
+        # returns awaitable, same as coroutine function would
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        delay = 0.001 * (value % 3) if value else 0
+
+        def done(_future):
+            self.in_flight -= 1
+
+        future = asyncio.ensure_future(asyncio.sleep(delay, result=value * 2))
+        future.add_done_callback(done)
+        return future
+
+
+def make_schema(tracker):
+    return [
+        Copy(Input("value"), Output("value")),
+        Combine(Apply(Output("value"), tracker.double)),
+        Each(Input("items"), Output("items"), [
+            Copy(Input("id"), Output("id")),
+            Apply(Output("id"), tracker.double),
+        ]),
+        With(Input("nested"), Output("nested"), [
+            Switch(Input("kind")).case(["a"], [
+                Copy(Input("id"), Output("id")),
+                Apply(Output("id"), tracker.double),
+            ]),
+        ]),
+    ]
+
+
+def make_input(i):
+    return {"value": i, "items": [{"id": i}, {"id": i + 1}],
+            "nested": {"kind": "a", "id": i}}
+
+
+def expected_output(i):
+    return {"value": i * 2, "items": [{"id": i * 2}, {"id": (i + 1) * 2}],
+            "nested": {"id": i * 2}}
+
+
+@unittest.skipIf(aio is None, "asyncio is not available")
+class TestAsyncExecutor(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_run(self):
+        executor = aio.AsyncExecutor(make_schema(Tracker()))
+        context = self.loop.run_until_complete(executor.run(Context(make_input(1))))
+        self.assertEqual(expected_output(1), context.output())
+
+    def test_run_many_ordered(self):
+        tracker = Tracker()
+        executor = aio.AsyncExecutor(make_schema(tracker), concurrency=4)
+
+        results = self.loop.run_until_complete(
+            executor.gather([make_input(i) for i in range(20)]))
+
+        self.assertEqual([expected_output(i) for i in range(20)],
+                         [result.output for result in results])
+        self.assertLessEqual(tracker.max_in_flight, 4)
+        self.assertGreater(tracker.max_in_flight, 1)
+
+    def test_run_many_unordered(self):
+        executor = aio.AsyncExecutor(make_schema(Tracker()), concurrency=3)
+
+        results = self.loop.run_until_complete(
+            executor.gather((make_input(i) for i in range(10)), ordered=False))
+
+        self.assertEqual(sorted(r.output["value"] for r in results),
+                         [expected_output(i)["value"] for i in range(10)])
+
+    def test_sync_operations(self):
+        schema = [Copy(Input("value"), Output("value")),
+                  Apply(Output("value"), lambda value: value + 1)]
+
+        expected = Executor(schema).run(Context({"value": 1})).output()
+        context = Context({"value": 1})
+        self.loop.run_until_complete(aio.execute_operations_async(context, schema))
+        self.assertEqual(expected, context.output())
+
+    def test_batched_apply(self):
+        def double_all(values):
+            return asyncio.sleep(0, result=[value * 2 for value in values])
+
+        schema = [Copy(Input("value"), Output("value")),
+                  Apply(Output("value"), double_all, batched=True)]
+        executor = aio.AsyncExecutor(schema)
+        results = self.loop.run_until_complete(executor.gather([{"value": 1}]))
+        self.assertEqual({"value": 2}, results[0].output)
+
+    def test_failed_record_cancels_pending(self):
+        records = aio_helpers.Records()
+        schema = [Switch(Input("kind"))
+                  .case(["slow"], [Apply(Output("value"), records.slow)])
+                  .case(["fail"], [Apply(Output("value"), records.fail)])]
+        inputs = [{"kind": "slow"}] * 3 + [{"kind": "fail"}]
+        for ordered in (True, False):
+            del records.started[:], records.cancelled[:]
+            executor = aio.AsyncExecutor(schema, concurrency=4)
+            with self.assertRaises(aio.ApplyError):
+                self.loop.run_until_complete(executor.gather(inputs, ordered))
+            self.assertEqual(3, len(records.started))
+            self.assertEqual(3, len(records.cancelled))
+
+    def test_ordered_waits_for_slow_head(self):
+        records = aio_helpers.Records()
+        schema = [Switch(Input("kind"))
+                  .case(["short"], [Apply(Output("value"), records.short)])
+                  .default([Copy(Input("kind"), Output("value"))])]
+        inputs = [{"kind": "short"}] + [{"kind": "fast"}] * 3
+
+        waits = []
+        wait = asyncio.wait
+
+        def counting_wait(*args, **kwargs):
+            waits.append(args)
+            return wait(*args, **kwargs)
+
+        executor = aio.AsyncExecutor(schema, concurrency=4)
+        with mock.patch.object(aio.asyncio, "wait", counting_wait):
+            results = self.loop.run_until_complete(executor.gather(inputs))
+        self.assertEqual([None, "fast", "fast", "fast"], [r.output["value"] for r in results])
+        # finished tasks do not wake waiting for head up
+        self.assertLess(len(waits), 10)
+
+    def test_run_many_on_other_loops(self):
+        executor = aio.AsyncExecutor(make_schema(Tracker()), concurrency=1)
+        inputs = [make_input(i) for i in range(4)]
+
+        for loop in (self.loop, asyncio.new_event_loop()):
+            self.addCleanup(loop.close)
+            for results in loop.run_until_complete(aio_helpers.run_twice(executor, inputs)):
+                self.assertEqual([expected_output(i) for i in range(4)],
+                                 [result.output for result in results])
@@ -0,0 +1,143 @@
+import copy
+import unittest
+
+from sculpt.columnar import ColumnarExecutor, NotColumnar, numpy
+from sculpt.core import Executor, Context
+from sculpt.fields import Input, Output, VirtualVar, VirtualList
+from sculpt.operations import (Copy, Apply, Delete, Combine, Switch, Validate,
+                               Each, ApplyError)
+from sculpt.util import MISSING
+from sculpt.validation import NotEmptyValidator, InSetValidator
+
+
+def make_inputs(count=20):
+    inputs = []
+    for i in range(count):
+        record = {"id": i, "kind": "abc"[i % 3], "price": {"amount": i * 10}}
+        if i % 4:
+            record["name"] = "name-{}".format(i)
+        inputs.append(record)
+    return inputs
+
+
+def make_schema():
+    return [
+        Copy(Input("id"), Output("id")),
+        Copy(Input("name"), VirtualVar("name")),
+        Apply(VirtualVar("name"), lambda name: name.upper() if name else name),
+        Copy(VirtualVar("name"), Output("person.name")),
+        Combine(
+            Copy(Input("price.amount"), Output("price.amount")),
+            Apply(Output("price.amount"), lambda amount: amount * 2),
+        ),
+        Switch(Input("kind"), Input("id"))
+        .case(["a", 0], [Copy(Input("id"), Output("first"))])
+        .default([
+            Switch(Input("kind"))
+            .case(["b"], [
+                Copy(Input("kind"), Output("b.kind")),
+                Delete(Output("price.amount")),
+            ])
+            .default([Validate(Input("name"), NotEmptyValidator())]),
+        ]),
+        Validate(Output("id"), InSetValidator(range(10))),
+    ]
+
+
+class TestColumnarExecutor(unittest.TestCase):
+    def assert_same_as_rows(self, schema, inputs):
+        expected = list(Executor(schema).run_many(copy.deepcopy(inputs)))
+        results = list(ColumnarExecutor(schema).run_many(inputs, batch_size=7))
+
+        self.assertEqual([r.output for r in expected], [r.output for r in results])
+        self.assertEqual([[str(e) for e in r.errors] for r in expected],
+                         [[str(e) for e in r.errors] for r in results])
+        return results
+
+    def test_columnar(self):
+        self.assertTrue(ColumnarExecutor(make_schema()).columnar)
+        results = self.assert_same_as_rows(make_schema(), make_inputs())
+        self.assertEqual({}, results[1].output["price"])
+
+    def test_columns(self):
+        batch = ColumnarExecutor(make_schema()).run_batch(make_inputs(3))
+        columns = batch.columns()
+
+        self.assertEqual([0, 1, 2], columns["id"])
+        self.assertEqual([0, MISSING, 40], columns["price.amount"])
+        self.assertEqual(3, len(batch.errors))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_arrays(self):
+        batch = ColumnarExecutor(make_schema()).run_batch(make_inputs(3))
+        arrays = batch.arrays()
+
+        self.assertEqual([0, 1, 2], list(arrays["id"]))
+        self.assertEqual([False, True, True], list(arrays["first"].mask))
+
+    def test_fallback(self):
+        schemas = [
+            [Each(Input("items"), Output("items"), [])],
+            [Copy(Input("id"), VirtualList("ids").append())],
+            [Copy(Input("id"), Output("a")), Copy(Input("id"), Output("a.b"))],
+            [Apply(Input("id"), str)],
+        ]
+        for schema in schemas:
+            executor = ColumnarExecutor(schema)
+            self.assertFalse(executor.columnar)
+            with self.assertRaises(NotColumnar):
+                executor.run_batch([{}])
+
+        self.assert_same_as_rows(
+            [Each(Input("items"), Output("items"), [Copy(Input("id"), Output("id"))])],
+            [{"items": [{"id": 1}]}, {"items": []}])
+
+    def test_apply_error(self):
+        executor = ColumnarExecutor([Apply(Output("a"), lambda value: value + 1)])
+        with self.assertRaises(ApplyError):
+            executor.run_batch([{}])
+
+
+class TestBatchedApply(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def upper(self, values):
+        self.calls.append(len(values))
+        return [value.upper() if value is not None else None for value in values]
+
+    def make_schema(self):
+        return [
+            Copy(Input("name"), Output("name")),
+            Apply(Output("name"), self.upper, batched=True),
+            Switch(Input("kind")).case(["a"], [
+                Copy(Input("name"), Output("a_name")),
+                Apply(Output("a_name"), self.upper, batched=True),
+            ]),
+        ]
+
+    def test_batched_columnar(self):
+        inputs = [{"name": "x", "kind": "a"}, {"kind": "b"}, {"name": "z", "kind": "a"}]
+        results = list(ColumnarExecutor(self.make_schema()).run_many(inputs))
+
+        self.assertEqual([{"name": "X", "a_name": "X"}, {"name": None},
+                          {"name": "Z", "a_name": "Z"}],
+                         [result.output for result in results])
+        self.assertEqual([3, 2], self.calls)
+
+    def test_batched_rows(self):
+        inputs = [{"name": "x", "kind": "a"}, {"kind": "b"}]
+        executor = Executor(self.make_schema())
+        expected = [{"name": "X", "a_name": "X"}, {"name": None}]
+
+        self.assertEqual(expected, list(executor.map(copy.deepcopy(inputs))))
+        self.assertEqual(expected, [executor.run(Context(i)).output()
+                                    for i in copy.deepcopy(inputs)])
+        self.assertEqual([1] * 6, self.calls)
+
+    def test_batched_length_mismatch(self):
+        schema = [Apply(Output("a"), lambda values: values + values, batched=True)]
+        with self.assertRaises(ApplyError):
+            ColumnarExecutor(schema).run_batch([{}, {}])
+        with self.assertRaises(ApplyError):
+            Executor(schema).run(Context({}))
@@ -0,0 +1,151 @@
+from __future__ import absolute_import
+import copy
+import unittest
+
+from sculpt.core import Context, Executor
+from sculpt.compiled import CompiledSchema
+from sculpt.operations import (Copy, Each, With, Validate, Combine, Delete,
+                               Switch, Apply, ApplyError)
+from sculpt.fields import Input, Output, VirtualVar, VirtualList, Virtual
+from sculpt.primitives import FieldSelect
+from sculpt.validation import NotEmptyValidator, InSetValidator
+
+
+DOCUMENT = {
+    "category": "cars",
+    "person": {
+        "name": "Aaron",
+        "age": 56,
+    },
+    "items": [{
+        "year": 1987,
+        "count": 145
+    }, {
+        "year": 1992,
+        "count": 178
+    }],
+    "event": {
+        "object": {
+            "items": [{"year": 2001}]
+        }
+    },
+}
+
+
+def run_both(test_case, operations, document):
+    executor = Executor(operations)
+
+    interpreted = executor.run(Context(copy.deepcopy(document)))
+    compiled = executor.compile().run(Context(copy.deepcopy(document)))
+
+    test_case.assertEqual(interpreted.stores, compiled.stores)
+    test_case.assertEqual([str(e) for e in interpreted.errors],
+                          [str(e) for e in compiled.errors])
+    return compiled
+
+
+class TestCompiledSchema(unittest.TestCase):
+    def test_compile(self):
+        compiled = Executor([Copy(Input("person"), Output("p"))]).compile()
+        self.assertIsInstance(compiled, CompiledSchema)
+
+    def test_copy(self):
+        context = run_both(self, [
+            Copy(Input("person.name"), Output("name")),
+            Copy(Input("person.missing"), Output("missing")),
+            Copy(Input("person"), Output("deep.nested.person")),
+            Copy(Output("name"), VirtualVar("name")),
+            Copy(VirtualVar("name"), Output("name_1")),
+        ], DOCUMENT)
+
+        self.assertEqual("Aaron", context.output()["name_1"])
+        self.assertNotIn("missing", context.output())
+
+    def test_apply_and_delete(self):
+        run_both(self, [
+            Copy(Input("person.age"), Output("age")),
+            Apply(Output("age"), lambda age: age + 1),
+            Copy(Input("person"), Output("person")),
+            Delete(Output("person.name")),
+            Delete(Output("person.missing.key")),
+            Delete(VirtualVar("missing")),
+        ], DOCUMENT)
+
+    def test_apply_error(self):
+        def fail(_value):
+            raise RuntimeError("boom")
+
+        compiled = Executor([Apply(Output("age"), fail)]).compile()
+        with self.assertRaises(ApplyError):
+            compiled.run(Context({}))
+
+    def test_combine(self):
+        run_both(self, [
+            Combine(
+                Copy(Input("person.age"), Output("age")),
+                Combine(Copy(Input("person.name"), Output("name"))),
+            ),
+            Copy(Output("name"), Output("name_1")),
+        ], DOCUMENT)
+
+    def test_switch(self):
+        cars = Switch(Input("category")).case(["cars"], [
+            Copy(Input("person.name"), Output("car_owner")),
+        ])
+        for category in ("cars", "real_estate"):
+            document = dict(DOCUMENT, category=category)
+            run_both(self, [
+                Switch(Input("category"))
+                .merge(cars)
+                .case(["real_estate"], [
+                    Copy(Input("person.age"), Output("age"))
+                ])
+                .default([Copy(Input("category"), Output("unknown"))]),
+                Switch(Input("category"), Input("person.age"))
+                .case(["cars", 56], [
+                    Copy(Input("person.age"), Output("car_age"))
+                ]),
+            ], document)
+
+    def test_switch_unhashable_and_stats(self):
+        switch = (
+            Switch(Input("items"))
+            .case([None], [])
+            .default([Copy(Input("category"), Output("unknown"))])
+            .enable_stats()
+        )
+        run_both(self, [switch], DOCUMENT)
+        self.assertEqual({None: 2}, switch.stats())
+
+    def test_each_and_with(self):
+        context = run_both(self, [
+            Each(Input("items"), Output("counts"), [
+                Copy(Input("year"), Output("y")),
+                Copy(Input("count"), Output("signed.count")),
+                Copy(Input("count"), VirtualList("avg.count").append()),
+            ]),
+            With(Input("event.object"), Output("data.output"), [
+                Each(Input("items"), Output("years"), [
+                    Copy(Input("year"), Output("y")),
+                ])
+            ]),
+            Copy(VirtualList("avg.count"), Output("avg")),
+        ], DOCUMENT)
+
+        self.assertEqual([145, 178], context.stores[Virtual.section]["avg.count"])
+
+    def test_validate(self):
+        context = run_both(self, [
+            Validate(Input("person.name"), NotEmptyValidator()),
+            Validate(Input("person.missing"), NotEmptyValidator()),
+            Validate(Input("person.age"), InSetValidator([1, 2])),
+        ], DOCUMENT)
+
+        self.assertEqual(2, len(context.errors))
+
+    def test_fallback_to_interpreter(self):
+        context = run_both(self, [
+            FieldSelect(Input("items"), "year", Output("years")),
+        ], DOCUMENT)
+
+        self.assertEqual([1987, 1992], context.output()["years"])
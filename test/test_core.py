@@ -4,6 +4,7 @@ import unittest
 from sculpt.core import Context, Executor, Schema
 from sculpt.operations import Copy, Each, With, Validate, Combine, Delete, Switch
 from sculpt.fields import Input, Output, VirtualVar, VirtualList, Virtual
+from sculpt.validation import NotEmptyValidator
 
 
 class TestElement(unittest.TestCase):
@@ -64,6 +65,21 @@ class TestCopy(unittest.TestCase):
         }
         self.assertDictEqual(output, context.stores[Output.section])
 
+    def test_copy_existing_none(self):
+        context = Context({
+            "person": {
+                "name": None
+            }
+        })
+
+        executor = Executor([
+            Copy(Input("person.name"), Output("name")),
+        ])
+
+        executor.run(context)
+
+        self.assertDictEqual({"name": None}, context.stores[Output.section])
+
     def test_input_raises_on_assing_at_init_time(self):
         with self.assertRaisesRegexp(ValueError, "set operation not allowed on Input"):
             Executor([
@@ -222,6 +238,41 @@ class TestModifiers(unittest.TestCase):
         self.assertDictEqual(output, context.stores[Output.section])
 
 
+class TestNesting(unittest.TestCase):
+    DEPTH = 5000
+
+    def test_deep_combine(self):
+        operation = Copy(Input("value"), Output("value"))
+        for _ in range(self.DEPTH):
+            operation = Combine(operation, Combine())
+
+        expected = {"value": 1}
+        executor = Executor([operation])
+        self.assertDictEqual(expected, executor.run(Context({"value": 1})).output())
+        self.assertDictEqual(expected, executor.compile().run(Context({"value": 1})).output())
+        self.assertEqual(1, len(operation.flat_operations))
+
+    def test_deep_switch(self):
+        operation = Copy(Input("value"), Output("value"))
+        for _ in range(self.DEPTH):
+            operation = Switch(Input("kind")).case(["a"], [operation])
+
+        executor = Executor([operation])
+        context = executor.run(Context({"kind": "a", "value": 1}))
+        self.assertDictEqual({"value": 1}, context.output())
+
+        # compiled plan of run_many
+        records = [{"kind": "a", "value": 1}, {"kind": "b", "value": 2}]
+        self.assertEqual([{"value": 1}, {}], list(executor.map(records)))
+
+    def test_deep_switch_with_combines(self):
+        operation = Copy(Input("value"), Output("value"))
+        for _ in range(self.DEPTH):
+            operation = Combine(Switch(Input("kind")).case(["a"], [operation]).default([]))
+
+        self.assertEqual([{"value": 1}], list(Executor([operation]).map([{"kind": "a", "value": 1}])))
+
+
 class TestSwitch(unittest.TestCase):
     def test_switch_case(self):
         context = Context({
@@ -357,3 +408,93 @@ class TestSwitch(unittest.TestCase):
         executor.run(context)
 
         self.assertDictEqual({}, context.stores[Output.section])
+
+    def test_switch_unhashable_value(self):
+        switch = (
+            Switch(Input("category"))
+            .case(["cars"], [Copy(Input("wheel"), Output("wheel"))])
+            .default([Copy(Input("category"), Output("category"))])
+        )
+
+        context = Context({"category": ["cars"], "wheel": 12})
+        Executor([switch]).run(context)
+        self.assertDictEqual({"category": ["cars"]}, context.output())
+
+        with self.assertRaises(TypeError):
+            switch.case([["cars"]], [])
+
+    def test_switch_case_override(self):
+        switch = (
+            Switch(Input("category"))
+            .case(["cars"], [Copy(Input("wheel"), Output("wheel"))])
+            .case(["boats"], [])
+            .case(["cars"], [Copy(Input("weight"), Output("weight"))])
+        )
+
+        context = Context({"category": "cars", "wheel": 12, "weight": 1765})
+        Executor([switch]).run(context)
+        self.assertDictEqual({"weight": 1765}, context.output())
+        self.assertEqual(2, len(switch.operation_table))
+        self.assertEqual([("boats",), ("cars",)], [key for key, _ in switch.cases()])
+
+    def test_switch_merge_index(self):
+        parts = [
+            Switch(Input("n")).case([i], [Copy(Input("n"), Output("n"))])
+            for i in range(100)
+        ]
+        main_case = Switch(Input("n")).case([0], [])
+        for part in parts:
+            main_case.merge(part)
+
+        self.assertEqual(100, len(main_case.index))
+        self.assertEqual(list(range(100)), [key[0] for key, _ in main_case.cases()])
+
+        executor = Executor([main_case])
+        for n in (0, 50, 99):
+            self.assertDictEqual({"n": n}, executor.run(Context({"n": n})).output())
+
+    def test_switch_stats(self):
+        switch = (
+            Switch(Input("category"))
+            .case(["cars"], [])
+            .case(["boats"], [])
+            .enable_stats()
+        )
+
+        executor = Executor([switch])
+        for category in ["cars", "cars", "boats", "planes"]:
+            executor.run(Context({"category": category}))
+
+        self.assertEqual({("cars",): 2, ("boats",): 1, None: 1}, switch.stats())
+
+
+class TestRunMany(unittest.TestCase):
+    def setUp(self):
+        self.executor = Executor([
+            Copy(Input("name"), VirtualVar("name")),
+            Copy(VirtualVar("name"), Output("name")),
+            Validate(Input("name"), NotEmptyValidator()),
+        ])
+        self.inputs = [{"name": "a"}, {}, {"name": "c"}]
+
+    def test_run_many(self):
+        results = list(self.executor.run_many(iter(self.inputs)))
+
+        self.assertEqual([{"name": "a"}, {}, {"name": "c"}],
+                         [result.output for result in results])
+        self.assertEqual([0, 1, 0], [len(result.errors) for result in results])
+
+    def test_map(self):
+        outputs = self.executor.map(iter(self.inputs))
+        self.assertEqual({"name": "a"}, next(outputs))
+        self.assertEqual([{}, {"name": "c"}], list(outputs))
+
+    def test_batch_stats(self):
+        stats = []
+        results = list(self.executor.run_many(
+            self.inputs, batch_size=2, on_batch=stats.append))
+
+        self.assertEqual(3, len(results))
+        self.assertEqual([0, 1], [batch.batch for batch in stats])
+        self.assertEqual([2, 1], [batch.records for batch in stats])
+        self.assertEqual([1, 0], [batch.failed for batch in stats])
@@ -0,0 +1,163 @@
+from __future__ import absolute_import
+import copy
+import json
+import unittest
+
+from sculpt.core import Context, Executor
+from sculpt.cow import CowDict
+from sculpt.fields import Input, Output
+from sculpt.operations import Copy, Apply, Delete, Each, Validate
+from sculpt.validation import NotEmptyValidator
+
+
+DOCUMENT = {
+    "id": 1,
+    "person": {"name": "john", "address": {"city": "x", "zip": "1"}},
+    "items": [{"year": 2001}, {"year": 2002}],
+    "a/b": {"c~d": 1},
+}
+
+
+class TestCowDict(unittest.TestCase):
+    def setUp(self):
+        self.base = copy.deepcopy(DOCUMENT)
+        self.view = CowDict(self.base)
+
+    def test_read(self):
+        self.assertEqual(1, self.view["id"])
+        self.assertEqual("x", self.view["person"]["address"]["city"])
+        self.assertEqual(sorted(DOCUMENT), sorted(self.view))
+        self.assertEqual(len(DOCUMENT), len(self.view))
+        self.assertFalse(self.view.modified)
+        self.assertIs(self.base, self.view.materialize())
+        self.assertEqual([], self.view.patch())
+
+    def test_write(self):
+        self.view["person"]["address"]["city"] = "y"
+        self.view.setdefault("extra", {})["flag"] = True
+        del self.view["person"]["name"]
+        del self.view["id"]
+
+        self.assertEqual(DOCUMENT, self.base)
+        self.assertNotIn("id", self.view)
+        with self.assertRaises(KeyError):
+            del self.view["id"]
+
+        output = self.view.materialize()
+        self.assertEqual({
+            "person": {"address": {"city": "y", "zip": "1"}},
+            "items": DOCUMENT["items"],
+            "a/b": DOCUMENT["a/b"],
+            "extra": {"flag": True},
+        }, output)
+        # untouched subtrees are shared
+        self.assertIs(self.base["items"], output["items"])
+        self.assertIs(self.base["a/b"], output["a/b"])
+
+        self.assertEqual(sorted([
+            {"op": "remove", "path": "/id"},
+            {"op": "remove", "path": "/person/name"},
+            {"op": "add", "path": "/person/address/city", "value": "y"},
+            {"op": "add", "path": "/extra", "value": {"flag": True}},
+        ], key=json.dumps), sorted(self.view.patch(), key=json.dumps))
+
+    def test_escape(self):
+        self.view["a/b"]["c~d"] = 2
+        self.assertEqual([{"op": "add", "path": "/a~1b/c~0d", "value": 2}],
+                         self.view.patch())
+
+
+class TestPassthrough(unittest.TestCase):
+    SCHEMA = [
+        Apply(Output("person.name"), lambda value: value.upper()),
+        Delete(Output("person.address.zip")),
+        Copy(Input("person.name"), Output("original_name")),
+        Each(Input("items"), Output("items"), [
+            Copy(Input("year"), Output("y")),
+        ]),
+        Validate(Output("person.name"), NotEmptyValidator()),
+    ]
+
+    EXPECTED = {
+        "id": 1,
+        "person": {"name": "JOHN", "address": {"city": "x"}},
+        "original_name": "john",
+        "items": [{"y": 2001}, {"y": 2002}],
+        "a/b": {"c~d": 1},
+    }
+
+    def test_run(self):
+        document = copy.deepcopy(DOCUMENT)
+        executor = Executor(self.SCHEMA)
+        for context in (executor.run(Context(document, passthrough=True)),
+                        executor.compile().run(Context(document, passthrough=True))):
+            self.assertEqual(self.EXPECTED, context.output())
+            self.assertEqual([], context.errors)
+        self.assertEqual(DOCUMENT, document)
+
+    def test_run_many(self):
+        executor = Executor(self.SCHEMA)
+        outputs = list(executor.map([copy.deepcopy(DOCUMENT)] * 2, passthrough=True))
+        self.assertEqual([self.EXPECTED] * 2, outputs)
+
+        patches = list(executor.map([copy.deepcopy(DOCUMENT)], patch=True))
+        self.assertEqual(4, len(patches[0]))
+        self.assertIn({"op": "remove", "path": "/person/address/zip"}, patches[0])
+
+    def test_patch_requires_passthrough(self):
+        with self.assertRaises(ValueError):
+            Context({}).patch()
+
+    def test_copied_input_is_not_modified(self):
+        schema = [Copy(Input("person"), Output("p2")), Delete(Output("p2.name"))]
+        executor = Executor(schema)
+        for run in (executor.run, executor.compile().run):
+            document = {"person": {"name": "bob", "age": 1}}
+            context = run(Context(document, passthrough=True))
+            self.assertEqual({"person": {"name": "bob", "age": 1}}, document)
+            self.assertEqual({"person": {"name": "bob", "age": 1}, "p2": {"age": 1}},
+                             context.output())
+
+    def test_apply_gets_plain_values(self):
+        def pop_name(person):
+            person.pop("name")
+            return person
+
+        schema = [Apply(Output("person"), json.dumps),
+                  Copy(Input("person"), Output("p2")),
+                  Apply(Output("p2"), pop_name)]
+        executor = Executor(schema)
+        for run in (executor.run, executor.compile().run):
+            document = {"person": {"name": "bob"}}
+            context = run(Context(document, passthrough=True))
+            self.assertEqual({"person": {"name": "bob"}}, document)
+            self.assertEqual({"person": '{"name": "bob"}', "p2": {}}, context.output())
+
+    def test_apply_copies_shared_values_only(self):
+        seen = []
+
+        def append_one(value):
+            seen.append(value)
+            value.append(1)
+            return value
+
+        def set_flag(value):
+            seen.append(value)
+            value["flag"] = True
+            return value
+
+        schema = [Apply(Output("items"), append_one), Apply(Output("items"), append_one),
+                  Apply(Output("person"), set_flag), Apply(Output("person"), set_flag)]
+        executor = Executor(schema)
+        for run in (executor.run, executor.compile().run):
+            del seen[:]
+            document = {"items": [0], "person": {"name": "bob"}}
+            context = run(Context(document, passthrough=True))
+            self.assertEqual({"items": [0], "person": {"name": "bob"}}, document)
+            self.assertEqual({"items": [0, 1, 1], "person": {"name": "bob", "flag": True}},
+                             context.output())
+            # values made by first Apply are not copied again
+            self.assertIsNot(document["items"], seen[0])
+            self.assertIs(seen[0], seen[1])
+            self.assertIsNot(document["person"], seen[2])
+            self.assertIs(seen[2], seen[3])
@@ -0,0 +1,94 @@
+from __future__ import absolute_import
+import io
+import unittest
+
+from sculpt.explain import Limits, LimitExceeded, check_limits, explain
+from sculpt.fields import Input, Output, VirtualVar
+from sculpt.operations import Copy, Apply, Combine, Delete, Each, Switch, Validate
+from sculpt.schema.compiler import Compiler
+from sculpt.validation import NotEmptyValidator
+
+
+SCHEMA = [
+    Copy(Input("a.b"), Output("c")),
+    Combine(Apply(Output("c"), str)),
+    Each(Input("items"), Output("items"), [
+        Copy(Input("id"), VirtualVar("id.value")),
+        Each(Input("tags"), Output("tags"), [Delete(Output("tag"))]),
+    ]),
+    Switch(Input("kind"))
+    .case(["a"], [Copy(Input("v"), Output("v"))])
+    .case(["b"], [])
+    .default([Validate(Input("q"), NotEmptyValidator())]),
+]
+
+
+def explained(schema, **kwargs):
+    out = io.StringIO() if str is not bytes else io.BytesIO()
+    plan = explain(schema, out=out, **kwargs)
+    return plan, out.getvalue().splitlines()
+
+
+class TestExplain(unittest.TestCase):
+    def test_plan(self):
+        plan, lines = explained(SCHEMA)
+        nodes = {node.name: node for node in plan.walk()}
+
+        self.assertEqual(3, nodes["Copy Input(a.b) -> Output(c)"].lookups)
+        # Combine is inlined
+        self.assertEqual(plan, nodes["Apply Output(c)"].parent)
+
+        delete = nodes["Delete Output(tag)"]
+        self.assertEqual(2, delete.each_depth)
+        self.assertEqual(100, delete.total_lookups)
+        # virtual fields are flat
+        self.assertEqual(10 * 2, nodes["Copy Input(id) -> VirtualVar(id.value)"].total_lookups)
+        self.assertEqual(2 + 10 * (2 + 2 + 10 * 1),
+                         nodes["Each Input(items) -> Output(items)"].total_lookups)
+
+        switch = nodes["Switch Input(kind)"]
+        self.assertEqual(2, switch.cases)
+        # most expensive branch
+        self.assertEqual(2 + 2, switch.total_lookups)
+
+        self.assertEqual(3 + 2 + 142 + 4, plan.total_lookups)
+        self.assertEqual(9, plan.operations_count)
+        self.assertEqual("Schema [lookups=151]", lines[0])
+        self.assertIn("      Delete Output(tag) [lookups=100, each_depth=2 (x100)]", lines)
+
+    def test_fan_out(self):
+        plan, _ = explained(SCHEMA, fan_out=2)
+        self.assertEqual(3 + 2 + (2 + 2 * (2 + 2 + 2 * 1)) + 4, plan.total_lookups)
+
+    def test_limits(self):
+        # max_each_depth is tested on python schema only, compiled rules
+        # have no Each
+        limits = Limits(max_each_depth=1, max_switch_cases=1, max_lookups=100)
+        plan, lines = explained(SCHEMA, limits=limits)
+        flagged = [(node.name, node.violations) for node in plan.walk() if node.violations]
+        self.assertEqual([
+            ("Schema", [("max_lookups", 100, 151)]),
+            ("Each Input(tags) -> Output(tags)", [("max_each_depth", 1, 2)]),
+            ("Switch Input(kind)", [("max_switch_cases", 1, 2)]),
+        ], flagged)
+        self.assertTrue(lines[0].endswith("!! max_lookups 151 > 100"))
+
+        with self.assertRaises(LimitExceeded) as ctx:
+            check_limits(SCHEMA, Limits(max_operations=5))
+        self.assertEqual(("max_operations", 5, 9), (ctx.exception.name, ctx.exception.limit,
+                                                     ctx.exception.value))
+        self.assertIsNotNone(check_limits(SCHEMA, Limits(max_each_depth=2)))
+        with self.assertRaises(LimitExceeded) as ctx:
+            check_limits(SCHEMA, Limits(max_each_depth=1))
+        self.assertEqual("max_each_depth", ctx.exception.name)
+
+    def test_compiler_limits(self):
+        rules = [{
+            "op": "switch",
+            "fields": [{"type": "input", "key": "kind"}],
+            "cases": [{"case": ["k{}".format(i)], "rules": []} for i in range(10)],
+        }]
+        self.assertEqual(1, len(Compiler(limits=Limits(max_switch_cases=10))
+                                .compile(rules).operations))
+        with self.assertRaises(ValueError):
+            Compiler(limits=Limits(max_switch_cases=9)).compile(rules)
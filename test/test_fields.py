@@ -0,0 +1,207 @@
+import pickle
+import unittest
+
+from sculpt import fields
+from sculpt.core import Context, Executor
+from sculpt.fields import Input, Output, VirtualVar, VirtualList
+from sculpt.operations import Apply, Copy, Each, Validate
+from sculpt.util import MISSING
+from sculpt.validation import NotEmptyValidator
+
+
+class TestFieldAccessors(unittest.TestCase):
+    def test_nested_access(self):
+        context = Context({"a": {"b": {"c": {"d": 1}}}})
+
+        for label, value in [("a.b.c.d", 1), ("a.b.c", {"d": 1}), ("a", {"b": {"c": {"d": 1}}})]:
+            self.assertTrue(Input(label).has(context))
+            self.assertEqual(value, Input(label).get(context))
+
+        for label in ["x", "a.x", "a.b.x", "a.b.c.x"]:
+            self.assertFalse(Input(label).has(context))
+            self.assertIsNone(Input(label).get(context))
+
+    def test_nested_set_and_delete(self):
+        context = Context({})
+
+        Output("a").set(context, 0)
+        Output("b.c").set(context, 1)
+        Output("b.d.e.f").set(context, 2)
+        self.assertDictEqual({"a": 0, "b": {"c": 1, "d": {"e": {"f": 2}}}},
+                             context.output())
+
+        Output("b.d.e.f").delete(context)
+        Output("b.missing.key").delete(context)
+        Output("a").delete(context)
+        self.assertDictEqual({"b": {"c": 1, "d": {"e": {}}}}, context.output())
+
+    def test_flat_access(self):
+        context = Context({})
+
+        field = VirtualVar("a.b")
+        self.assertFalse(field.has(context))
+        field.set(context, 1)
+        self.assertTrue(field.has(context))
+        self.assertEqual(1, field.get(context))
+
+        field.delete(context)
+        self.assertFalse(field.has(context))
+
+    def test_relabel(self):
+        context = Context({"a": 1, "b": 2})
+
+        field = Input("a")
+        field.label = "b"
+        self.assertEqual(2, field.get(context))
+        self.assertEqual(Input("b"), field)
+
+    def test_lookup(self):
+        context = Context({"a": {"b": None}})
+
+        self.assertIsNone(Input("a.b").lookup(context))
+        self.assertIs(MISSING, Input("a.c").lookup(context))
+        self.assertIs(MISSING, Input("c").lookup(context))
+        self.assertIs(MISSING, VirtualVar("c").lookup(context))
+        self.assertEqual([], VirtualList("c").lookup(context))
+
+    def test_compact(self):
+        label = "".join(["a", ".b"])
+        field = Output(label)
+        self.assertFalse(hasattr(field, "__dict__"))
+        self.assertIs(Input("a.b").path, field.path)
+        self.assertIs(Input("a.b").label, field.label)
+
+    def test_pickle(self):
+        for field in (Input("a.b"), VirtualVar("v"), VirtualList("l").append()):
+            loaded = pickle.loads(pickle.dumps(field))
+            self.assertEqual(field, loaded)
+            self.assertEqual(field.path, loaded.path)
+            self.assertIsNotNone(loaded.accessors)
+
+        context = Context({"a": {"b": 1}})
+        self.assertEqual(1, pickle.loads(pickle.dumps(Input("a.b"))).get(context))
+
+
+    def test_label_caches_bounded(self):
+        caches = (fields._accessors_cache, fields._paths_cache)
+        sizes = [cache.size for cache in caches]
+        for cache in caches:
+            cache.size = 10
+        try:
+            shared = Input("shared.label")
+            for i in range(100):
+                Input("distinct.f{}".format(i))
+                self.assertIs(shared.accessors, Input("shared.label").accessors)
+                self.assertIs(shared.path, Input("shared.label").path)
+            self.assertEqual([10, 10], [len(cache) for cache in caches])
+        finally:
+            for cache, size in zip(caches, sizes):
+                cache.size = size
+
+class TestVirtualList(unittest.TestCase):
+    def test_append_raw(self):
+        calls = []
+
+        def double(value):
+            calls.append(value)
+            return value * 2
+
+        context = Context({})
+        doubled = VirtualList("l").map(double)
+        append = doubled.append()
+        for i in range(100):
+            append.set(context, i)
+
+        self.assertEqual([], calls)
+        self.assertEqual(list(range(100)), VirtualList("l").get(context))
+        self.assertEqual([i * 2 for i in range(100)], doubled.get(context))
+        self.assertEqual(100, len(calls))
+
+        append.set(context, 100)
+        self.assertEqual(200, doubled.get(context)[-1])
+
+    def test_map_find_new_fields(self):
+        context = Context({})
+        VirtualList("l").set(context, [1, 2, 3, 4])
+
+        field = VirtualList("l")
+        mapped = field.map(lambda value: value * 10)
+        found = mapped.find(lambda value: value > 15)
+        self.assertEqual((), field.cbs)
+        self.assertEqual([1, 2, 3, 4], field.get(context))
+        self.assertEqual([10, 20, 30, 40], mapped.get(context))
+        self.assertEqual(20, found.get(context))
+
+    def test_find_lazy(self):
+        calls = []
+
+        def track(value):
+            calls.append(value)
+            return value
+
+        context = Context({})
+        VirtualList("l").set(context, [1, 2, 3, 4])
+        self.assertEqual(2, VirtualList("l").map(track).find(lambda v: v == 2).get(context))
+        self.assertEqual([1, 2], calls)
+
+    def test_read_after_change_in_place(self):
+        def sort(values):
+            values.sort()
+            return values
+
+        mapped = VirtualList("l").map(lambda v: v * 10)
+        schema = [
+            Copy(Input("l"), VirtualList("l")),
+            Copy(mapped, Output("before")),
+            Apply(VirtualList("l"), sort),
+            Copy(mapped, Output("after")),
+        ]
+        executor = Executor(schema)
+        for run in (executor.run, executor.compile().run):
+            context = run(Context({"l": [3, 1, 2]}))
+            self.assertEqual({"before": [30, 10, 20], "after": [10, 20, 30]},
+                             context.output())
+
+    def test_extend(self):
+        context = Context({})
+        VirtualList("l").extend().set(context, [1, 2])
+        VirtualList("l").extend().set(context, [3])
+        self.assertEqual([1, 2, 3], VirtualList("l").get(context))
+
+    def test_lookup_unassigned(self):
+        # unassigned list is copied as empty one, find() on it as nothing
+        context = Context({})
+        self.assertEqual([], VirtualList("l").lookup(context))
+        self.assertEqual([], VirtualList("l").map(str).lookup(context))
+        self.assertIs(MISSING, VirtualList("l").find(bool).lookup(context))
+        self.assertIs(MISSING, VirtualList("l").existing(context))
+        VirtualList("l").set(context, [])
+        self.assertEqual([], VirtualList("l").lookup(context))
+        self.assertEqual([], VirtualList("l").existing(context))
+        self.assertIsNone(VirtualList("l").find(bool).lookup(context))
+
+    def test_copy_unassigned(self):
+        schema = [
+            Each(Input("items"), Output("items"), [
+                Copy(Input("id"), VirtualList("ids").append()),
+            ]),
+            Copy(VirtualList("l"), Output("x")),
+            Copy(VirtualList("l").map(str), Output("y")),
+            Copy(VirtualList("ids"), Output("ids")),
+        ]
+        executor = Executor(schema)
+        for run in (executor.run, executor.compile().run):
+            context = run(Context({"items": []}))
+            self.assertEqual({"items": [], "x": [], "y": [], "ids": []},
+                             context.output())
+
+    def test_unassigned_in_schema(self):
+        schema = [
+            Validate(VirtualList("l"), NotEmptyValidator()),
+            Copy(VirtualList("l").find(bool), Output("found")),
+        ]
+        executor = Executor(schema)
+        for run in (executor.run, executor.compile().run):
+            context = run(Context({}))
+            self.assertEqual(1, len(context.errors))
+            self.assertEqual({}, context.output())
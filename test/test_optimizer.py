@@ -0,0 +1,264 @@
+from __future__ import absolute_import
+import copy
+import unittest
+
+from sculpt.analysis import effects, overlaps, read_resources
+from sculpt.core import Context, Executor
+from sculpt.fields import Input, Output, VirtualVar, VirtualList
+from sculpt.operations import Copy, Apply, Combine, Delete, Each, Switch, Validate
+from sculpt.optimizer import optimize
+from sculpt.validation import NotEmptyValidator
+
+
+DOCUMENT = {
+    "kind": "car",
+    "name": "ford",
+    "wheels": 4,
+    "items": [{"year": 2001}, {"year": 2002}],
+}
+
+
+def run_both(test_case, operations, document=DOCUMENT):
+    optimized = optimize(operations)
+    expected = Executor(operations).run(Context(copy.deepcopy(document)))
+    actual = Executor(optimized).run(Context(copy.deepcopy(document)))
+
+    test_case.assertEqual(expected.output(), actual.output())
+    test_case.assertEqual([str(e) for e in expected.errors],
+                          [str(e) for e in actual.errors])
+    return optimized.operations
+
+
+class TestAnalysis(unittest.TestCase):
+    def test_overlaps(self):
+        self.assertTrue(overlaps(("output", ("a",)), ("output", ("a", "b"))))
+        self.assertFalse(overlaps(("output", ("a",)), ("input", ("a",))))
+        self.assertFalse(overlaps(("output", ("a", "c")), ("output", ("a", "b"))))
+
+    def test_effects(self):
+        copy_effects = effects(Copy(Input("a.b"), Output("c")))
+        self.assertEqual({("input", ("a", "b"))}, copy_effects.reads)
+        self.assertEqual({("output", ("c",))}, copy_effects.writes)
+
+        append_effects = effects(Copy(Input("a"), VirtualList("v.w").append()))
+        self.assertEqual({("virtual", ("v.w",))}, append_effects.writes)
+        self.assertIn(("virtual", ("v.w",)), append_effects.reads)
+
+        self.assertTrue(effects(Each(Input("a"), Output("b"), [])).barrier)
+
+        switch_effects = effects(
+            Switch(Input("kind")).case(["car"], [Apply(Output("n"), str)]))
+        self.assertEqual({("input", ("kind",)), ("output", ("n",))}, switch_effects.reads)
+
+    def test_read_resources(self):
+        reads = read_resources([
+            Each(Input("items"), Output("years"), [Copy(Input("year"), Output("y"))]),
+        ])
+        self.assertEqual({("input", ("items",)), ("input", ("year",))}, reads)
+        self.assertIsNone(read_resources([object()]))
+
+
+class TestOptimizer(unittest.TestCase):
+    def test_flatten_combine(self):
+        operations = run_both(self, [
+            Combine(Copy(Input("kind"), Output("kind")),
+                    Combine(Combine(Copy(Input("name"), Output("name"))))),
+        ])
+        self.assertEqual(2, len(operations))
+        self.assertTrue(all(isinstance(op, Copy) for op in operations))
+
+    def test_dead_store(self):
+        operations = run_both(self, [
+            Copy(Input("kind"), Output("kind")),
+            Copy(Input("name"), VirtualVar("name")),
+            Copy(Input("wheels"), Output("wheels")),
+            Delete(Output("kind")),
+            Delete(VirtualVar("name")),
+        ])
+        self.assertEqual([Copy(Input("wheels"), Output("wheels"))],
+                         [op for op in operations if isinstance(op, Copy)])
+
+    def test_dead_store_read(self):
+        operations = run_both(self, [
+            Copy(Input("kind"), Output("kind")),
+            Validate(Output("kind"), NotEmptyValidator()),
+            Delete(Output("kind")),
+        ])
+        self.assertEqual(3, len(operations))
+
+    def test_dead_store_nested(self):
+        # deleting copied field leaves its parents
+        operations = run_both(self, [
+            Copy(Input("kind"), Output("car.kind")),
+            Delete(Output("car.kind")),
+            Copy(Input("name"), Output("person.name")),
+            Delete(Output("person")),
+        ])
+        self.assertEqual(3, len(operations))
+
+    def test_copy_chain(self):
+        operations = run_both(self, [
+            Copy(Input("name"), VirtualVar("name")),
+            Copy(VirtualVar("name"), Output("name")),
+            Copy(VirtualVar("name"), Output("title")),
+        ])
+        self.assertEqual([Copy(Input("name"), Output("name")),
+                          Copy(Input("name"), Output("title"))], operations)
+
+    def test_copy_chain_written_before(self):
+        operations = run_both(self, [
+            Copy(Input("kind"), VirtualVar("name")),
+            Copy(Input("missing"), VirtualVar("name")),
+            Copy(VirtualVar("name"), Output("name")),
+        ])
+        self.assertEqual(3, len(operations))
+
+    def test_copy_chain_modified(self):
+        operations = run_both(self, [
+            Copy(Input("name"), VirtualVar("name")),
+            Apply(VirtualVar("name"), lambda value: value.upper()),
+            Copy(VirtualVar("name"), Output("name")),
+        ])
+        self.assertEqual(3, len(operations))
+
+    def test_hoist_switch(self):
+        operations = run_both(self, [
+            Switch(Output("kind"))
+            .case(["car"], [Copy(Input("name"), Output("car"))])
+            .default([Copy(Input("name"), Output("name"))]),
+            Switch(Input("kind"))
+            .case(["car"], [Copy(Input("wheels"), Output("wheels"))])
+            .case(["bike"], [Copy(Input("wheels"), Output("wheels"))])
+            .default([Copy(Input("wheels"), Output("wheels"))]),
+            Switch(Input("kind")).case(["car"], []),
+        ])
+        self.assertEqual([Copy(Input("name"), Output("name")),
+                          Copy(Input("wheels"), Output("wheels"))], operations)
+
+    def test_switch_on_written_field(self):
+        operations = run_both(self, [
+            Copy(Input("kind"), Output("kind")),
+            Switch(Output("kind"))
+            .case(["car"], [Copy(Input("name"), Output("car"))])
+            .default([Copy(Input("name"), Output("name"))]),
+        ])
+        self.assertIsInstance(operations[1], Switch)
+
+    def test_each_body(self):
+        run_both(self, [
+            Each(Input("items"), Output("items"), [
+                Combine(Copy(Input("year"), Output("year"))),
+                Copy(Input("year"), Output("tmp")),
+                Delete(Output("tmp")),
+            ]),
+        ])
+
+    def test_dead_store_shared_value(self):
+        # Copy shares value, Delete through copy changes input
+        document = {"a": {"k": 1, "m": 2}}
+        operations = run_both(self, [
+            Copy(Input("a"), Output("b")),
+            Delete(Output("b.k")),
+            Delete(Output("b")),
+            Copy(Input("a"), Output("z")),
+        ], document)
+        self.assertEqual(4, len(operations))
+
+    def test_switch_virtual_list_variants(self):
+        document = {"kind": "car", "first": 5, "list": [1]}
+        for case, default in [
+                (Copy(Input("list"), VirtualList("l").append()),
+                 Copy(Input("list"), VirtualList("l"))),
+                (Copy(VirtualList("l").map(lambda value: value * 10), Output("out")),
+                 Copy(VirtualList("l"), Output("out"))),
+        ]:
+            operations = run_both(self, [
+                Copy(Input("first"), VirtualList("l").append()),
+                Switch(Input("kind")).case(["car"], [case]).default([default]),
+                Copy(VirtualList("l"), Output("all")),
+            ], document)
+            self.assertIsInstance(operations[1], Switch)
+
+        # same variants are alike
+        operations = run_both(self, [
+            Switch(Input("kind")).case(["car"], [Copy(Input("list"), VirtualList("l").extend())])
+            .default([Copy(Input("list"), VirtualList("l").extend())]),
+            Copy(VirtualList("l"), Output("out")),
+        ], document)
+        self.assertNotIsInstance(operations[0], Switch)
+
+    def test_passthrough(self):
+        # passthrough output starts as input, it is not empty
+        document = {"b": 1, "c": 2, "k": "x", "v": 1, "w": 2}
+        for operations in [
+                [Copy(Input("a"), Output("b")), Copy(Output("b"), Output("c"))],
+                [Switch(Output("k")).case([None], [Copy(Input("v"), Output("r"))])
+                 .default([Copy(Input("w"), Output("r"))])],
+        ]:
+            optimized = optimize(operations, passthrough=True)
+            expected = Executor(operations).run(Context(dict(document), passthrough=True))
+            actual = Executor(optimized).run(Context(dict(document), passthrough=True))
+            self.assertEqual(expected.output(), actual.output())
+
+    def test_switch_subclass(self):
+        class CountingSwitch(Switch):
+            __slots__ = ()
+
+        switch = CountingSwitch(Input("kind")).case(["car"], [Copy(Input("name"), Output("n"))])
+        switch.enable_stats()
+        self.assertIsInstance(optimize([switch]).operations[0], CountingSwitch)
+
+
+SHARED = {
+    "kind": "car",
+    "person": {"name": "bob", "address": {"city": "x"}},
+    "tags": ["a", "b"],
+    "items": [{"year": 2001}, {"year": 2002}],
+}
+
+
+class TestEquivalence(unittest.TestCase):
+    # optimized schemas give same output and errors as interpreted ones
+    SCHEMAS = [
+        # dead stores
+        [Copy(Input("person"), Output("p")), Delete(Output("p.name")), Delete(Output("p")),
+         Copy(Input("person"), Output("q"))],
+        [Copy(Input("person"), VirtualVar("p")), Delete(VirtualVar("p")),
+         Copy(Input("person"), Output("q"))],
+        [Copy(Input("person"), Output("p")), Apply(Output("p.name"), str.upper),
+         Delete(Output("p")), Copy(Input("person.name"), Output("name"))],
+        [Copy(Input("person.name"), Output("p.name")), Delete(Output("p"))],
+        # copy chains
+        [Copy(Input("person"), VirtualVar("p")), Delete(Output("x")),
+         Copy(VirtualVar("p"), Output("p")), Copy(VirtualVar("p"), Output("q")),
+         Delete(Output("q.address"))],
+        [Copy(Input("person"), VirtualVar("p")), Copy(VirtualVar("p"), Output("p")),
+         Copy(Input("kind"), VirtualVar("p")), Copy(VirtualVar("p"), Output("q"))],
+        [Copy(Input("tags"), VirtualVar("t")), Copy(VirtualVar("t"), Output("t")),
+         Copy(Input("kind"), VirtualList("t").append()), Copy(VirtualVar("t"), Output("u"))],
+        # switches
+        [Switch(Output("kind")).case([None], [Copy(Input("kind"), Output("kind"))])
+         .default([Copy(Input("person"), Output("p"))]),
+         Switch(Output("kind")).case(["car"], [Delete(Output("kind"))])],
+        [Copy(Input("person"), Output("p")),
+         Switch(Input("kind")).case(["car"], [Delete(Output("p.name"))])
+         .default([Delete(Output("p.name"))]),
+         Copy(Input("person"), Output("q"))],
+        # nested bodies
+        [Each(Input("items"), Output("items"), [Copy(Input("year"), Output("x")),
+                                                Delete(Output("x"))]),
+         Combine(Combine(Copy(Input("person"), Output("p"))), Delete(Output("p.address")))],
+        [Validate(Output("p"), NotEmptyValidator()), Copy(Input("person"), Output("p")),
+         Delete(Output("p"))],
+    ]
+
+    def test_equivalence(self):
+        for operations in self.SCHEMAS:
+            document = copy.deepcopy(SHARED)
+            optimized = optimize(operations)
+            expected = Executor(operations).run(Context(copy.deepcopy(document)))
+            actual = Executor(optimized).run(Context(copy.deepcopy(document)))
+            self.assertEqual(expected.output(), actual.output(), operations)
+            self.assertEqual([str(e) for e in expected.errors],
+                             [str(e) for e in actual.errors], operations)
+            self.assertEqual(expected.stores["input"], actual.stores["input"], operations)
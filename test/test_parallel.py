@@ -0,0 +1,82 @@
+import multiprocessing
+import pickle
+import unittest
+
+from sculpt import registry
+from sculpt.core import Context, Executor
+from sculpt.fields import Input, Output, VirtualList
+from sculpt.operations import Copy, Apply, Validate, Each, ApplyError
+from sculpt.parallel import ParallelExecutor
+from sculpt.validation import NotEmptyValidator, ValidationError
+
+
+registry.register("test_parallel.double",
+                  lambda value: value * 2 if value is not None else None)
+registry.register("test_parallel.is_even", lambda value: value % 2 == 0)
+
+
+def make_schema():
+    return [
+        Copy(Input("value"), Output("value")),
+        Apply(Output("value"), registry.functions.lookup("test_parallel.double")),
+        Each(Input("items"), Output("items"), [
+            Copy(Input("id"), VirtualList("ids").append()),
+        ]),
+        Copy(VirtualList("ids").find(registry.functions.lookup("test_parallel.is_even")),
+             Output("even")),
+        Validate(Input("value"), NotEmptyValidator(code=1)),
+    ]
+
+
+class TestRegistry(unittest.TestCase):
+    def test_round_trip(self):
+        schema = Executor(make_schema()).root
+        loaded = registry.loads(registry.dumps(schema))
+
+        context = Executor(loaded).run(Context({"value": 2, "items": [{"id": 1}, {"id": 4}]}))
+        self.assertEqual({"value": 4, "items": [{}, {}], "even": 4}, context.output())
+
+    def test_unregistered_lambda(self):
+        with self.assertRaises(pickle.PicklingError) as ctx:
+            registry.dumps(Apply(Output("a"), lambda value: value))
+        self.assertIn("unregistered", str(ctx.exception))
+
+    def test_duplicate_name(self):
+        registry_ = registry.FunctionRegistry()
+        registry_.register("f", len)
+        registry_.register("f", len)
+        with self.assertRaises(ValueError):
+            registry_.register("f", str)
+
+    def test_errors_pickle(self):
+        error = pickle.loads(pickle.dumps(ValidationError("msg", label="a")))
+        self.assertEqual({"label": "a"}, error.kwargs)
+        self.assertEqual("msg", str(error))
+
+        error = pickle.loads(pickle.dumps(ApplyError("msg", Output("a"), len, ValueError("x"))))
+        self.assertEqual(Output("a"), error.field)
+
+
+# workers get test functions registered by forking test process
+@unittest.skipIf(not hasattr(multiprocessing, "get_all_start_methods") or
+                 "fork" not in multiprocessing.get_all_start_methods(),
+                 "fork start method is not available")
+class TestParallelExecutor(unittest.TestCase):
+    def test_run_many(self):
+        inputs = [{"value": i, "items": [{"id": i}]} for i in range(50)]
+        inputs.append({"items": []})
+
+        with ParallelExecutor(make_schema(), processes=2, chunk_size=7,
+                              start_method="fork") as executor:
+            results = list(executor.run_many(iter(inputs)))
+
+        expected = list(Executor(make_schema()).run_many(inputs))
+        self.assertEqual([r.output for r in expected], [r.output for r in results])
+        self.assertEqual(1, len(results[-1].errors))
+        self.assertEqual(1, results[-1].errors[0].kwargs["code"])
+
+    def test_apply_error(self):
+        schema = [Apply(Output("value"), registry.functions.lookup("test_parallel.is_even"))]
+        with ParallelExecutor(schema, processes=1, start_method="fork") as executor:
+            with self.assertRaises(ApplyError):
+                list(executor.run_many([{}]))
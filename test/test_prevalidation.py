@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+import unittest
+
+from sculpt.core import Context, Executor
+from sculpt.fields import Input, Output
+from sculpt.operations import Copy, Apply, Combine, Delete, Switch, Validate
+from sculpt.prevalidation import ValidationPlan, ValidatingExecutor
+from sculpt.validation import NotEmptyValidator, InSetValidator
+
+
+class TestValidationPlan(unittest.TestCase):
+    def setUp(self):
+        self.applied = []
+
+        def track(value):
+            self.applied.append(value)
+            return value
+
+        # Apply gets value shared with Input, validations of input name
+        # go before it
+        self.schema = [
+            Validate(Input("name"), NotEmptyValidator()),
+            Copy(Input("kind"), Output("kind")),
+            Delete(Output("kind")),
+            Combine(Validate(Input("kind"), InSetValidator(["a", "b"]))),
+            Validate(Input("name"), InSetValidator(["x"])),
+            Copy(Input("name"), Output("name")),
+            Apply(Output("name"), track),
+            Validate(Output("name"), NotEmptyValidator()),
+            Switch(Input("kind")).case(["a"], [
+                Validate(Input("extra"), NotEmptyValidator()),
+            ]),
+        ]
+
+    def test_plan(self):
+        plan = ValidationPlan(Executor(self.schema).root)
+        self.assertEqual(["name", "kind"], [checks.field.label for checks in plan.checks])
+        self.assertEqual(2, len(plan.checks[0].validators))
+        self.assertEqual(6, len(plan.schema.operations))
+
+    def test_valid_record(self):
+        record = {"name": "x", "kind": "a", "extra": 1}
+        expected = Executor(self.schema).run(Context(dict(record)))
+        actual = ValidatingExecutor(self.schema).run(Context(dict(record)))
+        self.assertEqual(expected.output(), actual.output())
+        self.assertEqual([], actual.errors)
+
+    def test_fail_fast(self):
+        executor = ValidatingExecutor(self.schema)
+        results = list(executor.run_many([{"kind": "c"}, {"name": "x", "kind": "a"}]))
+
+        self.assertEqual({}, results[0].output)
+        self.assertEqual(1, len(results[0].errors))
+        self.assertIn("input:name", str(results[0].errors[0]))
+
+        # not hoisted validation in switch branch
+        self.assertEqual({"name": "x"}, results[1].output)
+        self.assertEqual(1, len(results[1].errors))
+        self.assertIn("input:extra", str(results[1].errors[0]))
+        self.assertEqual(["x"], self.applied)
+
+    def test_max_errors(self):
+        results = list(ValidatingExecutor(self.schema, max_errors=None).run_many([{"kind": "c"}]))
+        self.assertEqual(3, len(results[0].errors))
+        self.assertEqual([], self.applied)
+
+    def test_shared_value(self):
+        # Delete through copy empties Input field validated after it
+        schema = [
+            Copy(Input("p"), Output("q")),
+            Delete(Output("q.name")),
+            Validate(Input("p.name"), NotEmptyValidator()),
+            Copy(Input("p"), Output("r")),
+            Apply(Output("r"), lambda value: value),
+            Validate(Input("p.age"), NotEmptyValidator()),
+            Validate(Input("kind"), NotEmptyValidator()),
+        ]
+        plan = ValidationPlan(Executor(schema).root)
+        self.assertEqual(["kind"], [checks.field.label for checks in plan.checks])
+
+        record = {"p": {"name": "bob", "age": 1}, "kind": "a"}
+        expected = Executor(schema).run(Context(dict(record, p=dict(record["p"]))))
+        actual = ValidatingExecutor(schema).run(Context(dict(record, p=dict(record["p"]))))
+        self.assertEqual(1, len(actual.errors))
+        self.assertEqual([str(e) for e in expected.errors], [str(e) for e in actual.errors])
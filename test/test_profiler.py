@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+import copy
+import io
+import time
+import unittest
+
+from sculpt.core import Executor
+from sculpt.fields import Input, Output
+from sculpt.operations import Copy, Apply, Combine, Each, Switch
+from sculpt.profiler import ProfilingExecutor, operation_name
+
+
+def slow(value):
+    time.sleep(0.002)
+    return value
+
+
+SCHEMA = [
+    Copy(Input("name"), Output("name")),
+    Combine(Apply(Output("name"), slow)),
+    Each(Input("items"), Output("items"), [
+        Copy(Input("id"), Output("id")),
+    ]),
+    Switch(Input("kind"))
+    .case(["car"], [Copy(Input("wheels"), Output("wheels"))])
+    .default([Copy(Input("kind"), Output("kind"))]),
+]
+
+RECORDS = [
+    {"name": "a", "items": [{"id": 1}, {"id": 2}], "kind": "car", "wheels": 4},
+    {"name": "b", "items": [], "kind": "bike"},
+]
+
+
+class TestProfiler(unittest.TestCase):
+    def test_outputs(self):
+        expected = list(Executor(SCHEMA).run_many(copy.deepcopy(RECORDS)))
+        results = list(ProfilingExecutor(SCHEMA).run_many(copy.deepcopy(RECORDS)))
+        self.assertEqual([r.output for r in expected], [r.output for r in results])
+
+    def test_entries(self):
+        executor = ProfilingExecutor(SCHEMA)
+        list(executor.map(copy.deepcopy(RECORDS)))
+        entries = {entry.frames: entry for entry in executor.profile.entries}
+
+        combine = ("schema", "Combine")
+        apply_ = combine + ("Apply output:name",)
+        self.assertEqual(2, entries[apply_].calls)
+        self.assertGreaterEqual(entries[apply_].self_time, 0.004)
+        # time of children is not self time of parent
+        self.assertGreaterEqual(entries[combine].cumulative, entries[apply_].cumulative)
+        self.assertLess(entries[combine].self_time, entries[apply_].self_time)
+
+        each = ("schema", "Each input:items -> output:items")
+        self.assertEqual(2, entries[each].calls)
+        self.assertEqual(2, entries[each + ("Copy input:id -> output:id",)].calls)
+
+        switch = ("schema", "Switch input:kind")
+        self.assertEqual(1, entries[switch + ("Copy input:wheels -> output:wheels",)].calls)
+        self.assertEqual(1, entries[switch + ("Copy input:kind -> output:kind",)].calls)
+
+        self.assertIn("Apply output:name", executor.profile.report())
+        executor.profile.reset()
+        self.assertEqual(0, entries[apply_].calls)
+
+    def test_collapsed(self):
+        executor = ProfilingExecutor(SCHEMA)
+        list(executor.map(copy.deepcopy(RECORDS)))
+
+        destination = io.StringIO()
+        executor.profile.write_collapsed(destination)
+        lines = destination.getvalue().splitlines()
+        stacks = dict(line.rsplit(" ", 1) for line in lines)
+        self.assertGreaterEqual(int(stacks["schema;Combine;Apply output:name"]), 4000)
+
+    def test_operation_name(self):
+        operation = Copy(Input("a;b"), Output("a"))
+        self.assertEqual("Copy input:a:b -> output:a", operation_name(operation))
+        operation.lineno = 12
+        self.assertEqual("Copy input:a:b -> output:a (line 12)", operation_name(operation))
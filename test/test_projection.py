@@ -0,0 +1,116 @@
+from __future__ import absolute_import
+import io
+import json
+import unittest
+
+from sculpt.analysis import input_projection
+from sculpt.core import Context, Executor
+from sculpt.fields import Input, Output, VirtualVar
+from sculpt.operations import Copy, Each, With, Switch, Validate
+from sculpt.projection import ALL, Projection, ProjectingDecoder
+from sculpt.stream import JsonLinesPipeline
+from sculpt.validation import NotEmptyValidator
+
+
+SCHEMA = [
+    Copy(Input("person.name"), Output("name")),
+    Switch(Input("kind")).case(["car"], [
+        Copy(Input("car"), Output("car")),
+    ]),
+    Each(Input("items"), Output("years"), [
+        Copy(Input("year"), Output("year")),
+        With(Input("maker"), Output("maker"), [
+            Validate(Input("name"), NotEmptyValidator()),
+        ]),
+    ]),
+    Each(Input("tags"), Output("tags"), []),
+    Copy(VirtualVar("person.age"), Output("age")),
+]
+
+DOCUMENT = {
+    "kind": "car",
+    "person": {"name": "john", "age": 56, "address": {"city": "x"}},
+    "car": {"wheels": 4, "doors": 2},
+    "items": [
+        {"year": 2001, "count": 10, "maker": {"name": "a", "id": 1}},
+        {"year": 2002, "count": 20, "maker": {"id": 2}},
+    ],
+    "tags": [{"name": "a"}, "b"],
+    "blob": "x" * 100,
+}
+
+
+class TestInputProjection(unittest.TestCase):
+    def test_projection(self):
+        projection = input_projection(SCHEMA)
+        self.assertEqual({
+            "person": {"name": ALL},
+            "kind": ALL,
+            "car": ALL,
+            "items": {"year": ALL, "maker": {"name": ALL}},
+            "tags": {},
+        }, projection.tree)
+        self.assertEqual(["car", "items.maker.name", "items.year", "kind",
+                          "person.name", "tags"], projection.labels())
+
+    def test_apply(self):
+        projected = input_projection(SCHEMA).apply(DOCUMENT)
+        self.assertEqual({
+            "kind": "car",
+            "person": {"name": "john"},
+            "car": {"wheels": 4, "doors": 2},
+            "items": [{"year": 2001, "maker": {"name": "a"}}, {"year": 2002, "maker": {}}],
+            "tags": [{}, "b"],
+        }, projected)
+
+        executor = Executor(SCHEMA)
+        expected = executor.run(Context(DOCUMENT))
+        actual = executor.run(Context(projected))
+        self.assertEqual(expected.output(), actual.output())
+        self.assertEqual([str(e) for e in expected.errors],
+                         [str(e) for e in actual.errors])
+
+    def test_whole_input(self):
+        projection = input_projection([
+            Copy(Input("person.name"), Output("name")),
+            Copy(Input("person"), Output("person")),
+        ])
+        self.assertEqual({"person": ALL}, projection.tree)
+
+        projection = input_projection([Copy(Input("a"), Output("a")), object()])
+        self.assertTrue(projection.whole)
+        self.assertIs(DOCUMENT, projection.apply(DOCUMENT))
+
+    def test_add(self):
+        projection = Projection()
+        projection.add(("a", "b"), keep=False)
+        projection.add(("a", "b", "c"))
+        self.assertEqual({"a": {"b": {"c": ALL}}}, projection.tree)
+
+
+class TestProjectingDecoder(unittest.TestCase):
+    def test_loads(self):
+        decoder = ProjectingDecoder(input_projection(SCHEMA))
+        self.assertEqual(input_projection(SCHEMA).apply(DOCUMENT),
+                         decoder.loads(json.dumps(DOCUMENT)))
+
+    def test_pipeline(self):
+        source = io.BytesIO(json.dumps(DOCUMENT).encode("utf-8") + b"\n")
+        destination = io.BytesIO()
+        pipeline = JsonLinesPipeline(Executor(SCHEMA), project_input=True)
+        pipeline.run(source, destination)
+
+        expected = Executor(SCHEMA).run(Context(DOCUMENT)).output()
+        self.assertEqual(expected, json.loads(destination.getvalue().decode("utf-8")))
+
+    def test_pipeline_passthrough(self):
+        # passthrough output starts as whole input, nothing is projected
+        document = dict(DOCUMENT, keep=1)
+        for kwargs in ({"passthrough": True}, {"patch": True}):
+            source = io.BytesIO(json.dumps(document).encode("utf-8") + b"\n")
+            destination = io.BytesIO()
+            pipeline = JsonLinesPipeline(Executor(SCHEMA), project_input=True)
+            pipeline.run(source, destination, **kwargs)
+
+            expected = list(Executor(SCHEMA).map([json.loads(json.dumps(document))], **kwargs))
+            self.assertEqual(expected, [json.loads(destination.getvalue().decode("utf-8"))])
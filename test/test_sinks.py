@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+import copy
+import io
+import json
+import unittest
+
+from sculpt.core import Executor
+from sculpt.fields import Input, Output, VirtualVar
+from sculpt.operations import Copy, Apply, Delete, Each, Switch, Validate
+from sculpt.sinks import DictSink, JsonSink, MsgpackSink, output_layout, msgpack
+from sculpt.stream import JsonLinesPipeline
+from sculpt.validation import BaseValidator, NotEmptyValidator
+
+
+SCHEMA = [
+    Copy(Input("id"), Output("id")),
+    Copy(Input("person.name"), Output("person.name")),
+    Copy(Input("person.age"), Output("person.age")),
+    Copy(Input("person.missing"), Output("extra.missing")),
+    Apply(Output("person.name"), lambda value: value and value.upper()),
+    Copy(Input("tags"), VirtualVar("tags")),
+    Copy(VirtualVar("tags"), Output("tags")),
+    Switch(Input("kind"))
+    .case(["car"], [Copy(Input("wheels"), Output("car.wheels"))])
+    .default([Copy(Input("kind"), Output("kind"))]),
+    Copy(Input("score"), Output("score")),
+    Delete(Output("score")),
+    Validate(Output("person.name"), NotEmptyValidator()),
+]
+
+RECORDS = [
+    {"id": 1, "person": {"name": u"jöhn", "age": 56}, "tags": ["a"],
+     "kind": "car", "wheels": 4, "score": 1.5},
+    {"id": 2, "person": {"age": None}, "kind": "bike", "score": True},
+]
+
+
+class TestOutputLayout(unittest.TestCase):
+    def test_layout(self):
+        layout = output_layout(Executor(SCHEMA).root)
+        self.assertEqual(["id", "person.name", "person.age", "extra.missing",
+                          "tags", "car.wheels", "kind", "score"], layout.labels)
+
+    def test_not_static(self):
+        for operations in [
+                [Copy(Input("a"), Output("a")), Copy(Input("b"), Output("a.b"))],
+                [Each(Input("items"), Output("items"), [])],
+                [Copy(Input("a"), Output("a.b")), Delete(Output("a.b"))],
+                [Validate(Output("a"), BaseValidator())],
+        ]:
+            self.assertIsNone(output_layout(Executor(operations).root))
+
+
+class TestSinks(unittest.TestCase):
+    def expected(self):
+        return list(Executor(SCHEMA).run_many(copy.deepcopy(RECORDS)))
+
+    def test_dict_sink(self):
+        executor = Executor(SCHEMA)
+        results = list(executor.run_many(copy.deepcopy(RECORDS), sink=DictSink()))
+        self.assertIsNotNone(executor.flat_plan)
+        expected = self.expected()
+        self.assertEqual([r.output for r in expected], [r.output for r in results])
+        self.assertEqual([[str(e) for e in r.errors] for r in expected],
+                         [[str(e) for e in r.errors] for r in results])
+
+    def test_json_sink(self):
+        outputs = list(Executor(SCHEMA).map(copy.deepcopy(RECORDS), sink=JsonSink()))
+        self.assertEqual([r.output for r in self.expected()],
+                         [json.loads(output) for output in outputs])
+        self.assertTrue(outputs[0].startswith('{"id":1,"person":{"name":"J\\u00d6HN"'))
+
+        # not static output is encoded from dict
+        executor = Executor([Copy(Input("person"), Output("p")),
+                             Copy(Input("id"), Output("p.id"))])
+        self.assertIsNone(executor.flat_plan)
+        self.assertEqual([{"p": {"name": u"jöhn", "age": 56, "id": 1}}],
+                         [json.loads(output) for output in
+                          executor.map(copy.deepcopy(RECORDS[:1]), sink=JsonSink())])
+
+    def test_json_sink_dumps(self):
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        outputs = list(Executor(SCHEMA).map(copy.deepcopy(RECORDS), sink=JsonSink(dumps)))
+        self.assertEqual([r.output for r in self.expected()],
+                         [json.loads(output) for output in outputs])
+        self.assertTrue(outputs[0].startswith(u'{"id":1,"person":{"name":"JÖHN"'))
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack_sink(self):
+        outputs = list(Executor(SCHEMA).map(copy.deepcopy(RECORDS), sink=MsgpackSink()))
+        self.assertEqual([r.output for r in self.expected()],
+                         [msgpack.unpackb(output, raw=False) for output in outputs])
+
+    def test_pipeline(self):
+        source = io.BytesIO(b"\n".join(json.dumps(r).encode("utf-8") for r in RECORDS))
+        destination = io.BytesIO()
+        JsonLinesPipeline(Executor(SCHEMA), sink=JsonSink()).run(source, destination)
+
+        lines = destination.getvalue().decode("utf-8").splitlines()
+        self.assertEqual([r.output for r in self.expected()],
+                         [json.loads(line) for line in lines])
+
+    def test_pipeline_rejects_sinks_without_lines(self):
+        with self.assertRaises(ValueError):
+            JsonLinesPipeline(Executor(SCHEMA), sink=DictSink())
@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from sculpt.core import Executor
+from sculpt.fields import Input, Output
+from sculpt.operations import Copy, Validate
+from sculpt.stream import JsonLinesPipeline, read_jsonl, write_jsonl
+from sculpt.validation import NotEmptyValidator
+
+
+def make_executor():
+    return Executor([
+        Copy(Input("person.name"), Output("name")),
+        Validate(Input("person.name"), NotEmptyValidator()),
+    ])
+
+
+SOURCE = b'{"person": {"name": "a"}}\n\n{"person": {}}\n{"person": {"name": "c"}}\n'
+
+
+class TestJsonLines(unittest.TestCase):
+    def test_read(self):
+        records = list(read_jsonl(io.BytesIO(SOURCE)))
+        self.assertEqual(3, len(records))
+        self.assertEqual({"person": {}}, records[1])
+
+    def test_write_buffered(self):
+        destination = io.BytesIO()
+        written = write_jsonl(destination, [{"a": i} for i in range(10)],
+                              buffer_size=16)
+
+        self.assertEqual(10, written)
+        lines = destination.getvalue().splitlines()
+        self.assertEqual([{"a": i} for i in range(10)],
+                         [json.loads(line.decode("utf-8")) for line in lines])
+
+    def test_pipeline(self):
+        destination = io.BytesIO()
+        errors = []
+        pipeline = JsonLinesPipeline(
+            make_executor(), write_buffer_size=8,
+            on_errors=lambda record, errs: errors.append(record))
+
+        stats = pipeline.run(io.BytesIO(SOURCE), destination)
+
+        self.assertEqual(3, stats.records)
+        self.assertEqual(1, stats.failed)
+        self.assertEqual(3, stats.written)
+        self.assertEqual([2], errors)
+        self.assertEqual(b'{"name": "a"}\n{}\n{"name": "c"}\n', destination.getvalue())
+
+    def test_pipeline_files(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        source_path = os.path.join(tmp_dir, "in.jsonl")
+        destination_path = os.path.join(tmp_dir, "out.jsonl")
+        with open(source_path, "wb") as source:
+            source.write(SOURCE)
+
+        pipeline = JsonLinesPipeline(make_executor(), skip_invalid=True,
+                                     read_buffer_size=4096)
+        stats = pipeline.run_files(source_path, destination_path)
+
+        self.assertEqual(2, stats.written)
+        with open(destination_path, "rb") as destination:
+            self.assertEqual(b'{"name": "a"}\n{"name": "c"}\n', destination.read())
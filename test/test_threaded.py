@@ -0,0 +1,95 @@
+from __future__ import absolute_import
+import threading
+import unittest
+
+from sculpt.analysis import DependencyGraph
+from sculpt.core import Context, Executor
+from sculpt.fields import Input, Output, VirtualVar
+from sculpt.operations import Copy, Apply, ApplyError, Combine, Each, Validate
+from sculpt.threaded import ThreadedExecutor
+from sculpt.validation import NotEmptyValidator
+
+
+SCHEMA = [
+    Copy(Input("name"), Output("name")),
+    Copy(Input("city"), Output("city")),
+    Apply(Output("name"), lambda value: value.upper()),
+    Apply(Output("city"), lambda value: value.title()),
+    Copy(Output("name"), VirtualVar("name")),
+    Validate(Output("city"), NotEmptyValidator()),
+    Validate(Output("country"), NotEmptyValidator()),
+]
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_levels(self):
+        graph = DependencyGraph(SCHEMA)
+        self.assertEqual([[0, 1], [2, 3], [4, 5], [6]], graph.levels())
+        self.assertIn((0, 2), graph.edges())
+        self.assertIn((5, 6), graph.edges())
+        self.assertNotIn((0, 3), graph.edges())
+
+    def test_barrier(self):
+        graph = DependencyGraph([
+            Copy(Input("a"), Output("a")),
+            Combine(Each(Input("items"), Output("items"), [])),
+            Copy(Input("b"), Output("b")),
+        ])
+        self.assertEqual([[0], [1], [2]], graph.levels())
+
+    def test_shared_values(self):
+        # Copy shares value, Apply under q changes Input p as well
+        graph = DependencyGraph([
+            Copy(Input("p"), Output("q")),
+            Apply(Output("q.name"), str.upper),
+            Copy(Input("p.name"), Output("n")),
+            Copy(Input("p.age"), Output("age")),
+        ])
+        self.assertIn((1, 2), graph.edges())
+        self.assertIn(("input", ("p", "name")), graph.effects[1].writes)
+        self.assertNotIn((1, 3), graph.edges())
+
+
+class TestThreadedExecutor(unittest.TestCase):
+    def test_same_output(self):
+        document = {"name": "john", "city": "new york"}
+        expected = Executor(SCHEMA).run(Context(dict(document)))
+        with ThreadedExecutor(SCHEMA, threads=2) as executor:
+            actual = executor.run(Context(dict(document)))
+
+        self.assertEqual(expected.stores, actual.stores)
+        self.assertEqual([str(e) for e in expected.errors],
+                         [str(e) for e in actual.errors])
+
+    def test_concurrent_applies(self):
+        started = threading.Event()
+
+        def wait(_value):
+            return started.wait(5)
+
+        def signal(_value):
+            started.set()
+            return True
+
+        schema = [Apply(Output("waited"), wait),
+                  Apply(Output("signaled"), signal)]
+        with ThreadedExecutor(schema, threads=2) as executor:
+            outputs = list(executor.map([{}]))
+        self.assertEqual([{"waited": True, "signaled": True}], outputs)
+
+    def test_shared_values(self):
+        schema = [Copy(Input("p"), Output("q")),
+                  Apply(Output("q.name"), str.upper),
+                  Copy(Input("p.name"), Output("n"))]
+        expected = Executor(schema).run(Context({"p": {"name": "bob"}}))
+        with ThreadedExecutor(schema, threads=2) as executor:
+            outputs = list(executor.map([{"p": {"name": "bob"}}]))
+        self.assertEqual([expected.output()], outputs)
+        self.assertEqual("BOB", outputs[0]["n"])
+
+    def test_apply_error(self):
+        schema = [Apply(Output("a"), lambda value: value + 1),
+                  Apply(Output("b"), lambda value: value)]
+        with ThreadedExecutor(schema, threads=2) as executor:
+            with self.assertRaises(ApplyError):
+                executor.run(Context({}))